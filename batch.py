@@ -0,0 +1,218 @@
+# batch.py
+"""
+Pemrosesan batch gambar tanpa GUI: rantai filter, resize, dan konversi format
+untuk banyak file sekaligus memakai process pool.
+
+Contoh:
+    python batch.py "aset/**/*.png" -o hasil --filter blur:radius=2 --filter grayscale
+    python batch.py foto/ -o kecil --resize 1024x1024 --format jpg --workers 8
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from PIL import Image
+
+from features.filters import FILTER_NAMES, apply_filter_to_image
+
+# Ekstensi yang dianggap gambar saat memindai direktori
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp")
+# Format yang tidak menyimpan alpha; gambar RGBA dikonversi ke RGB
+FORMATS_WITHOUT_ALPHA = ("JPEG", "BMP")
+# Tugas yang sedang berjalan/antre per worker; membatasi memori pada ribuan file
+PENDING_PER_WORKER = 2
+
+
+def parse_filter(spec: str):
+    """
+    Mengurai "nama" atau "nama:kunci=nilai,kunci=nilai" menjadi (nama, kwargs).
+    """
+    name, _, params = spec.partition(":")
+    if name not in FILTER_NAMES:
+        raise argparse.ArgumentTypeError(
+            f"Filter '{name}' tidak dikenal (pilihan: {', '.join(FILTER_NAMES)}).")
+    kwargs = {}
+    for item in filter(None, params.split(",")):
+        key, _, value = item.partition("=")
+        try:
+            kwargs[key] = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Parameter '{item}' tidak valid.")
+    return name, kwargs
+
+
+def parse_size(spec: str):
+    try:
+        width, height = (int(value) for value in spec.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ukuran '{spec}' harus berbentuk LEBARxTINGGI.")
+    return width, height
+
+
+def find_images(inputs, recursive: bool):
+    """
+    Menghasilkan (path, path relatif keluaran) dari daftar direktori, file,
+    atau pola glob, secara bertahap (tanpa membuat daftar semua file).
+    """
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        path = os.path.join(root, name)
+                        yield path, os.path.relpath(path, pattern)
+                if not recursive:
+                    break
+        elif not glob.has_magic(pattern):
+            if os.path.isfile(pattern):
+                yield pattern, os.path.basename(pattern)
+        else:
+            # Struktur direktori di bawah bagian pola sebelum wildcard dipertahankan
+            base = _glob_base(pattern)
+            for path in glob.iglob(pattern, recursive=True):
+                if os.path.isfile(path):
+                    yield path, os.path.relpath(path, base) if base else path
+
+
+def _glob_base(pattern: str) -> str:
+    """
+    Direktori pola sebelum komponen pertama yang mengandung wildcard.
+    """
+    parts = []
+    for part in pattern.replace("\\", "/").split("/"):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return "/".join(parts)
+
+
+def process_image(source_path: str, output_path: str, filters, size, output_format):
+    """
+    Memproses satu gambar (berjalan di proses worker) dan menulis hasilnya
+    secara atomik. Hanya ringkasan kecil yang dikirim kembali ke proses utama.
+    """
+    with Image.open(source_path) as image_file:
+        if size:
+            # JPEG bisa didekode langsung pada skala lebih kecil (skala DCT)
+            image_file.draft("RGB", size)
+        image = image_file.convert(
+            "RGBA" if "A" in image_file.getbands() or image_file.mode == "P" else "RGB")
+    if size:
+        # Diperkecil sebelum filter agar filter bekerja pada piksel keluaran saja
+        image.thumbnail(size, Image.LANCZOS, reducing_gap=3.0)
+    for name, kwargs in filters:
+        image = apply_filter_to_image(image, name, **kwargs)
+
+    image_format = output_format or Image.registered_extensions().get(
+        os.path.splitext(output_path)[1].lower())
+    if image_format in FORMATS_WITHOUT_ALPHA and image.mode == "RGBA":
+        image = image.convert("RGB")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    temp_path = output_path + ".tmp"
+    try:
+        image.save(temp_path, format=image_format)
+        os.replace(temp_path, output_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return image.size
+
+
+def _output_path(relative_path: str, output_dir: str, extension: str):
+    if extension:
+        relative_path = os.path.splitext(relative_path)[0] + extension
+    return os.path.join(output_dir, relative_path)
+
+
+def run(args) -> int:
+    """
+    Menjalankan batch. Tugas dikirim bertahap ke process pool sehingga
+    jumlah tugas yang antre (dan memori) tetap terbatas berapa pun jumlah file.
+
+    Returns:
+        Kode keluar: 0 jika semua berhasil, 1 jika ada yang gagal.
+    """
+    extension = None
+    output_format = None
+    if args.format:
+        extension = "." + args.format.lower().lstrip(".")
+        output_format = Image.registered_extensions().get(extension)
+        if output_format is None:
+            print(f"Format '{args.format}' tidak dikenal.")
+            return 2
+
+    workers = args.workers or os.cpu_count() or 1
+    start_time = time.time()
+    done = failed = skipped = 0
+    pending = {}
+    jobs = find_images(args.inputs, args.recursive)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            # Isi antrean sampai batas, lalu tunggu minimal satu tugas selesai
+            while len(pending) < workers * PENDING_PER_WORKER:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                source_path, relative_path = job
+                output_path = _output_path(relative_path, args.output, extension)
+                if not args.overwrite and os.path.exists(output_path):
+                    skipped += 1
+                    continue
+                future = executor.submit(process_image, source_path, output_path,
+                                         args.filters, args.resize, output_format)
+                pending[future] = source_path
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                source_path = pending.pop(future)
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"Gagal memproses '{source_path}': {e}")
+            if done and done % 100 == 0 and not args.quiet:
+                print(f"{done} gambar diproses ({time.time() - start_time:.1f} detik)...")
+
+    elapsed = time.time() - start_time
+    print(f"Selesai: {done} berhasil, {failed} gagal, {skipped} dilewati "
+          f"dalam {elapsed:.2f} detik ({done / max(elapsed, 1e-9):.1f} gambar/detik).")
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Memproses banyak gambar sekaligus dengan filter yang sama seperti aplikasi.")
+    parser.add_argument("inputs", nargs="+",
+                        help="Direktori, file, atau pola glob (misal 'aset/**/*.png').")
+    parser.add_argument("-o", "--output", required=True, help="Direktori keluaran.")
+    parser.add_argument("--filter", dest="filters", action="append", default=[],
+                        type=parse_filter, metavar="NAMA[:k=v,...]",
+                        help="Filter yang diterapkan berurutan; boleh diulang.")
+    parser.add_argument("--resize", type=parse_size, metavar="LEBARxTINGGI",
+                        help="Perkecil agar muat di dalam ukuran ini (rasio tetap), sebelum filter.")
+    parser.add_argument("--format", help="Format keluaran (png, jpg, webp, ...).")
+    parser.add_argument("--workers", type=int, help="Jumlah proses (default: jumlah CPU).")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Telusuri subdirektori dari input berupa direktori.")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Timpa file keluaran yang sudah ada (default: dilewati).")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Tanpa pesan progres.")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
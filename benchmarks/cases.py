@@ -0,0 +1,287 @@
+# benchmarks/cases.py
+
+import math
+import os
+import subprocess
+import sys
+
+from PIL import Image
+
+from core.document import Document, write_image_atomic
+from core.drawing_tools import BrushTool
+from features.compositor import BLEND_MODES
+from features.filters import FILTER_NAMES
+from features.project_file import ProjectFile
+
+# Ukuran kanvas dan jumlah layer untuk benchmark komposit
+CANVAS_SIZES = ((800, 600), (1920, 1080), (3840, 2160))
+LAYER_COUNTS = (1, 10, 50)
+# Mode cepat: subset kecil untuk CI atau pemeriksaan sebelum commit
+QUICK_CANVAS_SIZES = ((800, 600), (1920, 1080))
+QUICK_LAYER_COUNTS = (1, 10)
+
+# Batas waktu absolut (ms, median) terlepas dari baseline; melewatinya
+# dilaporkan sebagai kegagalan oleh run.py
+BUDGETS_MS = {
+    # Proses Python baru sampai core.application selesai diimpor
+    "startup/import_application": 200,
+    # Proses baru sampai jendela utama tergambar pertama kali
+    "startup/first_frame": 1000,
+}
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dijalankan di proses baru: waktu sampai frame pertama, lalu keluar tanpa
+# menunggu mainloop atau pembersihan
+FIRST_FRAME_SCRIPT = """
+import os
+import tkinter as tk
+from core.application import Application
+root = tk.Tk()
+Application(root)
+root.update()
+os._exit(0)
+"""
+
+
+def make_document(width: int, height: int, layer_count: int) -> Document:
+    """
+    Membuat dokumen dengan layer berisi bentuk semi-transparan dan mode blend
+    bergantian, supaya komposit mengerjakan pekerjaan yang realistis.
+    """
+    document = Document(width, height)
+    layer_manager = document.layer_manager
+    for index in range(layer_count - 1):
+        layer_manager.add_layer(f"Layer {index + 1}")
+        layer = layer_manager.get_active_layer()
+        x = (index * 97) % max(1, width // 2)
+        y = (index * 53) % max(1, height // 2)
+        box = (x, y, x + width // 2, y + height // 2)
+        layer.draw_context.ellipse(box, fill=(40 * index % 256, 120, 200, 160))
+        layer.mark_dirty(box)
+        layer.set_blend_mode(BLEND_MODES[index % len(BLEND_MODES)])
+    layer_manager.get_composite_image()
+    return document
+
+
+def name_filter(names):
+    """
+    Membuat fungsi wanted(*nama_benchmark) yang bernilai True jika salah satu
+    nama mengandung salah satu teks filter (atau tidak ada filter).
+    """
+    def wanted(*case_names):
+        return not names or any(part in name for name in case_names for part in names)
+    return wanted
+
+
+def _stroke_points(width: int, height: int, count: int = 200):
+    return [(int(width * (0.1 + 0.8 * i / count)),
+             int(height * (0.5 + 0.3 * math.sin(i / 10))))
+            for i in range(count)]
+
+
+def _run_python(code: str) -> bool:
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0
+
+
+def startup_cases(quick: bool, wanted):
+    """
+    Waktu mulai dingin, diukur pada proses Python baru (termasuk start interpreter).
+    """
+    yield "startup/import_application", lambda: _run_python("import core.application")
+    # Frame pertama butuh display; dilewati pada server tanpa display
+    if wanted("startup/first_frame") and _run_python("import tkinter; tkinter.Tk()"):
+        yield "startup/first_frame", lambda: _run_python(FIRST_FRAME_SCRIPT)
+
+
+def composite_cases(quick: bool, wanted):
+    sizes = QUICK_CANVAS_SIZES if quick else CANVAS_SIZES
+    counts = QUICK_LAYER_COUNTS if quick else LAYER_COUNTS
+    for width, height in sizes:
+        for count in counts:
+            names = [f"composite/full/{count}x{width}x{height}"]
+            if count == counts[-1]:
+                # Dokumen dengan layer terbanyak juga dipakai benchmark damage
+                names.append(f"composite/damage_64/{count}x{width}x{height}")
+            if not wanted(*names):
+                continue
+            document = make_document(width, height, count)
+            layer_manager = document.layer_manager
+
+            def full(layer_manager=layer_manager):
+                # Paksa komposit ulang seluruh dokumen
+                layer_manager._composited_layer_ids = None
+                layer_manager.get_composite_image()
+
+            yield names[0], full
+            if len(names) == 1:
+                continue
+            layer = layer_manager.get_active_layer()
+
+            def damaged(layer_manager=layer_manager, layer=layer):
+                # Satu dab kuas: hanya area kecil yang dikomposit ulang
+                layer.mark_dirty((100, 100, 164, 164))
+                layer_manager.get_composite_image()
+
+            yield names[1], damaged
+
+
+def stroke_cases(quick: bool, wanted):
+    if not wanted("stroke/brush_draw/200seg", "stroke/interactive/50seg_1920x1080"):
+        return
+    width, height = 1920, 1080
+    document = make_document(width, height, 2)
+    layer = document.layer_manager.get_active_layer()
+    points = _stroke_points(width, height)
+
+    def brush_draw():
+        tool = BrushTool(layer.draw_context, "#FF0000", 12)
+        tool.start_draw(*points[0])
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            tool.draw(x1, y1, x2, y2)
+
+    yield "stroke/brush_draw/200seg", brush_draw
+
+    def interactive():
+        # Seperti di aplikasi: setiap segmen diikuti komposit untuk tampilan
+        document.begin_stroke("brush", *points[0], "#0000FF", 12)
+        for x, y in points[1:50]:
+            document.stroke_to(x, y)
+            document.layer_manager.get_composite_image()
+        document.end_stroke(*points[49])
+
+    yield "stroke/interactive/50seg_1920x1080", interactive
+
+
+def display_cases(quick: bool, wanted):
+    if not wanted("display/crop/1920x1080", "display/photoimage_paste/1920x1080"):
+        return
+    document = make_document(3840, 2160, 3)
+    composite = document.layer_manager.get_composite_image()
+    viewport = (1000, 500, 2920, 1580)  # Viewport 1920x1080
+
+    yield "display/crop/1920x1080", lambda: composite.crop(viewport)
+
+    if not wanted("display/photoimage_paste/1920x1080"):
+        return
+    # PhotoImage butuh display; dilewati pada server tanpa display
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        return
+    try:
+        photo = ImageTk.PhotoImage(composite.crop(viewport))
+        yield "display/photoimage_paste/1920x1080", lambda: photo.paste(composite.crop(viewport))
+    finally:
+        # Dijalankan saat generator selesai dikonsumsi atau ditutup
+        root.destroy()
+
+
+def filter_cases(quick: bool, wanted):
+    if not wanted(*(f"filter/{name}/1920x1080" for name in FILTER_NAMES)):
+        return
+    document = make_document(1920, 1080, 2)
+    layer = document.layer_manager.get_active_layer()
+    box = (0, 0, 1920, 1080)
+    layer.draw_context.rectangle(box, fill=(90, 160, 30, 255))
+    layer.mark_dirty(box)
+    for name in FILTER_NAMES:
+        yield f"filter/{name}/1920x1080", lambda name=name: document.apply_filter(name)
+
+
+def history_cases(quick: bool, wanted):
+    if not wanted("undo/layer_pixels/1920x1080"):
+        return
+    document = make_document(1920, 1080, 10)
+    layer = document.layer_manager.get_active_layer()
+    box = (0, 0, 1920, 1080)
+    layer.draw_context.rectangle(box, fill=(90, 160, 30, 255))
+    layer.mark_dirty(box)
+    # Satu entri LayerPixelsChange seluas layer, ditukar bolak-balik
+    document.apply_filter("invert")
+
+    def undo_redo():
+        document.undo()
+        document.redo()
+
+    yield "undo/layer_pixels/1920x1080", undo_redo
+
+
+def io_cases(quick: bool, work_dir: str, wanted):
+    width, height = (1920, 1080) if quick else (3840, 2160)
+    size = f"{width}x{height}"
+    # Semua benchmark grup ini berbagi persiapan yang sama
+    if not wanted(f"io/export_png/{size}", f"io/save_project_full/{size}_10layers",
+                  f"io/save_project_incremental/{size}_10layers",
+                  f"io/open_project_viewport/{size}_10layers",
+                  f"io/open_project_full/{size}_10layers",
+                  f"io/open_png/{size}", f"io/decode_png/{size}"):
+        return
+    document = make_document(width, height, 10)
+    png_path = os.path.join(work_dir, "export.png")
+    project_path = os.path.join(work_dir, "project.mpaint")
+    counter = [0]
+
+    yield f"io/export_png/{size}", lambda: document.export(png_path)
+
+    def save_full():
+        counter[0] += 1
+        ProjectFile(os.path.join(work_dir, f"full-{counter[0]}.mpaint")).save(
+            document.layer_manager)
+
+    yield f"io/save_project_full/{size}_10layers", save_full
+
+    project = ProjectFile(project_path)
+    project.save(document.layer_manager)
+    layer = document.layer_manager.get_active_layer()
+
+    def save_incremental():
+        # Satu tile diedit lalu disimpan ke file yang sama
+        layer.draw_context.rectangle((10, 10, 40, 40), fill=(counter[0] % 256, 0, 0, 255))
+        layer.mark_dirty((10, 10, 41, 41))
+        counter[0] += 1
+        project.save(document.layer_manager)
+
+    yield f"io/save_project_incremental/{size}_10layers", save_incremental
+
+    def open_viewport():
+        opened = Document.open(project_path)
+        opened.layer_manager.ensure_loaded((0, 0, 1920, 1080))
+
+    yield f"io/open_project_viewport/{size}_10layers", open_viewport
+
+    def open_full():
+        Document.open(project_path).layer_manager.ensure_loaded()
+
+    yield f"io/open_project_full/{size}_10layers", open_full
+
+    write_image_atomic(document.composite(), png_path)
+    yield f"io/open_png/{size}", lambda: Document.open(png_path)
+
+    def decode_png():
+        with Image.open(png_path) as image_file:
+            image_file.load()
+
+    yield f"io/decode_png/{size}", decode_png
+
+
+def all_cases(quick: bool, work_dir: str, names=None):
+    """
+    Menghasilkan (nama, fungsi) untuk semua benchmark. Persiapan setiap grup
+    dilakukan saat grup itu dicapai, dan grup (atau ukuran dokumen) yang tidak
+    memiliki benchmark cocok dengan filter names dilewati sebelum persiapannya.
+    Grup boleh tetap menghasilkan benchmark yang tidak cocok; pemanggil
+    menyaringnya lagi per nama.
+    """
+    wanted = name_filter(names)
+    yield from startup_cases(quick, wanted)
+    yield from composite_cases(quick, wanted)
+    yield from stroke_cases(quick, wanted)
+    yield from display_cases(quick, wanted)
+    yield from filter_cases(quick, wanted)
+    yield from history_cases(quick, wanted)
+    yield from io_cases(quick, work_dir, wanted)
@@ -0,0 +1,222 @@
+# benchmarks/run.py
+"""
+Benchmark jalur panas render dan editing, tanpa GUI.
+
+Contoh:
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --output hasil.json
+    python -m benchmarks.run composite filter/blur
+    python -m benchmarks.run --update-baseline
+
+Hasil setiap benchmark (median dan minimum, dalam milidetik) dibandingkan
+dengan baseline.json; benchmark yang lebih lambat dari baseline melebihi
+ambang (default 25%) dilaporkan sebagai regresi dan kode keluar menjadi 1.
+Beberapa benchmark (misal waktu startup) juga memiliki batas absolut
+(BUDGETS_MS) yang diperiksa tanpa baseline.
+Baseline bergantung pada mesin: baseline mencatat jumlah CPU dan platform
+tempat ia direkam. Jika berbeda dengan mesin saat ini, regresi hanya
+ditampilkan sebagai peringatan; perbarui dengan --update-baseline saat
+berpindah mesin.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import PIL
+
+from benchmarks.cases import BUDGETS_MS, all_cases, name_filter
+from utils import log
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 5
+# Benchmark yang lebih cepat dari ini diulang dalam satu sampel agar stabil
+MIN_SAMPLE_SECONDS = 0.005
+# Info mesin yang harus sama dengan baseline agar regresi dianggap kegagalan
+MACHINE_KEYS = ("cpu_count", "platform")
+
+
+def measure(function, repeat: int):
+    """
+    Menjalankan function sekali untuk pemanasan, lalu mengambil sampel
+    sebanyak repeat. Fungsi yang sangat cepat dijalankan beberapa kali per
+    sampel dan waktunya dirata-rata.
+
+    Returns:
+        dict dengan median_ms, min_ms, dan jumlah pemanggilan per sampel.
+    """
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    loops = 1 if elapsed >= MIN_SAMPLE_SECONDS else min(
+        1000, int(MIN_SAMPLE_SECONDS / max(elapsed, 1e-7)) + 1)
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        samples.append((time.perf_counter() - start) / loops * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "loops": loops,
+    }
+
+
+def environment_info() -> dict:
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "numpy": numpy_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_benchmarks(args) -> dict:
+    results = {}
+    wanted = name_filter(args.names)
+    with tempfile.TemporaryDirectory(prefix="mini-paint-bench-") as work_dir:
+        for name, function in all_cases(args.quick, work_dir, args.names):
+            if not wanted(name):
+                continue
+            results[name] = measure(function, args.repeat)
+            if not args.quiet:
+                print(f"{name:<52} {results[name]['median_ms']:>10.3f} ms "
+                      f"(min {results[name]['min_ms']:.3f})")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """
+    Membandingkan median hasil dengan baseline.
+
+    Returns:
+        Daftar (nama, rasio) untuk benchmark yang melambat melebihi ambang.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference or reference["median_ms"] <= 0:
+            continue
+        ratio = result["median_ms"] / reference["median_ms"]
+        result["baseline_ms"] = reference["median_ms"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1.0 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def check_budgets(results: dict):
+    """
+    Returns:
+        Daftar (nama, median, batas) untuk benchmark yang melewati BUDGETS_MS.
+    """
+    return [(name, results[name]["median_ms"], budget)
+            for name, budget in BUDGETS_MS.items()
+            if name in results and results[name]["median_ms"] > budget]
+
+
+def load_baseline(path: str):
+    """
+    Returns:
+        tuple: (info mesin baseline, hasil per benchmark); keduanya kosong
+        jika file baseline belum ada.
+    """
+    try:
+        with open(path, encoding="utf-8") as baseline_file:
+            data = json.load(baseline_file)
+    except FileNotFoundError:
+        return {}, {}
+    return data.get("meta", {}), data.get("results", {})
+
+
+def machine_mismatch(meta: dict, baseline_meta: dict):
+    """
+    Returns:
+        Daftar (kunci, nilai baseline, nilai saat ini) untuk MACHINE_KEYS yang berbeda.
+    """
+    return [(key, baseline_meta.get(key), meta.get(key)) for key in MACHINE_KEYS
+            if baseline_meta and baseline_meta.get(key) != meta.get(key)]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Benchmark komposit, goresan, filter, riwayat, dan I/O tanpa GUI.")
+    parser.add_argument("names", nargs="*",
+                        help="Hanya jalankan benchmark yang namanya mengandung teks ini.")
+    parser.add_argument("--quick", action="store_true",
+                        help="Ukuran kanvas dan jumlah layer yang lebih kecil.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Jumlah sampel per benchmark (default: {DEFAULT_REPEAT}).")
+    parser.add_argument("-o", "--output", help="Tulis hasil (JSON) ke file ini.")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="File baseline untuk perbandingan.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Perlambatan relatif yang dianggap regresi (0.25 = 25%%).")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Simpan hasil sebagai baseline baru (digabung dengan yang lama).")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="Hanya tampilkan ringkasan.")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    # Log aplikasi hanya peringatan ke atas (MINI_PAINT_LOG tetap berlaku)
+    log.configure({"default": "WARNING"})
+    results = run_benchmarks(args)
+    report = {"meta": environment_info(), "results": results}
+
+    mismatch = []
+    if args.update_baseline:
+        # Digabung supaya menjalankan sebagian benchmark tidak menghapus sisanya
+        _, merged = load_baseline(args.baseline)
+        merged.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump({"meta": report["meta"], "results": merged},
+                      baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"Baseline diperbarui: {args.baseline} ({len(results)} benchmark).")
+        regressions = []
+    else:
+        baseline_meta, baseline = load_baseline(args.baseline)
+        regressions = compare(results, baseline, args.threshold)
+        mismatch = machine_mismatch(report["meta"], baseline_meta)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+            output_file.write("\n")
+
+    over_budget = check_budgets(results)
+    for key, recorded, current in mismatch:
+        print(f"PERINGATAN: baseline direkam dengan {key}={recorded}, mesin ini {current}.")
+    if mismatch and regressions:
+        print("PERINGATAN: mesin berbeda dari baseline; regresi tidak dianggap kegagalan "
+              "(perbarui dengan --update-baseline).")
+    for name, ratio in regressions:
+        print(f"REGRESI: {name} {ratio:.2f}x lebih lambat dari baseline.")
+    for name, median, budget in over_budget:
+        print(f"MELEWATI BATAS: {name} {median:.1f} ms (batas {budget} ms).")
+    print(f"{len(results)} benchmark selesai, {len(regressions)} regresi "
+          f"(ambang {args.threshold:.0%}), {len(over_budget)} melewati batas.")
+    return 1 if (regressions and not mismatch) or over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
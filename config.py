@@ -1,5 +1,8 @@
 # config.py
 
+import os
+
+
 class AppConfig:
     """
     Kelas untuk menyimpan konfigurasi global aplikasi Paint.
@@ -13,6 +16,9 @@ class AppConfig:
     DEFAULT_CANVAS_WIDTH = 800
     DEFAULT_CANVAS_HEIGHT = 600
     DEFAULT_BACKGROUND_COLOR = "#FFFFFF"  # Putih
+    VIEWPORT_BACKGROUND_COLOR = "#A0A0A0"  # Area widget di luar dokumen
+    RESIZE_DEBOUNCE_MS = 80  # Jeda sebelum tampilan diperbarui saat jendela diubah ukurannya
+    SCROLL_STEP = 40  # Piksel dokumen per langkah roda mouse
 
     # Pengaturan Alat Gambar (Drawing Tools)
     DEFAULT_BRUSH_SIZE = 5
@@ -21,15 +27,81 @@ class AppConfig:
     MIN_BRUSH_SIZE = 1
     MAX_BRUSH_SIZE = 50
 
+    # Ukuran tile (px) untuk cache adjustment layer dan pelacakan area kotor
+    TILE_SIZE = 256
+    WORKER_THREADS = 4  # Jumlah thread untuk operasi per layer yang berjalan paralel
+
+    # Pengaturan Panel Layer
+    LAYER_PANEL_WIDTH = 220
+    LAYER_ROW_HEIGHT = 40
+    THUMBNAIL_SIZE = (48, 32)  # Ukuran maksimum thumbnail (lebar, tinggi)
+    THUMBNAIL_POLL_MS = 150  # Interval panel memeriksa perubahan layer dan hasil thumbnail
+    THUMBNAIL_STROKE_INTERVAL_MS = 1000  # Interval minimum penjadwalan thumbnail saat menggores
+    THUMBNAIL_WORKER_DELAY_MS = 5  # Jeda worker antar thumbnail agar UI tetap diutamakan
+
+    # Pengaturan File Proyek (.mpaint)
+    PROJECT_PNG_COMPRESS_LEVEL = 1  # Kompresi PNG per tile (0-9); rendah = simpan lebih cepat
+    # Arsip ditulis ulang utuh jika porsi data yang tidak dirujuk melebihi rasio ini
+    PROJECT_COMPACT_RATIO = 0.5
+    PROJECT_COMPACT_MIN_BYTES = 16 * 1024 * 1024  # Sampah di bawah ini tidak memicu compaction
+    # Gambar sebesar ini atau lebih dibuka sebagai dokumen baru dengan proxy
+    # beresolusi rendah; resolusi penuh didekode di latar belakang
+    LARGE_IMAGE_PIXELS = 25_000_000
+    PROXY_MAX_SIDE = 2048  # Sisi terpanjang proxy (piksel)
+    MAX_IMAGE_PIXELS = 1_000_000_000  # Batas ukuran gambar yang boleh dibuka
+    LARGE_IMAGE_POLL_MS = 100  # Interval pemeriksaan dekode latar belakang
+    # Penyimpanan piksel layer: "auto" (file scratch untuk layer besar),
+    # "file" (selalu file scratch), atau "memory" (selalu mmap anonim)
+    LAYER_STORAGE = "auto"
+    FILE_STORAGE_MIN_BYTES = 256 * 1024 * 1024  # Ambang "auto" per layer
+    SCRATCH_DIR = os.path.join(os.path.expanduser("~"), ".mini_paint", "scratch")
+
     # Pengaturan Undo/Redo
     MAX_UNDO_HISTORY = 20  # Jumlah langkah undo yang disimpan
 
     # Path Sumber Daya (Resources Paths) - Menghapus ICONS_PATH
     FONTS_PATH = "resources/fonts/"  # Tetap ada untuk font
+    # Indeks font (FONTS_PATH + direktori font sistem), dibangun ulang jika
+    # mtime salah satu direktori berubah
+    FONT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".mini_paint", "font_index.json")
+    FONT_CACHE_SIZE = 32  # Jumlah ImageFont (keluarga, ukuran, gaya) yang disimpan
+    # Dicoba berurutan jika keluarga yang dipilih tidak terpasang
+    FALLBACK_FONT_FAMILIES = ("Arial", "Liberation Sans", "DejaVu Sans", "Helvetica")
 
     # Pengaturan Lainnya
-    # Interval autosave dalam menit (jika diimplementasikan)
+    # Interval autosave dalam menit (0 = nonaktif)
     AUTOSAVE_INTERVAL_MINUTES = 5
+    AUTOSAVE_RETRY_MS = 500  # Jeda coba lagi jika autosave tertunda (misal saat menggores)
+    # Direktori autosave untuk pemulihan setelah crash
+    RECOVERY_DIR = os.path.join(os.path.expanduser("~"), ".mini_paint", "recovery")
+
+    # Level log per subsistem (DEBUG, INFO, WARNING, ERROR, OFF); subsistem
+    # yang tidak disebut memakai "default". Dapat ditimpa lewat variabel
+    # lingkungan MINI_PAINT_LOG, misal "canvas=DEBUG,layers=DEBUG".
+    # Subsistem: app, canvas, document, tools, layers, project, autosave,
+    # image, ui, trace
+    LOG_LEVELS = {
+        "default": "INFO",
+        # Jalur per event (mouse, slider, update UI) hanya mencatat di DEBUG
+        "canvas": "WARNING",
+        "tools": "WARNING",
+        "ui": "WARNING",
+    }
+
+    # HUD performa (F3 atau menu View): FPS, latensi input ke layar, waktu per
+    # tahap pipeline tampilan, memori riwayat undo, dan rasio hit cache
+    PERF_HUD_ENABLED = False  # Tampilkan saat aplikasi dimulai
+    PERF_HUD_LOCATION = "canvas"  # "canvas" (overlay pojok kiri atas) atau "status" (status bar)
+    PERF_HUD_REFRESH_MS = 250  # Interval pembaruan teks HUD (bukan per frame)
+    PERF_HUD_SAMPLE_FRAMES = 120  # Jumlah frame terakhir untuk rata-rata per tahap
+
+    # Batas event span trace di memori (main.py --trace-spans); event
+    # berikutnya dibuang agar sesi panjang tidak menghabiskan memori
+    TRACE_SPANS_MAX_EVENTS = 1_000_000
+
+    # Mode profil (main.py --profile)
+    PROFILE_TOP_ENTRIES = 15  # Jumlah fungsi/lokasi alokasi per subsistem di laporan
+    PROFILE_TRACEMALLOC_FRAMES = 1  # Kedalaman traceback alokasi (lebih dalam = lebih lambat)
 
     # Contoh daftar warna standar untuk palet
     COLOR_PALETTE = [
@@ -1,26 +1,41 @@
 # core/application.py
 
-from features.layer_manager import Layer, LayerManager  # Import Layer juga
-from features.filters import ImageFilters
-from features.selection_tool import SelectionTool
-from features.text_tool import TextTool
+from features.layer_manager import AdjustmentLayer, CompositeSnapshot
 from ui.menus import MainMenu
 from ui.toolbars import ToolbarPanel
 from ui.main_window import MainWindow
 from core.canvas_manager import CanvasManager
+from core.document import Document, write_image_atomic
 from config import AppConfig
+from utils.log import get_logger
+from utils.tracing import traced
 import tkinter as tk
+import json
 import sys
 import os
 import time  # Import modul time untuk mengukur durasi
-# Pastikan ImageDraw terimpor di sini juga untuk konteks drawing
-from PIL import ImageDraw
+from PIL import Image
+
+# Modul yang tidak dibutuhkan untuk frame pertama (file proyek, gambar besar,
+# alat teks/seleksi, panel layer, penyimpanan latar, autosave, perekam input,
+# dialog, thread pool) diimpor saat pertama dipakai
+
+log = get_logger("app")
 
 # Pastikan direktori induk (complex-paint-app/) ada di path
 # agar modul dari config, ui, features, dan utils dapat diimpor.
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 
+@traced("decode_image", "image")
+def _decode_image(file_path: str):
+    """
+    Mendekode file gambar ke RGBA (aman dipanggil dari thread pekerja).
+    """
+    with Image.open(file_path) as image_file:
+        return image_file.convert("RGBA")  # Pastikan RGBA untuk layer
+
+
 class Application:
     """
     Kelas utama aplikasi Paint, mengelola jendela utama dan koordinasi komponen.
@@ -42,6 +57,18 @@ class Application:
         self.current_tool = "brush"
         self.current_brush_size = AppConfig.DEFAULT_BRUSH_SIZE
         self.current_color = AppConfig.DEFAULT_BRUSH_COLOR
+        # File proyek (.mpaint) yang sedang dibuka, None jika belum pernah disimpan
+        self.project = None
+        # Penyimpanan dan ekspor berjalan di thread pekerja; dibuat saat
+        # pertama dipakai (lihat properti background_saver)
+        self._background_saver = None
+        # Autosave berkala ke direktori pemulihan (lihat core/autosave.py),
+        # dibuat saat pertama dipakai (lihat properti autosave)
+        self._autosave = None
+        # Perekam input kanvas (lihat core/input_trace.py), None jika tidak merekam
+        self.trace_recorder = None
+        # HUD performa (lihat ui/perf_hud.py), dibuat saat pertama ditampilkan
+        self.perf_hud = None
 
         # --- Inisialisasi Komponen ---
         start_time_ui_init = time.time()  # Mulai pengukuran UI utama
@@ -49,40 +76,100 @@ class Application:
         # Inisialisasi jendela utama (akan menampilkan loading screen)
         self.main_window = MainWindow(self.root, self)
 
-        # Inisialisasi manajer layer (sebelum canvas_manager agar canvas_manager bisa menggunakannya)
-        self.layer_manager = LayerManager(
-            self, AppConfig.DEFAULT_CANVAS_WIDTH, AppConfig.DEFAULT_CANVAS_HEIGHT)
+        # Inti dokumen tanpa UI (layer, alat, filter, riwayat); UI hanya klien di atasnya.
+        # Dibuat sebelum canvas_manager agar canvas_manager bisa menggunakannya
+        self.document = Document(
+            AppConfig.DEFAULT_CANVAS_WIDTH, AppConfig.DEFAULT_CANVAS_HEIGHT,
+            status_callback=self.main_window.update_status,
+            operation_callback=self._log_operation)
+        self.layer_manager = self.document.layer_manager
 
         # Inisialisasi manajer kanvas, meneruskan frame kanvas dari main_window
         self.canvas_manager = CanvasManager(
             self, self.main_window.canvas_frame)
-        # Atur current_image dari canvas_manager untuk sinkronisasi awal
-        self.canvas_manager.current_image = self.layer_manager.get_composite_image()
-        self.canvas_manager._update_canvas_display()  # Perbarui tampilan awal kanvas
+        # Komposit awal (yang mengimpor NumPy) ditunda sampai frame pertama
+        # tergambar, lihat run()
 
         # Inisialisasi menu dan toolbar
         self.main_menu = MainMenu(self.root, self)
         self.toolbar_panel = ToolbarPanel(self.main_window.top_frame, self)
+        # Panel layer (thread thumbnail, ImageTk) dibuat setelah frame pertama, lihat run()
+        self.layers_panel = None
 
-        # Inisialisasi alat fitur
-        self.text_tool = TextTool(self.canvas_manager, self)
-        self.selection_tool = SelectionTool(self.canvas_manager)
-        self.image_filters = ImageFilters(self)
+        # Alat teks dan seleksi dibuat saat pertama dipilih (lihat properti text_tool)
+        self._text_tool = None
+        self._selection_tool = None
 
         # Mengupdate tampilan UI awal
         self.toolbar_panel.update_ui_elements()
 
         end_time_ui_init = time.time()  # Akhiri pengukuran UI utama
-        print(
-            f"DEBUG: Inisialisasi UI dan fitur selesai dalam {end_time_ui_init - start_time_ui_init:.4f} detik.")
-        print("Application diinisialisasi sepenuhnya.")
+        log.debug("Inisialisasi UI dan fitur selesai dalam %.4f detik.",
+                  end_time_ui_init - start_time_ui_init)
+        log.debug("Application diinisialisasi sepenuhnya.")
 
     def run(self):
         """
         Memulai event loop Tkinter.
         """
         # self.root.deiconify() # Tampilkan jendela utama setelah inisialisasi selesai
+        # Gambar frame pertama (jendela, menu, toolbar) sebelum komposit awal
+        self.root.update()
+        if self.canvas_manager.current_image is None:
+            self.canvas_manager.refresh_composite()
+        self.root.after_idle(self._create_layers_panel)
+        if AppConfig.PERF_HUD_ENABLED:
+            self.toggle_perf_hud()
+        self.autosave.start()
         self.root.mainloop()
+        self.stop_input_recording()
+        # Ditutup normal: data pemulihan tidak diperlukan lagi
+        self.autosave.discard()
+
+    def _create_layers_panel(self):
+        from ui.layers_panel import LayersPanel
+        self.layers_panel = LayersPanel(self.main_window.side_frame, self)
+
+    @property
+    def background_saver(self):
+        """
+        BackgroundSaver untuk simpan/ekspor, dibuat saat pertama dibutuhkan.
+        """
+        if self._background_saver is None:
+            from core.background_save import BackgroundSaver
+            self._background_saver = BackgroundSaver(self)
+        return self._background_saver
+
+    @property
+    def autosave(self):
+        """
+        AutosaveService, dibuat saat operasi pertama dicatat atau saat run()
+        memulai timer autosave (setelah frame pertama).
+        """
+        if self._autosave is None:
+            from core.autosave import AutosaveService
+            self._autosave = AutosaveService(self)
+        return self._autosave
+
+    def _log_operation(self, description: str):
+        self.autosave.log_operation(description)
+
+    @property
+    def text_tool(self):
+        """
+        TextTool, dibuat (dan modulnya diimpor) saat pertama dibutuhkan.
+        """
+        if self._text_tool is None:
+            from features.text_tool import TextTool
+            self._text_tool = TextTool(self.canvas_manager, self)
+        return self._text_tool
+
+    @property
+    def selection_tool(self):
+        if self._selection_tool is None:
+            from features.selection_tool import SelectionTool
+            self._selection_tool = SelectionTool(self.canvas_manager)
+        return self._selection_tool
 
     def set_tool(self, tool_name: str):
         """
@@ -96,9 +183,11 @@ class Application:
         # Tambahkan kondisi untuk alat lain yang memerlukan aktivasi/deaktivasi eksplisit
 
         self.current_tool = tool_name
+        if self.trace_recorder:
+            self.trace_recorder.record_setting("tool", tool_name)
         self.main_window.update_status(
             f"Alat diatur ke: {self.current_tool.capitalize()}")
-        print(f"Alat diatur ke: {self.current_tool}")
+        log.debug("Alat diatur ke: %s", self.current_tool)
         self.toolbar_panel.update_ui_elements()  # Perbarui visual tombol alat
 
         # Aktivasi alat yang baru dipilih
@@ -113,9 +202,11 @@ class Application:
         """
         self.current_brush_size = max(
             AppConfig.MIN_BRUSH_SIZE, min(size, AppConfig.MAX_BRUSH_SIZE))
+        if self.trace_recorder:
+            self.trace_recorder.record_setting("size", self.current_brush_size)
         self.main_window.update_status(
             f"Ukuran kuas: {self.current_brush_size} px")
-        print(f"Ukuran kuas diatur ke: {self.current_brush_size}")
+        log.debug("Ukuran kuas diatur ke: %d", self.current_brush_size)
         # Logika untuk memperbarui UI slider/label di sini sudah ada di ToolbarPanel
 
     def set_color(self, hex_color: str):
@@ -123,35 +214,88 @@ class Application:
         Mengatur warna gambar.
         """
         self.current_color = hex_color
+        if self.trace_recorder:
+            self.trace_recorder.record_setting("color", hex_color)
         self.main_window.update_status(
             f"Warna diatur ke: {self.current_color}")
-        print(f"Warna diatur ke: {self.current_color}")
+        log.debug("Warna diatur ke: %s", self.current_color)
         self.toolbar_panel.update_ui_elements()  # Perbarui swatch warna
 
+    def start_input_recording(self, file_path: str):
+        """
+        Mulai merekam event input kanvas ke file trace (lihat TraceRecorder).
+        """
+        self.stop_input_recording()
+        from core.input_trace import TraceRecorder
+        self.trace_recorder = TraceRecorder(self, file_path)
+        self.main_window.update_status(
+            f"Merekam input ke {os.path.basename(file_path)}")
+
+    def stop_input_recording(self):
+        if self.trace_recorder:
+            self.trace_recorder.stop()
+            self.trace_recorder = None
+
+    def replay_input_trace(self, file_path: str, speed: str = "recorded",
+                           report_path: str = None, quit_when_done: bool = False):
+        """
+        Memutar ulang file trace input pada dokumen saat ini dan melaporkan
+        persentil latensi per event (lihat TraceReplayer).
+
+        Args:
+            speed (str): "recorded" (sesuai waktu rekaman) atau "max".
+            report_path (str, optional): Tulis laporan latensi (JSON) ke file ini.
+            quit_when_done (bool): Tutup aplikasi setelah replay (untuk pengukuran otomatis).
+        """
+        def on_done(report):
+            if report_path:
+                with open(report_path, "w", encoding="utf-8") as report_file:
+                    json.dump(report, report_file, indent=2)
+                    report_file.write("\n")
+            if quit_when_done:
+                self.root.quit()
+
+        self.stop_input_recording()  # Event replay tidak ikut direkam
+        from core.input_trace import TraceReplayer
+        try:
+            replayer = TraceReplayer(self, file_path, speed, on_done)
+        except (OSError, ValueError) as e:
+            log.error("Gagal membaca trace: %s", e)
+            self.main_window.update_status(f"Gagal membaca trace: {e}")
+            if quit_when_done:
+                self.root.quit()
+            return
+        replayer.start()
+
+    def toggle_perf_hud(self):
+        """
+        Menampilkan atau menyembunyikan HUD performa (FPS, latensi, waktu per
+        tahap pipeline tampilan, memori riwayat, dan rasio hit cache).
+        """
+        if self.perf_hud is None:
+            from ui.perf_hud import PerfHud
+            self.perf_hud = PerfHud(self)
+        if self.perf_hud.visible:
+            self.perf_hud.hide()
+        else:
+            self.perf_hud.show()
+        self.main_menu.perf_hud_var.set(self.perf_hud.visible)
+
     def clear_canvas(self):
         """
         Membersihkan kanvas gambar.
         """
-        # Hapus konten layer aktif
-        active_layer = self.layer_manager.get_active_layer()
-        if active_layer:
-            self.canvas_manager._add_to_history()  # Simpan keadaan sebelum dibersihkan
-            active_layer.clear()
-            self.canvas_manager.current_image = self.layer_manager.get_composite_image()
-            self.canvas_manager.drawing_context = ImageDraw.Draw(
-                self.canvas_manager.current_image)  # Perbarui konteks gambar
-            self.canvas_manager._update_canvas_display()
-            self.main_window.update_status("Kanvas aktif dibersihkan.")
-            print("Kanvas aktif dibersihkan.")
-        else:
-            print("Tidak ada layer aktif untuk dibersihkan.")
-            self.main_window.update_status("Tidak ada layer aktif.")
+        # Hapus konten layer aktif; entri undo dicatat oleh Document
+        if self.document.clear_layer():
+            self.canvas_manager.refresh_composite()
+            log.debug("Kanvas aktif dibersihkan.")
 
     def undo(self):
         """
         Melakukan operasi undo.
         """
         self.canvas_manager.undo()
+        self.document.log_operation("Undo")
         self.main_window.update_status("Undo dilakukan.")
 
     def redo(self):
@@ -159,134 +303,327 @@ class Application:
         Melakukan operasi redo.
         """
         self.canvas_manager.redo()
+        self.document.log_operation("Redo")
         self.main_window.update_status("Redo dilakukan.")
 
     def save_image(self, file_path: str):
         """
-        Menyimpan gambar komposit ke file.
+        Menyimpan gambar komposit ke file. Di thread UI hanya diambil snapshot
+        copy-on-write layer (lihat CompositeSnapshot); tile proyek dimuat,
+        dikomposit, dan dikodekan di thread pekerja, sehingga pengguna bisa
+        terus menggambar.
         """
-        composite_image = self.layer_manager.get_composite_image()
-        if composite_image:
-            # Meneruskan gambar komposit
-            self.canvas_manager.save_image(
-                file_path, image_to_save=composite_image)
-        else:
+        from features.project_file import is_project_file
+        if is_project_file(file_path):
+            self.save_project(file_path)
+            return
+        if self.background_saver.busy:
+            self.main_window.update_status(
+                "Penyimpanan sebelumnya masih berjalan.")
+            return
+        if self.layer_manager.refuse_while_decoding():
+            return
+        if not self.layer_manager.layers:
             self.main_window.update_status("Tidak ada gambar untuk disimpan.")
-            print("Tidak ada gambar komposit untuk disimpan.")
+            log.warning("Tidak ada gambar komposit untuk disimpan.")
+            return
+        snapshot = CompositeSnapshot(self.layer_manager)
+        name = os.path.basename(file_path)
+        self.background_saver.start(
+            f"Mengekspor {name}",
+            lambda progress: write_image_atomic(snapshot.render(), file_path),
+            on_done=lambda result: self.main_window.update_status(
+                f"Gambar disimpan: {name}"))
+
+    def save_project(self, file_path: str):
+        """
+        Menyimpan dokumen berlapis ke file proyek (.mpaint) di thread pekerja.
+        Piksel tile disalin dan dikodekan di thread pekerja (lihat ProjectFile.prepare_save).
+        """
+        if self.background_saver.busy:
+            self.main_window.update_status(
+                "Penyimpanan sebelumnya masih berjalan.")
+            return
+        if self.layer_manager.refuse_while_decoding():
+            return
+        from features.project_file import ProjectFile
+        project = self.project or ProjectFile(file_path)
+        self.project = project
+        snapshot = project.prepare_save(self.layer_manager, file_path)
+        name = os.path.basename(file_path)
+        start_time = time.time()
+
+        def on_done(result):
+            project.finish_save(snapshot, result)
+            self.main_window.update_status(
+                f"Proyek disimpan: {name} ({result['written']} tile ditulis, "
+                f"{time.time() - start_time:.2f} detik)")
+
+        self.background_saver.start(
+            f"Menyimpan {name}",
+            lambda progress: project.write_save(snapshot, progress),
+            on_done=on_done)
+
+    def save(self):
+        """
+        Menyimpan ke file proyek yang sedang dibuka (hanya tile yang berubah),
+        atau meminta nama file jika dokumen belum pernah disimpan sebagai proyek.
+        """
+        if self.project is None:
+            self.main_window.save_file()
+        else:
+            self.save_project(self.project.path)
+
+    @traced("open_project", "app")
+    def open_project(self, file_path: str) -> bool:
+        """
+        Membuka file proyek (.mpaint). Hanya tile yang terlihat yang didekode;
+        sisanya dimuat saat dibutuhkan.
 
+        Returns:
+            True jika proyek berhasil dibuka.
+        """
+        from features.project_file import ProjectFile
+        try:
+            project, width, height, layers, active_index = ProjectFile.open(
+                file_path)
+        except Exception as e:
+            log.error("Gagal membuka proyek: %s", e)
+            self.main_window.update_status(f"Gagal membuka proyek: {e}")
+            return False
+        self.layer_manager.load_document(width, height, layers, active_index)
+        self.project = project
+        self.canvas_manager.undo_history.clear()
+        self.canvas_manager.redo_history.clear()
+        self.canvas_manager.view_x = self.canvas_manager.view_y = 0
+        # Dekode tile di viewport dulu agar frame pertama cukup satu komposit
+        self.layer_manager.ensure_loaded(
+            self.canvas_manager.visible_document_box())
+        self.canvas_manager.refresh_composite()
+        self.main_window.update_status(
+            f"Proyek dibuka: {os.path.basename(file_path)}")
+        return True
+
+    @traced("open_image", "app")
     def open_image(self, file_path: str):
         """
         Membuka gambar dari file dan menampilkannya di kanvas (pada layer baru).
         """
+        from features.project_file import is_project_file
+        from features.large_image import is_large_image
+        if is_project_file(file_path):
+            self.open_project(file_path)
+            return
+        if is_large_image(file_path):
+            self.open_large_image(file_path)
+            return
+
         # self.canvas_manager.open_image(file_path) # Ini akan diganti untuk layer
 
         # Contoh: Buat layer baru dan muat gambar ke layer itu
-        print(f"Membuka gambar dari: {file_path}. (Akan dimuat ke layer baru)")
+        log.info("Membuka gambar dari: %s (dimuat ke layer baru)", file_path)
         self.main_window.update_status(
             f"Membuka: {os.path.basename(file_path)} ke layer baru.")
         try:
-            from PIL import Image, ImageDraw
-            img = Image.open(file_path).convert(
-                "RGBA")  # Pastikan RGBA untuk layer
+            img = _decode_image(file_path)
 
             # Buat layer baru
             new_layer_name = os.path.basename(file_path).split('.')[0]
-            new_layer = Layer(self.canvas_manager.canvas.winfo_width(
-            ), self.canvas_manager.canvas.winfo_height(), name=new_layer_name)
-
-            # Posisikan gambar di tengah layer baru
-            x_offset = (new_layer.image.width - img.width) // 2
-            y_offset = (new_layer.image.height - img.height) // 2
-            # Gunakan mask untuk transparansi
-            new_layer.image.paste(img, (x_offset, y_offset), img)
+            # Layer baru mengikuti ukuran dokumen, gambar diletakkan di tengah
+            new_layer = self.layer_manager.image_to_layer(img, new_layer_name)
 
-            self.layer_manager.add_layer(name=new_layer_name)
-            # Ganti layer placeholder dengan yang baru dibuat
-            self.layer_manager.layers[-1] = new_layer
-            self.layer_manager.set_active_layer(
-                len(self.layer_manager.layers) - 1)
+            # Layer baru menjadi layer aktif teratas, dengan satu entri undo
+            self.layer_manager.add_layers(
+                [new_layer], f"Buka gambar {os.path.basename(file_path)}")
 
             # Perbarui kanvas dengan gambar komposit baru
-            self.canvas_manager.current_image = self.layer_manager.get_composite_image()
-            self.canvas_manager.drawing_context = ImageDraw.Draw(
-                self.canvas_manager.current_image)
-            self.canvas_manager._update_canvas_display()
-            # Tambahkan keadaan setelah membuka gambar ke history
-            self.canvas_manager._add_to_history()
-            print(
-                f"Gambar '{os.path.basename(file_path)}' berhasil dimuat ke layer baru.")
+            self.canvas_manager.refresh_composite()
+            log.debug("Gambar '%s' berhasil dimuat ke layer baru.",
+                      os.path.basename(file_path))
         except Exception as e:
-            print(f"Gagal membuka gambar ke layer baru: {e}")
+            log.error("Gagal membuka gambar ke layer baru: %s", e)
             self.main_window.update_status(f"Gagal membuka gambar: {e}")
 
-    def apply_filter(self, filter_name: str, **kwargs):
-        """Menerapkan filter ke layer aktif."""
-        active_layer = self.layer_manager.get_active_layer()
-        if active_layer and active_layer.image:
-            self.canvas_manager._add_to_history()  # Simpan keadaan sebelum filter
-
-            try:
-                from PIL import Image, ImageFilter, ImageOps, ImageEnhance
-                processed_image = active_layer.image.copy()
-
-                if filter_name == "grayscale":
-                    processed_image = ImageOps.grayscale(processed_image)
-                elif filter_name == "sepia":
-                    pixels = processed_image.load()
-                    for i in range(processed_image.size[0]):
-                        for j in range(processed_image.size[1]):
-                            r, g, b, a = pixels[i, j]  # Ambil juga alpha
-                            tr = int(0.393 * r + 0.769 * g + 0.189 * b)
-                            tg = int(0.349 * r + 0.686 * g + 0.168 * b)
-                            tb = int(0.272 * r + 0.534 * g + 0.131 * b)
-                            pixels[i, j] = (min(255, tr), min(255, tg), min(
-                                255, tb), a)  # Pertahankan alpha
-                elif filter_name == "blur":
-                    radius = kwargs.get("radius", 2)
-                    processed_image = processed_image.filter(
-                        ImageFilter.GaussianBlur(radius))
-                elif filter_name == "sharpen":
-                    processed_image = processed_image.filter(
-                        ImageFilter.SHARPEN)
-                elif filter_name == "invert":
-                    processed_image = ImageOps.invert(processed_image.convert("RGB")).convert(
-                        "RGBA")  # Invert RGB lalu konversi kembali ke RGBA
-                elif filter_name == "brightness":
-                    factor = kwargs.get("factor", 1.2)
-                    enhancer = ImageEnhance.Brightness(processed_image)
-                    processed_image = enhancer.enhance(factor)
-                elif filter_name == "contrast":
-                    factor = kwargs.get("factor", 1.2)
-                    enhancer = ImageEnhance.Contrast(processed_image)
-                    processed_image = enhancer.enhance(factor)
-                else:
-                    print(f"Filter '{filter_name}' tidak dikenal.")
-                    self.main_window.update_status(
-                        f"Filter '{filter_name}' tidak dikenal.")
-                    self.canvas_manager.undo_history.pop()  # Hapus dari history
-                    return
-
-                active_layer.image = processed_image
-                active_layer.draw_context = ImageDraw.Draw(
-                    active_layer.image)  # Perbarui drawing context layer
-                # Update gambar kanvas utama
-                self.canvas_manager.current_image = self.layer_manager.get_composite_image()
-                self.canvas_manager.drawing_context = ImageDraw.Draw(
-                    self.canvas_manager.current_image)  # Perbarui konteks gambar utama
-                self.canvas_manager._update_canvas_display()
+    def import_images(self, file_paths):
+        """
+        Mengimpor banyak gambar sekaligus sebagai layer baru. Dekode dan
+        pembuatan layer berjalan paralel di thread pool (decoder Pillow melepas
+        GIL); hasilnya ditambahkan dengan satu refresh komposit dan satu entri undo.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from features.project_file import is_project_file
+        file_paths = [path for path in file_paths if not is_project_file(path)]
+        if not file_paths:
+            return
+        size = (self.layer_manager.canvas_width, self.layer_manager.canvas_height)
+        start_time = time.time()
+
+        def build_layer(path):
+            name = os.path.splitext(os.path.basename(path))[0]
+            return self.layer_manager.image_to_layer(_decode_image(path), name)
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(file_paths), os.cpu_count() or AppConfig.WORKER_THREADS))
+        futures = [executor.submit(build_layer, path) for path in file_paths]
+        executor.shutdown(wait=False)
+        self.main_window.update_status(f"Mengimpor {len(file_paths)} gambar...")
+
+        def poll():
+            done = sum(future.done() for future in futures)
+            if done < len(futures):
                 self.main_window.update_status(
-                    f"Filter '{filter_name}' diterapkan ke layer aktif.")
-
-            except ImportError:
-                print("Pillow (PIL) tidak terinstal. Filter dibatalkan.")
+                    f"Mengimpor gambar... {done}/{len(futures)}")
+                self.root.after(AppConfig.LARGE_IMAGE_POLL_MS, poll)
+                return
+            new_layers = []
+            for path, future in zip(file_paths, futures):
+                try:
+                    new_layers.append(future.result())
+                except Exception as e:
+                    log.error("Gagal mengimpor '%s': %s", path, e)
+            if size != (self.layer_manager.canvas_width, self.layer_manager.canvas_height):
                 self.main_window.update_status(
-                    "Pillow tidak terinstal. Filter dibatalkan.")
-                self.canvas_manager.undo_history.pop()
-            except Exception as e:
-                print(f"Error menerapkan filter: {e}")
-                self.main_window.update_status(f"Error filter: {e}")
-                self.canvas_manager.undo_history.pop()
+                    "Ukuran kanvas berubah selama impor; impor dibatalkan.")
+                return
+            self.layer_manager.add_layers(
+                new_layers, f"Impor {len(new_layers)} gambar")
+            self.canvas_manager.refresh_composite()
+            failed = len(file_paths) - len(new_layers)
+            self.main_window.update_status(
+                f"{len(new_layers)} gambar diimpor sebagai layer"
+                + (f", {failed} gagal" if failed else "")
+                + f" ({time.time() - start_time:.2f} detik).")
+
+        self.root.after(AppConfig.LARGE_IMAGE_POLL_MS, poll)
+
+    def open_large_image(self, file_path: str):
+        """
+        Membuka gambar sangat besar sebagai dokumen baru seukuran gambar, tanpa
+        dipotong. Proxy beresolusi rendah langsung ditampilkan, sementara
+        resolusi penuh didekode di latar belakang (lihat features/large_image.py).
+        """
+        from features.large_image import create_proxy_layer
+        name = os.path.basename(file_path)
+        try:
+            layer, source = create_proxy_layer(
+                file_path, os.path.splitext(name)[0])
+        except Exception as e:
+            log.error("Gagal membuka gambar besar: %s", e)
+            self.main_window.update_status(f"Gagal membuka gambar: {e}")
+            return
+        width, height = source.size
+        self.layer_manager.load_document(width, height, [layer], 0)
+        self.project = None
+        self.canvas_manager.undo_history.clear()
+        self.canvas_manager.redo_history.clear()
+        self.canvas_manager.view_x = self.canvas_manager.view_y = 0
+        self.layer_manager.ensure_loaded(
+            self.canvas_manager.visible_document_box())
+        self.canvas_manager.refresh_composite()
+        self.main_window.update_status(
+            f"Membuka {name} ({width}x{height}): pratinjau, mendekode resolusi penuh...")
+        start_time = time.time()
+
+        def poll():
+            if not source.ready:
+                self.root.after(AppConfig.LARGE_IMAGE_POLL_MS, poll)
+                return
+            if layer.tile_source is not source:
+                return  # Sudah dimuat penuh (misal saat mulai menggambar) atau diganti
+            # Hasil dekode (di memory map) langsung menjadi piksel layer, tanpa salinan
+            layer.ensure_loaded()
+            if source.error is not None:
+                self.main_window.update_status(f"Gagal mendekode {name}: {source.error}")
+                return
+            self.canvas_manager.refresh_composite()
+            self.main_window.update_status(
+                f"Gambar dibuka: {name} ({width}x{height}, "
+                f"{time.time() - start_time:.2f} detik)")
+
+        self.root.after(AppConfig.LARGE_IMAGE_POLL_MS, poll)
+
+    def apply_filter(self, filter_name: str, **kwargs):
+        """Menerapkan filter ke layer aktif (lihat Document.apply_filter)."""
+        # Entri undo filter dicatat oleh Document
+        if self.document.apply_filter(filter_name, **kwargs):
+            self.canvas_manager.refresh_composite()
+
+    def resize_canvas_dialog(self):
+        """
+        Meminta ukuran dokumen baru lalu mengubah ukuran semua layer sekali jalan.
+        """
+        from ui.dialogs import CanvasSizeDialog
+        dialog = CanvasSizeDialog(self.root, self.layer_manager.canvas_width,
+                                  self.layer_manager.canvas_height)
+        if dialog.result and self.layer_manager.resize_canvas(*dialog.result):
+            self.canvas_manager.refresh_composite()
+
+    def add_adjustment_layer(self, kind: str, **params):
+        """
+        Menambahkan adjustment layer non-destruktif di atas layer aktif.
+        """
+        if self.layer_manager.add_adjustment_layer(kind, **params):
+            self.canvas_manager.refresh_composite()
+
+    def edit_active_adjustment(self):
+        """
+        Meminta nilai parameter baru untuk adjustment layer aktif.
+        """
+        active_layer = self.layer_manager.get_active_layer()
+        if not isinstance(active_layer, AdjustmentLayer):
+            self.main_window.update_status("Layer aktif bukan adjustment layer.")
+            return
+
+        if active_layer.kind == "blur":
+            param_name, initial = "radius", active_layer.params.get("radius", 2)
+        elif active_layer.kind in ("brightness", "contrast"):
+            param_name, initial = "factor", active_layer.params.get("factor", 1.2)
         else:
-            print("Tidak ada layer aktif atau gambar di layer aktif.")
             self.main_window.update_status(
-                "Tidak ada layer aktif untuk filter.")
+                f"Adjustment '{active_layer.name}' tidak memiliki parameter.")
+            return
+
+        from tkinter import simpledialog
+        value = simpledialog.askfloat(
+            "Edit Adjustment", f"{param_name.capitalize()}:",
+            initialvalue=initial, minvalue=0.0, parent=self.root)
+        if value is not None:
+            self.layer_manager.set_adjustment_params(
+                active_layer, **{param_name: value})
+            self.canvas_manager.refresh_composite()
+
+    def merge_down(self):
+        """
+        Menggabungkan layer aktif dengan layer di bawahnya.
+        """
+        if self.layer_manager.merge_down():
+            self.canvas_manager.refresh_composite()
+
+    def merge_visible(self):
+        """
+        Menggabungkan semua layer yang terlihat.
+        """
+        if self.layer_manager.merge_visible():
+            self.canvas_manager.refresh_composite()
+
+    def flatten_image(self):
+        """
+        Meratakan semua layer menjadi satu.
+        """
+        if self.layer_manager.flatten():
+            self.canvas_manager.refresh_composite()
+
+    def group_active_layer(self):
+        """
+        Memasukkan layer tingkat atas yang aktif ke dalam grup baru.
+        """
+        index = self.layer_manager.active_layer_index
+        if self.layer_manager.group_layers([index], name="Group"):
+            self.canvas_manager.refresh_composite()
+
+    def ungroup_active_layer(self):
+        """
+        Membubarkan grup tingkat atas yang aktif.
+        """
+        self.layer_manager.ungroup(self.layer_manager.active_layer_index)
+        self.canvas_manager.refresh_composite()
@@ -0,0 +1,224 @@
+# core/autosave.py
+
+import json
+import os
+import shutil
+import time
+import tkinter as tk
+
+from config import AppConfig
+from core.background_save import BackgroundSaver
+from utils.log import get_logger
+
+log = get_logger("autosave")
+
+AUTOSAVE_FILE = "autosave.mpaint"
+OPERATION_LOG_FILE = "operations.jsonl"
+RECOVERED_FILE = "recovered.mpaint"
+
+
+class AutosaveService:
+    """
+    Menyimpan dokumen secara berkala ke direktori pemulihan agar pekerjaan
+    tidak hilang jika aplikasi crash.
+
+    Autosave memakai file proyek (.mpaint) tersendiri yang hanya menambahkan
+    tile yang diedit sejak autosave sebelumnya (lihat ProjectFile), ditambah
+    log operasi yang dilakukan sejak itu. Snapshot diambil di antara goresan,
+    sedangkan pengodean dan penulisan berjalan di thread pekerja. Saat aplikasi
+    ditutup normal, direktori pemulihan dikosongkan; jika masih ada autosave
+    saat aplikasi dimulai, berarti sesi sebelumnya berhenti tidak normal.
+    """
+
+    def __init__(self, app_instance, recovery_dir: str = None):
+        self.app = app_instance
+        self.recovery_dir = recovery_dir or AppConfig.RECOVERY_DIR
+        self.path = os.path.join(self.recovery_dir, AUTOSAVE_FILE)
+        self.log_path = os.path.join(self.recovery_dir, OPERATION_LOG_FILE)
+        self._saver = BackgroundSaver(app_instance, silent=True)
+        # ProjectFile autosave dibuat saat autosave pertama (lihat save_now)
+        self._project = None
+        self._operations = []  # Operasi sejak autosave terakhir (belum ditulis)
+        self._saved_stamp = None
+        self._timer = None
+
+    @staticmethod
+    def find_recovery(recovery_dir: str = None):
+        """
+        Mencari autosave yang tertinggal dari sesi yang berhenti tidak normal.
+        Jika sesi itu sendiri hasil pemulihan dan berhenti sebelum autosave
+        pertamanya, dokumen yang dipulihkannya (RECOVERED_FILE) dipakai.
+
+        Returns:
+            dict berisi path, waktu autosave, path proyek asal, dan operasi
+            terakhir; atau None jika tidak ada yang bisa dipulihkan.
+        """
+        recovery_dir = recovery_dir or AppConfig.RECOVERY_DIR
+        path = next((os.path.join(recovery_dir, name) for name in (AUTOSAVE_FILE, RECOVERED_FILE)
+                     if os.path.exists(os.path.join(recovery_dir, name))), None)
+        if path is None:
+            return None
+        from features.project_file import ProjectFile
+        try:
+            metadata = ProjectFile.read_metadata(path)
+        except Exception as e:
+            log.warning("Autosave tidak dapat dibaca: %s", e)
+            return None
+        operations = []
+        log_path = os.path.join(recovery_dir, OPERATION_LOG_FILE)
+        if os.path.exists(log_path):
+            with open(log_path, "r", encoding="utf-8") as log:
+                for line in log:
+                    try:
+                        operations.extend(json.loads(line)["operations"])
+                    except (ValueError, KeyError):
+                        break  # Baris terakhir terpotong saat crash
+        return {
+            "path": path,
+            "saved_at": metadata.get("saved_at"),
+            "source_path": metadata.get("source_path"),
+            "operations": operations,
+        }
+
+    def start(self):
+        """
+        Menjadwalkan autosave berkala sesuai AppConfig.AUTOSAVE_INTERVAL_MINUTES.
+        """
+        if AppConfig.AUTOSAVE_INTERVAL_MINUTES <= 0:
+            return
+        self._schedule(AppConfig.AUTOSAVE_INTERVAL_MINUTES * 60 * 1000)
+
+    def _schedule(self, delay_ms: int):
+        self._timer = self.app.root.after(int(delay_ms), self._tick)
+
+    def log_operation(self, description: str):
+        """
+        Mencatat operasi pengguna untuk log operasi autosave berikutnya.
+        """
+        self._operations.append({"time": time.time(), "description": description})
+
+    def _document_stamp(self):
+        """
+        Penanda murah keadaan dokumen; berubah setiap kali ada layer yang
+        diedit, diubah tampilannya, ditambah, dihapus, atau diurutkan ulang.
+        """
+        layer_manager = self.app.layer_manager
+        return (layer_manager.canvas_width, layer_manager.canvas_height,
+                layer_manager.active_layer_index,
+                tuple((layer.uid, layer.revision, layer.name)
+                      for layer in layer_manager.all_layers()))
+
+    def _tick(self):
+        """
+        Menjalankan autosave jika dokumen berubah. Snapshot tidak diambil di
+        tengah goresan (ditunda sampai tombol mouse dilepas) atau selama gambar
+        besar masih didekode.
+        """
+        self._timer = None
+        interval_ms = AppConfig.AUTOSAVE_INTERVAL_MINUTES * 60 * 1000
+        if self._saver.busy or self.app.background_saver.busy:
+            # Penyimpanan lain sedang membaca arsip yang sama; coba lagi nanti
+            self._schedule(AppConfig.AUTOSAVE_RETRY_MS)
+            return
+        # Snapshot layer yang masih didekode akan menunggu dekodenya selesai
+        if self.app.canvas_manager.stroke_in_progress or any(
+                layer.decoding for layer in self.app.layer_manager.all_layers()):
+            self._schedule(AppConfig.AUTOSAVE_RETRY_MS)
+            return
+        stamp = self._document_stamp()
+        if stamp != self._saved_stamp:
+            self.save_now(stamp)
+        self._schedule(interval_ms)
+
+    def save_now(self, stamp=None) -> bool:
+        """
+        Memulai autosave di thread pekerja. Di thread UI hanya metadata yang
+        dikumpulkan; tile yang diedit disalin copy-on-write (lihat
+        ProjectFile.prepare_save).
+        """
+        if self._saver.busy:
+            return False  # Snapshot baru tidak boleh diambil selagi yang lama ditulis
+        stamp = stamp or self._document_stamp()
+        os.makedirs(self.recovery_dir, exist_ok=True)
+        project = self.app.project
+        if self._project is None or not self._project.generation:
+            from features.project_file import ProjectFile
+            # Tidak mengambil alih sumber tile layer; itu milik proyek pengguna
+            self._project = ProjectFile(self.path, adopt_tiles=False)
+            if project is not None:
+                # Tile yang belum diedit sejak proyek dibuka/disimpan disalin
+                # dari arsip proyek di thread pekerja, bukan dari layer
+                self._project.reference_saved_tiles(project)
+        metadata = {
+            "saved_at": time.time(),
+            "source_path": project.path if project else None,
+        }
+        start_time = time.time()
+        snapshot = self._project.prepare_save(
+            self.app.layer_manager, metadata=metadata)
+        prepare_time = time.time() - start_time
+        operations, self._operations = self._operations, []
+        log_line = json.dumps({
+            "generation": self._project.generation + 1,
+            "time": metadata["saved_at"],
+            "operations": operations,
+        }, separators=(",", ":"))
+
+        def work(progress):
+            result = self._project.write_save(snapshot, progress)
+            # Log ditulis setelah tile tersimpan agar tidak mendahului isinya
+            with open(self.log_path, "a", encoding="utf-8") as log:
+                log.write(log_line + "\n")
+            return result
+
+        def on_done(result):
+            self._project.finish_save(snapshot, result)
+            self._saved_stamp = stamp
+            log.info("Autosave selesai: %d tile ditulis (snapshot %.1f ms, total %.2f detik).",
+                     result["written"], prepare_time * 1000, time.time() - start_time)
+
+        started = self._saver.start("Autosave", work, on_done=on_done)
+        if not started:
+            self._operations = operations + self._operations
+        return started
+
+    def recover(self, recovery: dict) -> bool:
+        """
+        Membuka autosave dari sesi sebelumnya sebagai dokumen saat ini. File
+        autosave dipindahkan dulu agar autosave sesi ini tidak menimpanya
+        selagi tile-nya masih dibaca sesuai kebutuhan, lalu dokumen yang
+        dipulihkan langsung di-autosave lagi.
+        """
+        recovered_path = os.path.join(self.recovery_dir, RECOVERED_FILE)
+        try:
+            os.replace(recovery["path"], recovered_path)
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+        except OSError as e:
+            log.error("Gagal memindahkan autosave: %s", e)
+            self.app.main_window.update_status(f"Gagal memulihkan dokumen: {e}")
+            return False
+        if not self.app.open_project(recovered_path):
+            return False
+        # Simpan berikutnya menuju proyek asal (jika ada), bukan ke direktori pemulihan
+        from features.project_file import ProjectFile
+        source_path = recovery.get("source_path")
+        self.app.project = ProjectFile(source_path) if source_path else None
+        # Sampai autosave ini selesai, find_recovery masih menemukan RECOVERED_FILE
+        self.save_now()
+        self.app.main_window.update_status("Dokumen dipulihkan dari autosave.")
+        return True
+
+    def discard(self):
+        """
+        Menghapus data pemulihan. Dipanggil saat aplikasi ditutup normal atau
+        saat pengguna menolak memulihkan dokumen.
+        """
+        if self._timer is not None:
+            try:
+                self.app.root.after_cancel(self._timer)
+            except tk.TclError:
+                pass  # Jendela sudah dihancurkan
+            self._timer = None
+        self._saver.wait()
+        shutil.rmtree(self.recovery_dir, ignore_errors=True)
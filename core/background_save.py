@@ -0,0 +1,118 @@
+# core/background_save.py
+
+import queue
+import threading
+from tkinter import messagebox
+
+from utils.log import get_logger
+
+log = get_logger("project")
+
+
+class BackgroundSaver:
+    """
+    Menjalankan penyimpanan/ekspor di thread pekerja agar UI tetap responsif.
+
+    Pekerjaan menerima fungsi progress(selesai, total). Progres, hasil, dan
+    error dikirim lewat antrean lalu diambil di thread Tk dengan after(), jadi
+    callback on_done selalu berjalan di thread UI. Hanya satu penyimpanan yang
+    berjalan pada satu waktu. Thread pekerja bukan daemon, sehingga menutup
+    aplikasi saat menyimpan tetap menunggu file selesai ditulis.
+    """
+
+    POLL_MS = 100  # Interval pemeriksaan progres di thread UI
+
+    def __init__(self, app_instance, silent: bool = False):
+        self.app = app_instance
+        self.silent = silent  # True: tanpa status bar/dialog (misal autosave)
+        self._thread = None
+        self._events = queue.Queue()
+        self._description = ""
+        self._on_done = None
+        self._last_percent = None
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None
+
+    def wait(self):
+        """
+        Menunggu pekerjaan yang sedang berjalan selesai (misal saat aplikasi ditutup).
+        """
+        if self._thread is not None:
+            self._thread.join()
+
+    def start(self, description: str, work, on_done=None) -> bool:
+        """
+        Memulai pekerjaan simpan di thread pekerja.
+
+        Args:
+            description (str): Teks untuk status bar, misal "Menyimpan proyek".
+            work (callable): work(progress) -> hasil; berjalan di thread pekerja.
+            on_done (callable, optional): on_done(hasil), dipanggil di thread UI.
+
+        Returns:
+            False jika masih ada penyimpanan lain yang berjalan.
+        """
+        if self.busy:
+            if not self.silent:
+                self.app.main_window.update_status(
+                    "Penyimpanan sebelumnya masih berjalan.")
+            return False
+
+        self._description = description
+        self._on_done = on_done
+        self._last_percent = None
+
+        def run():
+            try:
+                self._events.put(("done", work(self._report_progress)))
+            except Exception as e:
+                self._events.put(("error", e))
+
+        self._thread = threading.Thread(
+            target=run, name="background-save", daemon=False)
+        self._thread.start()
+        if not self.silent:
+            self.app.main_window.update_status(f"{description}...")
+        self.app.root.after(self.POLL_MS, self._poll)
+        return True
+
+    def _report_progress(self, done: int, total: int):
+        # Dipanggil dari thread pekerja; hanya kirim jika persentase berubah
+        percent = 100 * done // max(1, total)
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self._events.put(("progress", percent))
+
+    def _poll(self):
+        """
+        Mengambil event dari thread pekerja (di thread UI).
+        """
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                if not self.silent:
+                    self.app.main_window.update_status(
+                        f"{self._description}... {event[1]}%")
+                continue
+
+            self._thread.join()
+            self._thread = None
+            if event[0] == "done":
+                if self._on_done:
+                    self._on_done(event[1])
+            else:
+                log.error("%s gagal: %s", self._description, event[1])
+                if self.silent:
+                    return
+                self.app.main_window.update_status(
+                    f"{self._description} gagal: {event[1]}")
+                messagebox.showerror(
+                    "Gagal Menyimpan", f"{self._description} gagal:\n{event[1]}",
+                    parent=self.app.root)
+            return
+        self.app.root.after(self.POLL_MS, self._poll)
@@ -2,14 +2,19 @@
 # Made by ade7
 
 import tkinter as tk
-from PIL import Image, ImageDraw, ImageTk  # Import wajib Pillow (PIL)
+from PIL import Image, ImageTk  # Import wajib Pillow (PIL)
 import io
 
 # Import dari config
 from config import AppConfig
 
 # Import dari drawing_tools
-from core.drawing_tools import BrushTool, EraserTool, LineTool, RectangleTool
+from core.history import HistoryAction
+from core.document import STROKE_TOOLS, write_image_atomic
+from utils.log import get_logger
+from utils.tracing import traced
+
+log = get_logger("canvas")
 
 
 class CanvasManager:
@@ -32,11 +37,6 @@ class CanvasManager:
 
         # Objek PIL Image, mewakili keadaan kanvas utama (komposit layer)
         self.current_image = None
-        self.drawing_context = None  # Objek PIL ImageDraw untuk menggambar ke current_image
-
-        self.undo_history = []
-        self.redo_history = []
-        self.history_limit = AppConfig.MAX_UNDO_HISTORY
 
         self._create_canvas()
         # Initialisasi image PIL akan dilakukan di Application setelah LayerManager dibuat
@@ -48,7 +48,34 @@ class CanvasManager:
         # Alat gambar aktif (misal: BrushTool, LineTool)
         self.current_drawing_tool = None
 
-        print("CanvasManager diinisialisasi.")
+        # Viewport: posisi kiri atas area dokumen yang terlihat
+        self.view_x, self.view_y = 0, 0
+        # Posisi titik (0, 0) dokumen di koordinat widget
+        self._document_offset = (0, 0)
+        self.tk_image = None
+        self._image_item = None  # Item gambar di tk.Canvas, dipakai ulang
+        self._resize_after_id = None
+        # core.perf_stats.FrameTimer selama HUD performa tampil, None jika tidak;
+        # waktu per tahap tidak diukur sama sekali saat None
+        self.frame_timer = None
+
+        log.debug("CanvasManager diinisialisasi.")
+
+    # Riwayat undo/redo milik Document; CanvasManager hanya menampilkan hasilnya
+    @property
+    def undo_history(self) -> list:
+        return self.app.document.undo_history
+
+    @property
+    def redo_history(self) -> list:
+        return self.app.document.redo_history
+
+    @property
+    def stroke_in_progress(self) -> bool:
+        """
+        True selama tombol mouse ditekan dengan alat gambar aktif.
+        """
+        return self.current_drawing_tool is not None
 
     def _create_canvas(self):
         """
@@ -56,7 +83,7 @@ class CanvasManager:
         """
         self.canvas = tk.Canvas(
             self.parent_frame,
-            bg=AppConfig.DEFAULT_BACKGROUND_COLOR,
+            bg=AppConfig.VIEWPORT_BACKGROUND_COLOR,  # Area di luar dokumen
             width=AppConfig.DEFAULT_CANVAS_WIDTH,
             height=AppConfig.DEFAULT_CANVAS_HEIGHT,
             bd=0,  # Tanpa border
@@ -64,7 +91,7 @@ class CanvasManager:
         )
         self.canvas.pack(expand=True, fill="both", padx=10, pady=10)
         # Made by ade7: Canvas utama aplikasi
-        print("Tkinter Canvas dibuat.")
+        log.debug("Tkinter Canvas dibuat.")
 
     def _initialize_image(self):
         """
@@ -74,11 +101,10 @@ class CanvasManager:
         # Ini sekarang akan mengambil gambar komposit dari LayerManager
         self.current_image = self.app.layer_manager.get_composite_image()
         if self.current_image:
-            self.drawing_context = ImageDraw.Draw(self.current_image)
             self._update_canvas_display()
-            print("Objek PIL Image diinisialisasi dari LayerManager.")
+            log.debug("Objek PIL Image diinisialisasi dari LayerManager.")
         else:
-            print("Tidak dapat menginisialisasi gambar utama, LayerManager belum siap.")
+            log.warning("Tidak dapat menginisialisasi gambar utama, LayerManager belum siap.")
 
     def _bind_events(self):
         """
@@ -89,79 +115,84 @@ class CanvasManager:
         self.canvas.bind("<ButtonRelease-1>", self._on_mouse_up)
         # Event untuk resize kanvas
         self.canvas.bind("<Configure>", self._on_canvas_configure)
-        print("Event mouse terikat ke kanvas.")
+        # Menggeser viewport (Windows/macOS memakai <MouseWheel>, X11 Button-4/5)
+        self.canvas.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.canvas.bind("<Shift-MouseWheel>", self._on_mouse_wheel)
+        self.canvas.bind("<Button-4>", self._on_mouse_wheel)
+        self.canvas.bind("<Button-5>", self._on_mouse_wheel)
+        log.debug("Event mouse terikat ke kanvas.")
 
     def _on_canvas_configure(self, event):
         """
-        Menangani event ketika ukuran kanvas berubah.
-        Akan menyesuaikan ukuran gambar PIL agar sesuai dengan kanvas.
-        Ini akan mempengaruhi ukuran layer juga.
-        """
-        new_width = event.width
-        new_height = event.height
+        Menangani event ketika ukuran widget kanvas berubah.
 
-        if new_width <= 1 or new_height <= 1:
+        Ukuran dokumen tidak bergantung pada ukuran widget: perubahan ukuran
+        jendela hanya mengubah viewport. Event <Configure> datang beruntun saat
+        tepi jendela diseret, jadi pembaruan tampilan ditunda (debounce) hingga
+        event berhenti sejenak.
+        """
+        if event.width <= 1 or event.height <= 1:
             return  # Hindari ukuran tidak valid
 
-        # Update ukuran layer di LayerManager
-        self.app.layer_manager.canvas_width = new_width
-        self.app.layer_manager.canvas_height = new_height
-        # Perbarui ukuran setiap layer jika perlu
-        for layer in self.app.layer_manager.layers:
-            if layer.image and (layer.image.width != new_width or layer.image.height != new_height):
-                old_image = layer.image
-                # Buat layer baru transparan
-                layer.image = Image.new(
-                    "RGBA", (new_width, new_height), (0, 0, 0, 0))
-                # Salin konten lama ke tengah layer baru
-                x_offset = (new_width - old_image.width) // 2
-                y_offset = (new_height - old_image.height) // 2
-                layer.image.paste(
-                    old_image, (max(0, x_offset), max(0, y_offset)))
-                layer.draw_context = ImageDraw.Draw(
-                    layer.image)  # Perbarui drawing context layer
-
-        # Perbarui gambar utama komposit dan konteks gambar
-        self.current_image = self.app.layer_manager.get_composite_image()
-        if self.current_image:
-            self.drawing_context = ImageDraw.Draw(self.current_image)
-            self._update_canvas_display()
-            print(
-                f"Kanvas dan layer diubah ukurannya ke: {new_width}x{new_height}")
+        if self._resize_after_id is not None:
+            self.canvas.after_cancel(self._resize_after_id)
+        self._resize_after_id = self.canvas.after(
+            AppConfig.RESIZE_DEBOUNCE_MS, self._on_resize_settled)
+
+    def _on_resize_settled(self):
+        """
+        Dipanggil setelah widget berhenti berubah ukuran: cukup segarkan tampilan.
+        """
+        self._resize_after_id = None
+        self._update_canvas_display()
+
+    def _on_mouse_wheel(self, event):
+        """
+        Menggeser viewport dengan roda mouse (Shift untuk arah horizontal).
+        """
+        if event.num == 4 or event.delta > 0:
+            step = -AppConfig.SCROLL_STEP
+        else:
+            step = AppConfig.SCROLL_STEP
+        if event.state & 0x0001:  # Shift ditekan
+            self.scroll_view(step, 0)
+        else:
+            self.scroll_view(0, step)
+
+    def scroll_view(self, dx: int, dy: int):
+        """
+        Menggeser viewport dokumen sejauh (dx, dy) piksel dokumen.
+        """
+        self.view_x += dx
+        self.view_y += dy
+        self._update_canvas_display()
+
+    def widget_to_document(self, x: int, y: int):
+        """
+        Mengonversi koordinat widget kanvas ke koordinat dokumen.
+        """
+        return x - self._document_offset[0], y - self._document_offset[1]
 
     def _on_mouse_down(self, event):
         """
         Menangani event mouse button down.
         """
-        if self.app.current_tool in ["brush", "eraser", "line", "rectangle"]:
-            # Simpan keadaan sebelum menggambar
-            self._add_to_history()
-
-            # Pilih alat yang sesuai
-            active_layer = self.app.layer_manager.get_active_layer()
-            if not active_layer:
-                print("Tidak ada layer aktif untuk menggambar.")
+        if self.app.trace_recorder:
+            self.app.trace_recorder.record_pointer(
+                "d", *self.widget_to_document(event.x, event.y))
+        if self.app.current_tool in STROKE_TOOLS:
+            # Alat dibuat dan dijalankan oleh Document; kanvas hanya meneruskan
+            # koordinat. Entri undo goresan dicatat Document saat goresan selesai.
+            x, y = self.widget_to_document(event.x, event.y)
+            self.current_drawing_tool = self.app.document.begin_stroke(
+                self.app.current_tool, x, y,
+                self.app.current_color, self.app.current_brush_size)
+            if self.current_drawing_tool is None:
                 return
-
-            if self.app.current_tool == "brush":
-                self.current_drawing_tool = BrushTool(
-                    active_layer.draw_context, self.app.current_color, self.app.current_brush_size)
-            elif self.app.current_tool == "eraser":
-                self.current_drawing_tool = EraserTool(
-                    active_layer.draw_context, AppConfig.DEFAULT_BACKGROUND_COLOR, self.app.current_brush_size)
-            elif self.app.current_tool == "line":
-                self.current_drawing_tool = LineTool(
-                    active_layer.draw_context, self.app.current_color, self.app.current_brush_size)
+            if self.app.current_tool in ["line", "rectangle"]:
                 # Untuk alat bentuk, kita juga perlu referensi ke canvas Tkinter untuk pratinjau
                 self.current_drawing_tool.canvas_tk = self.canvas  # Meneruskan canvas Tkinter
-            elif self.app.current_tool == "rectangle":
-                self.current_drawing_tool = RectangleTool(
-                    active_layer.draw_context, self.app.current_color, self.app.current_brush_size)
-                self.current_drawing_tool.canvas_tk = self.canvas  # Meneruskan canvas Tkinter
-
-            if self.current_drawing_tool:
-                self.current_drawing_tool.start_draw(event.x, event.y)
-                self.last_x, self.last_y = event.x, event.y
+            self.last_x, self.last_y = x, y
         elif self.app.current_tool == "text":
             # Text tool memiliki logikanya sendiri di TextTool class
             pass
@@ -173,19 +204,27 @@ class CanvasManager:
         """
         Menangani event mouse drag (gerakan mouse saat tombol ditekan).
         """
+        x, y = self.widget_to_document(event.x, event.y)
+        if self.app.trace_recorder:
+            self.app.trace_recorder.record_pointer("m", x, y)
+        timer = self.frame_timer
+        if timer and self.current_drawing_tool:
+            timer.begin_frame()
         if self.current_drawing_tool and self.app.current_tool in ["brush", "eraser"]:
-            self.current_drawing_tool.draw(
-                self.last_x, self.last_y, event.x, event.y)
-            self.last_x, self.last_y = event.x, event.y
+            self.app.document.stroke_to(x, y)
+            if timer:
+                timer.mark("rasterize")
+            self.last_x, self.last_y = x, y
             # Setelah menggambar ke layer aktif, perbarui gambar komposit utama
             self.current_image = self.app.layer_manager.get_composite_image()
-            self.drawing_context = ImageDraw.Draw(
-                self.current_image)  # Perbarui konteks gambar utama
+            if timer:
+                timer.mark("composite")
             self._update_canvas_display()
         elif self.current_drawing_tool and self.app.current_tool in ["line", "rectangle"]:
             # Untuk alat bentuk, hanya perbarui pratinjau di canvas Tkinter
-            self.current_drawing_tool.draw(
-                self.last_x, self.last_y, event.x, event.y)
+            self.app.document.stroke_to(x, y)
+            if timer:
+                timer.mark("rasterize")
             # Tidak perlu update current_image di sini karena hanya pratinjau
             # Ini untuk memastikan gambar PIL tetap di bawah pratinjau Tkinter
             self._update_canvas_display()
@@ -194,109 +233,145 @@ class CanvasManager:
         """
         Menangani event mouse button release.
         """
-        if self.current_drawing_tool and self.app.current_tool in ["line", "rectangle"]:
-            # Gambar bentuk final ke layer aktif
-            active_layer = self.app.layer_manager.get_active_layer()
-            if active_layer:
-                # Pastikan konteks gambar ke layer aktif
-                self.current_drawing_tool.drawing_context = active_layer.draw_context
-                self.current_drawing_tool.end_draw(event.x, event.y)
+        if self.app.trace_recorder:
+            self.app.trace_recorder.record_pointer(
+                "u", *self.widget_to_document(event.x, event.y))
+        if self.current_drawing_tool:
+            # Alat bentuk menggambar hasil akhirnya ke layer aktif saat dilepas
+            self.app.document.end_stroke(*self.widget_to_document(event.x, event.y))
+            if self.app.current_tool in ["line", "rectangle"]:
                 # Setelah menggambar ke layer aktif, perbarui gambar komposit utama
                 self.current_image = self.app.layer_manager.get_composite_image()
-                self.drawing_context = ImageDraw.Draw(
-                    self.current_image)  # Perbarui konteks gambar utama
                 self._update_canvas_display()  # Perbaikan: Panggil dari self
 
         self.last_x, self.last_y = None, None
         self.current_drawing_tool = None
-        print("Mouse dilepas.")
+        log.debug("Mouse dilepas.")
 
-    def _update_canvas_display(self):
+    def refresh_composite(self):
         """
-        Memperbarui tampilan kanvas Tkinter dengan gambar komposit saat ini.
+        Membuat ulang gambar komposit dari LayerManager dan memperbarui tampilan.
         """
-        if self.current_image:
-            # Pastikan gambar sesuai dengan ukuran kanvas untuk ditampilkan dengan benar
-            display_image = self.current_image.copy()
+        timer = self.frame_timer
+        if timer:
+            timer.begin_frame()
+        self.current_image = self.app.layer_manager.get_composite_image()
+        if timer:
+            timer.mark("composite")
+        self._update_canvas_display()
 
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
+    def _layout_viewport(self, doc_width: int, doc_height: int):
+        """
+        Membatasi viewport ke dalam dokumen dan menghitung posisi dokumen di widget.
+
+        Returns:
+            tuple: (kotak dokumen yang terlihat, posisi kiri atasnya di widget).
+        """
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:
+            # Widget belum dipetakan; anggap seukuran dokumen
+            canvas_width, canvas_height = doc_width, doc_height
+
+        # Batasi viewport agar tetap di dalam dokumen
+        self.view_x = max(0, min(self.view_x, doc_width - canvas_width))
+        self.view_y = max(0, min(self.view_y, doc_height - canvas_height))
+        origin_x = max(0, (canvas_width - doc_width) // 2)
+        origin_y = max(0, (canvas_height - doc_height) // 2)
+        self._document_offset = (
+            origin_x - self.view_x, origin_y - self.view_y)
+
+        visible_box = (self.view_x, self.view_y,
+                       self.view_x + min(canvas_width, doc_width),
+                       self.view_y + min(canvas_height, doc_height))
+        return visible_box, (origin_x, origin_y)
+
+    def visible_document_box(self):
+        """
+        Kotak (x1, y1, x2, y2) area dokumen yang saat ini terlihat di viewport.
+        """
+        layer_manager = self.app.layer_manager
+        return self._layout_viewport(layer_manager.canvas_width,
+                                     layer_manager.canvas_height)[0]
 
-            if canvas_width > 0 and canvas_height > 0 and \
-               (display_image.width != canvas_width or display_image.height != canvas_height):
-                # Resize hanya untuk tampilan, bukan mengubah data gambar asli dari layer
-                display_image = display_image.resize(
-                    (canvas_width, canvas_height), Image.Resampling.LANCZOS
-                )
+    @traced("display_update", "canvas")
+    def _update_canvas_display(self):
+        """
+        Memperbarui tampilan kanvas Tkinter dengan bagian dokumen yang terlihat.
 
-            self.tk_image = ImageTk.PhotoImage(display_image)
-            # Hapus semua item gambar di Tkinter Canvas
-            self.canvas.delete("all")
-            self.canvas.create_image(0, 0, anchor="nw", image=self.tk_image)
-        else:
+        Dokumen ditampilkan 1:1; jika lebih kecil dari widget, dokumen diletakkan
+        di tengah, jika lebih besar hanya area viewport yang dipotong dan ditampilkan.
+        """
+        if not self.current_image:
             # Pastikan kanvas kosong jika tidak ada gambar
             self.canvas.delete("all")
-
-    def _add_to_history(self):
+            self.tk_image, self._image_item = None, None
+            return
+
+        timer = self.frame_timer
+        if timer:
+            timer.begin_frame()
+        visible_box, origin = self._layout_viewport(*self.current_image.size)
+        # Tile proyek yang belum didekode dimuat saat masuk viewport
+        if self.app.layer_manager.ensure_loaded(visible_box):
+            self.current_image = self.app.layer_manager.get_composite_image()
+            if timer:
+                timer.mark("composite")
+        display_image = self.current_image.crop(visible_box)
+        if timer:
+            timer.mark("crop")
+
+        if self.tk_image is not None and self._image_item is not None and \
+                (self.tk_image.width(), self.tk_image.height()) == display_image.size:
+            # Pakai ulang PhotoImage yang ada; hanya pikselnya yang diperbarui
+            self.tk_image.paste(display_image)
+        else:
+            self.tk_image = ImageTk.PhotoImage(display_image)
+            if self._image_item is None:
+                self._image_item = self.canvas.create_image(
+                    0, 0, anchor="nw", image=self.tk_image)
+            else:
+                self.canvas.itemconfig(self._image_item, image=self.tk_image)
+        self.canvas.coords(self._image_item, *origin)
+        self.canvas.tag_lower(self._image_item)
+        if timer:
+            timer.mark("photo")
+            timer.end_frame(self.canvas)
+
+    def _add_history_entry(self, entry: HistoryAction):
         """
-        Menyimpan keadaan gambar komposit saat ini ke riwayat undo.
+        Menyimpan entri riwayat (lihat core/history.py) ke riwayat undo.
         """
-        composite_img = self.app.layer_manager.get_composite_image()
-        if composite_img:
-            # Simpan salinan gambar komposit saat ini
-            img_copy = composite_img.copy()
-
-            # Jika riwayat undo melebihi batas, hapus yang tertua
-            if len(self.undo_history) >= self.history_limit:
-                self.undo_history.pop(0)
-
-            self.undo_history.append(img_copy)
-            self.redo_history.clear()  # Hapus riwayat redo setiap kali ada operasi baru
-            print(
-                f"Keadaan kanvas ditambahkan ke riwayat undo. Panjang: {len(self.undo_history)}")
+        self.app.document.add_history_entry(entry)
 
+    @traced("undo", "canvas")
     def undo(self):
         """
         Mengembalikan keadaan kanvas ke langkah sebelumnya.
         """
-        if len(self.undo_history) > 1:  # Perlu setidaknya 2 item untuk undo (saat ini dan sebelumnya)
-            # Pindahkan keadaan saat ini ke riwayat redo
-            current_state_to_redo = self.undo_history.pop()
-            self.redo_history.append(current_state_to_redo)
-
-            # Ambil keadaan sebelumnya dari riwayat undo
-            previous_image = self.undo_history[-1]
-
-            # Buat layer manager untuk mengembalikan state
-            # Ini adalah bagian yang kompleks dengan layer,
-            # untuk kesederhanaan, kita akan mengganti gambar komposit utama.
-            # Implementasi undo layer per layer akan lebih kompleks.
-            self.current_image = previous_image.copy()
-            self.drawing_context = ImageDraw.Draw(self.current_image)
-            self._update_canvas_display()
-            print("Undo berhasil.")
-            self.app.main_window.update_status("Undo.")
-        else:
-            print("Tidak ada yang bisa di-undo.")
+        entry = self.app.document.undo()
+        if entry is None:
+            log.debug("Tidak ada yang bisa di-undo.")
             self.app.main_window.update_status("Tidak ada yang bisa di-undo.")
+            return
+        # Entri dibatalkan langsung pada layer, lalu komposit dibuat ulang
+        self.refresh_composite()
+        log.debug("Undo: %s.", entry.description)
+        self.app.main_window.update_status(f"Undo: {entry.description}.")
 
+    @traced("redo", "canvas")
     def redo(self):
         """
         Menerapkan kembali keadaan kanvas dari riwayat redo.
         """
-        if self.redo_history:
-            # Pindahkan keadaan dari redo ke undo
-            next_image = self.redo_history.pop()
-            self.undo_history.append(next_image)
-
-            self.current_image = next_image.copy()
-            self.drawing_context = ImageDraw.Draw(self.current_image)
-            self._update_canvas_display()
-            print("Redo berhasil.")
-            self.app.main_window.update_status("Redo.")
-        else:
-            print("Tidak ada yang bisa di-redo.")
+        entry = self.app.document.redo()
+        if entry is None:
+            log.debug("Tidak ada yang bisa di-redo.")
             self.app.main_window.update_status("Tidak ada yang bisa di-redo.")
+            return
+        self.refresh_composite()
+        log.debug("Redo: %s.", entry.description)
+        self.app.main_window.update_status(f"Redo: {entry.description}.")
 
     def clear_canvas(self):
         """
@@ -314,14 +389,13 @@ class CanvasManager:
 
         if image_to_save:
             try:
-                # PIL akan secara otomatis mengonversi RGBA ke format output yang sesuai
-                # saat menyimpan ke PNG/JPG.
-                image_to_save.save(file_path)
-                print(f"Gambar berhasil disimpan ke: {file_path}")
+                # Ditulis ke file sementara lalu diganti secara atomik
+                write_image_atomic(image_to_save, file_path)
+                log.info("Gambar berhasil disimpan ke: %s", file_path)
             except Exception as e:
-                print(f"Gagal menyimpan gambar: {e}")
+                log.error("Gagal menyimpan gambar: %s", e)
         else:
-            print("Tidak ada gambar untuk disimpan.")
+            log.warning("Tidak ada gambar untuk disimpan.")
 
     def open_image(self, file_path: str):
         """
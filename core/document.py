@@ -0,0 +1,441 @@
+# core/document.py
+
+import os
+
+from PIL import Image
+
+from config import AppConfig
+from core.drawing_tools import BrushTool, EraserTool, LineTool, RectangleTool
+from core.history import HistoryAction
+from features.layer_manager import LayerManager, LayerPixelsChange, clip_bbox
+from utils.log import get_logger
+from utils.tracing import traced
+# features.filters dan features.project_file diimpor saat pertama dipakai
+# agar tidak menambah waktu startup
+
+log = get_logger("document")
+
+# Alat gambar yang dapat dipakai lewat Document.begin_stroke
+STROKE_TOOLS = ("brush", "eraser", "line", "rectangle")
+
+
+@traced("export", "image")
+def write_image_atomic(image, file_path: str):
+    """
+    Menyimpan gambar datar (PNG/JPG/...) ke file sementara lalu menggantinya
+    secara atomik, sehingga file lama tetap utuh jika penyimpanan gagal.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    image_format = Image.registered_extensions().get(extension)
+    if image_format is None:
+        raise ValueError(f"Format file '{extension}' tidak dikenal.")
+    if image.mode == "RGBA":
+        # Komposit selalu buram; simpan sebagai RGB seperti sebelumnya
+        image = image.convert("RGB")
+
+    temp_path = file_path + ".tmp"
+    try:
+        image.save(temp_path, format=image_format)
+        os.replace(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class Document:
+    """
+    Inti dokumen tanpa UI: layer, alat gambar, filter, dan riwayat undo.
+
+    Document tidak bergantung pada Tkinter sehingga dapat dipakai langsung
+    dari Python (batch, benchmark, server tanpa display). UI Tk hanyalah klien
+    tipis di atasnya: pesan status dan operasi untuk log autosave diteruskan
+    lewat status_callback dan operation_callback.
+
+    Contoh:
+        document = Document.open("foto.jpg")
+        document.apply_filter("blur", radius=3)
+        document.export("hasil.png")
+    """
+
+    def __init__(self, width: int = AppConfig.DEFAULT_CANVAS_WIDTH,
+                 height: int = AppConfig.DEFAULT_CANVAS_HEIGHT,
+                 status_callback=None, operation_callback=None, initial_layer: bool = True):
+        """
+        Args:
+            status_callback (callable, optional): Menerima pesan status (str).
+            operation_callback (callable, optional): Menerima nama setiap
+                operasi yang tercatat di riwayat (misal untuk log autosave).
+            initial_layer (bool): Mulai dengan layer latar belakang putih.
+        """
+        self.status_callback = status_callback
+        self.operation_callback = operation_callback
+        # Riwayat berisi HistoryAction (lihat core/history.py)
+        self.undo_history = []
+        self.redo_history = []
+        self.history_limit = AppConfig.MAX_UNDO_HISTORY
+        self.layer_manager = LayerManager(self, width, height, initial_layer)
+        # Goresan yang sedang berlangsung (lihat begin_stroke)
+        self.stroke_tool = None
+        self._stroke_position = None
+        self._stroke_start = None
+        self._stroke_size = 0
+        self._stroke_change = None  # LayerPixelsChange untuk riwayat undo
+
+    @classmethod
+    @traced("open_document", "document")
+    def open(cls, file_path: str, **kwargs):
+        """
+        Membuka file proyek (.mpaint) atau gambar sebagai dokumen baru.
+        Gambar menjadi satu layer dan ukuran dokumen mengikuti ukuran gambar.
+        """
+        from features.project_file import ProjectFile, is_project_file
+        if is_project_file(file_path):
+            _, width, height, layers, active_index = ProjectFile.open(file_path)
+            document = cls(width, height, initial_layer=False, **kwargs)
+            document.layer_manager.load_document(width, height, layers, active_index)
+            return document
+        with Image.open(file_path) as image_file:
+            image = image_file.convert("RGBA")
+        document = cls(image.width, image.height, initial_layer=False, **kwargs)
+        layer = document.layer_manager.image_to_layer(
+            image, os.path.splitext(os.path.basename(file_path))[0])
+        document.layer_manager.load_document(image.width, image.height, [layer], 0)
+        return document
+
+    @property
+    def width(self) -> int:
+        return self.layer_manager.canvas_width
+
+    @property
+    def height(self) -> int:
+        return self.layer_manager.canvas_height
+
+    def update_status(self, message: str):
+        """
+        Meneruskan pesan status ke UI (jika ada).
+        """
+        if self.status_callback:
+            self.status_callback(message)
+
+    def log_operation(self, description: str):
+        if self.operation_callback:
+            self.operation_callback(description)
+
+    # --- Riwayat undo/redo ---
+
+    def add_history_entry(self, entry: HistoryAction):
+        """
+        Menyimpan entri riwayat ke riwayat undo dan mengosongkan riwayat redo.
+        """
+        if len(self.undo_history) >= self.history_limit:
+            self.undo_history.pop(0)
+        self.undo_history.append(entry)
+        self.redo_history.clear()
+        self.log_operation(entry.description)
+        log.debug("%s ditambahkan ke riwayat undo. Panjang: %d",
+                  entry.description, len(self.undo_history))
+
+    @traced("undo", "document")
+    def undo(self):
+        """
+        Membatalkan entri teratas di riwayat undo.
+
+        Returns:
+            Entri yang dibatalkan, atau None jika riwayat kosong.
+        """
+        if not self.undo_history:
+            return None
+        entry = self.undo_history.pop()
+        entry.undo()
+        self.redo_history.append(entry)
+        return entry
+
+    @traced("redo", "document")
+    def redo(self):
+        """
+        Menerapkan kembali entri teratas di riwayat redo.
+        """
+        if not self.redo_history:
+            return None
+        entry = self.redo_history.pop()
+        entry.redo()
+        self.undo_history.append(entry)
+        return entry
+
+    # --- Alat gambar ---
+
+    def begin_stroke(self, tool_name: str, x: int, y: int, color: str, size: int):
+        """
+        Memulai goresan alat gambar pada layer aktif (koordinat dokumen).
+
+        Returns:
+            Objek alat (BaseTool), atau None jika layer aktif tidak dapat digambari.
+        """
+        active_layer = self.layer_manager.get_active_layer()
+        if not active_layer:
+            log.warning("Tidak ada layer aktif untuk menggambar.")
+            return None
+        if active_layer.draw_context is None:
+            # Misalnya adjustment layer, yang tidak memiliki piksel sendiri
+            log.warning("Layer '%s' tidak dapat digambari.", active_layer.name)
+            self.update_status(f"Layer '{active_layer.name}' tidak dapat digambari.")
+            return None
+        if self.layer_manager.refuse_while_decoding([active_layer]):
+            return None
+        # Goresan bisa keluar dari viewport; pastikan seluruh layer sudah dimuat
+        active_layer.ensure_loaded()
+
+        context = active_layer.draw_context
+        if tool_name == "brush":
+            tool = BrushTool(context, color, size)
+        elif tool_name == "eraser":
+            tool = EraserTool(context, AppConfig.DEFAULT_BACKGROUND_COLOR, size)
+        elif tool_name == "line":
+            tool = LineTool(context, color, size)
+        elif tool_name == "rectangle":
+            tool = RectangleTool(context, color, size)
+        else:
+            raise ValueError(f"Alat '{tool_name}' tidak dikenal.")
+        tool.start_draw(x, y)
+        self.stroke_tool = tool
+        self._stroke_position = self._stroke_start = (x, y)
+        self._stroke_size = size
+        self._stroke_change = LayerPixelsChange(active_layer, f"Goresan {tool_name}")
+        return tool
+
+    @traced("stroke_segment", "document")
+    def stroke_to(self, x: int, y: int):
+        """
+        Melanjutkan goresan ke titik (x, y) dan menandai area yang berubah.
+        """
+        if self.stroke_tool is None:
+            return
+        if not self.stroke_tool.draws_on_release:
+            self._prepare_stroke_write(*self._stroke_position, x, y)
+        self.stroke_tool.draw(*self._stroke_position, x, y)
+        self._stroke_position = (x, y)
+        self._mark_stroke_dirty()
+
+    def end_stroke(self, x: int, y: int):
+        """
+        Mengakhiri goresan; alat bentuk (garis, persegi) menggambar hasil akhirnya di sini.
+        Goresan yang mengubah piksel dicatat sebagai satu entri undo.
+        """
+        if self.stroke_tool is None:
+            return
+        active_layer = self.layer_manager.get_active_layer()
+        if active_layer and active_layer.draw_context is not None:
+            # Pastikan konteks gambar ke layer aktif
+            self.stroke_tool.drawing_context = active_layer.draw_context
+            if self.stroke_tool.draws_on_release:
+                # Alat bentuk menggambar dari titik awal goresan sampai (x, y)
+                self._prepare_stroke_write(*self._stroke_start, x, y)
+            self.stroke_tool.end_draw(x, y)
+            self._mark_stroke_dirty()
+        change = self._stroke_change
+        self.stroke_tool = self._stroke_change = None
+        self._stroke_position = self._stroke_start = None
+        if change.finish():
+            self.add_history_entry(change)
+
+    def _prepare_stroke_write(self, x1: int, y1: int, x2: int, y2: int):
+        """
+        Dipanggil sebelum alat menulis ke layer goresan di sepanjang garis
+        (x1, y1)-(x2, y2): menyalin tile untuk undo dan untuk penyimpanan
+        yang sedang berjalan (lihat Layer.prepare_write).
+        """
+        bbox = self.stroke_tool._stroke_bbox([x1, y1, x2, y2], self._stroke_size)
+        self._stroke_change.capture(bbox)
+        self._stroke_change.layer.prepare_write(bbox)
+
+    def _mark_stroke_dirty(self):
+        active_layer = self.layer_manager.get_active_layer()
+        if active_layer and self.stroke_tool.dirty_bbox:
+            active_layer.mark_dirty(self.stroke_tool.dirty_bbox)
+            self.stroke_tool.dirty_bbox = None
+
+    def draw_stroke(self, tool_name: str, points, color: str, size: int):
+        """
+        Menggambar satu goresan utuh melalui daftar titik [(x, y), ...].
+        """
+        if not points or self.begin_stroke(tool_name, *points[0], color, size) is None:
+            return
+        for x, y in points[1:]:
+            self.stroke_to(x, y)
+        self.end_stroke(*points[-1])
+
+    # --- Filter ---
+
+    @traced("filter", "document")
+    def apply_filter(self, filter_name: str, **kwargs) -> bool:
+        """
+        Menerapkan filter ke layer aktif. Filter hanya diterapkan pada
+        content_bbox, diperlebar sebesar margin filter spasial (misal blur
+        yang melebarkan piksel). Statistik filter global (misal rata-rata
+        untuk contrast) tetap dihitung dari seluruh layer, sehingga hasilnya
+        tidak bergantung pada content_bbox.
+
+        Returns:
+            True jika filter diterapkan.
+        """
+        active_layer = self.layer_manager.get_active_layer()
+        if not active_layer or not active_layer.image:
+            log.warning("Tidak ada layer aktif atau gambar di layer aktif.")
+            self.update_status("Tidak ada layer aktif untuk filter.")
+            return False
+        if self.layer_manager.refuse_while_decoding([active_layer]):
+            return False
+        from features.filters import apply_filter_to_image, filter_margin, filter_statistics
+        active_layer.ensure_loaded()  # Filter membaca seluruh isi layer
+        if active_layer.content_bbox is None:
+            self.update_status("Layer aktif kosong.")
+            return False
+
+        try:
+            margin = filter_margin(filter_name, **kwargs)
+            x1, y1, x2, y2 = active_layer.content_bbox
+            region = clip_bbox((x1 - margin, y1 - margin, x2 + margin, y2 + margin),
+                               *active_layer.image.size)
+            statistics = filter_statistics(active_layer.image, filter_name)
+            processed_region = apply_filter_to_image(
+                active_layer.image.crop(region), filter_name, **dict(kwargs, **statistics))
+        except ValueError:
+            log.warning("Filter '%s' tidak dikenal.", filter_name)
+            self.update_status(f"Filter '{filter_name}' tidak dikenal.")
+            return False
+        except Exception as e:
+            log.error("Error menerapkan filter: %s", e)
+            self.update_status(f"Error filter: {e}")
+            return False
+
+        change = LayerPixelsChange(active_layer, f"Filter {filter_name}")
+        change.capture(region)
+        active_layer.prepare_write(region)
+        active_layer.image.paste(processed_region, region[:2])
+        active_layer.mark_dirty(region)
+        if change.finish():
+            self.add_history_entry(change)
+        self.update_status(f"Filter '{filter_name}' diterapkan ke layer aktif.")
+        return True
+
+    # --- Edit piksel lainnya ---
+
+    def _editable_active_layer(self):
+        """
+        Layer aktif jika pikselnya dapat diedit sekarang, atau None (dengan pesan status).
+        """
+        active_layer = self.layer_manager.get_active_layer()
+        if not active_layer or active_layer.draw_context is None:
+            log.warning("Tidak ada layer aktif yang dapat diedit.")
+            self.update_status("Tidak ada layer aktif yang dapat diedit.")
+            return None
+        if self.layer_manager.refuse_while_decoding([active_layer]):
+            return None
+        return active_layer
+
+    def _edit_pixels(self, layer, bbox, description: str, edit) -> bool:
+        """
+        Menjalankan edit() yang hanya menulis piksel layer di dalam bbox, dan
+        mencatatnya sebagai satu entri undo (LayerPixelsChange).
+
+        Returns:
+            True jika bbox beririsan dengan layer dan edit dijalankan.
+        """
+        bbox = clip_bbox(bbox, *layer.image.size)
+        if bbox is None:
+            return False
+        layer.ensure_loaded(bbox)  # Tile proyek yang belum dimuat ikut disalin untuk undo
+        change = LayerPixelsChange(layer, description)
+        change.capture(bbox)
+        layer.prepare_write(bbox)
+        edit()
+        layer.mark_dirty(bbox)
+        if change.finish():
+            self.add_history_entry(change)
+        return True
+
+    def clear_layer(self) -> bool:
+        """
+        Mengosongkan layer aktif (transparan).
+
+        Returns:
+            True jika layer dibersihkan.
+        """
+        active_layer = self._editable_active_layer()
+        if active_layer is None:
+            return False
+        bbox = active_layer.content_bbox
+        if bbox is None:
+            self.update_status("Layer aktif sudah kosong.")
+            return False
+        self._edit_pixels(active_layer, bbox, "Bersihkan layer", active_layer.clear)
+        # clear() mengganti gambar layer; content_bbox sesudahnya memang kosong
+        active_layer.content_bbox = None
+        self.update_status("Layer aktif dibersihkan.")
+        return True
+
+    def draw_text(self, x: int, y: int, text: str, font, color: str) -> bool:
+        """
+        Menggambar teks dengan ImageFont pada layer aktif (koordinat dokumen).
+
+        Returns:
+            True jika teks digambar.
+        """
+        active_layer = self._editable_active_layer()
+        if active_layer is None or not text:
+            return False
+        context = active_layer.draw_context
+        x1, y1, x2, y2 = context.textbbox((x, y), text, font=font)
+        # Antialiasing bisa menyentuh satu piksel di luar kotak teks
+        bbox = (x1 - 1, y1 - 1, x2 + 1, y2 + 1)
+        return self._edit_pixels(
+            active_layer, bbox, "Teks",
+            lambda: context.text((x, y), text, font=font, fill=color))
+
+    def apply_to_region(self, box, operation, description: str = "Operasi seleksi") -> bool:
+        """
+        Mengganti area box pada layer aktif dengan operation(potongan area),
+        yang mengembalikan PIL Image seukuran potongan itu.
+
+        Returns:
+            True jika operasi diterapkan.
+        """
+        active_layer = self._editable_active_layer()
+        if active_layer is None:
+            return False
+        box = clip_bbox(box, *active_layer.image.size)
+        if box is None:
+            return False
+
+        def edit():
+            region = operation(active_layer.image.crop(box))
+            active_layer.image.paste(region, box[:2])
+
+        return self._edit_pixels(active_layer, box, description, edit)
+
+    # --- Hasil ---
+
+    def composite(self):
+        """
+        Mengembalikan komposit semua layer yang terlihat (PIL Image RGBA).
+        """
+        self.layer_manager.ensure_loaded()
+        return self.layer_manager.get_composite_image()
+
+    def export(self, file_path: str):
+        """
+        Menyimpan komposit sebagai gambar datar (format dari ekstensi file).
+        """
+        write_image_atomic(self.composite(), file_path)
+
+    @traced("save_project", "document")
+    def save_project(self, file_path: str) -> int:
+        """
+        Menyimpan dokumen berlapis ke file proyek (.mpaint) secara sinkron.
+
+        Returns:
+            Jumlah tile yang ditulis.
+        """
+        from features.project_file import ProjectFile
+        return ProjectFile(file_path).save(self.layer_manager)
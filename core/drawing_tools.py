@@ -3,13 +3,33 @@
 # Import pustaka yang mungkin diperlukan untuk menggambar
 # from PIL import ImageDraw
 
+from utils.log import get_logger
+
+log = get_logger("tools")
+
 class BaseTool:
     """
     Kelas dasar abstrak untuk semua alat gambar.
     """
 
+    # True untuk alat bentuk yang baru menulis ke gambar di end_draw;
+    # alat lain menulis di setiap draw
+    draws_on_release = False
+
     def __init__(self, drawing_context):
         self.drawing_context = drawing_context  # Objek PIL ImageDraw
+        # Kotak (x1, y1, x2, y2) yang diubah oleh operasi gambar terakhir
+        self.dirty_bbox = None
+
+    @staticmethod
+    def _stroke_bbox(points, width: int):
+        """
+        Menghitung kotak pembatas konservatif untuk garis dengan ketebalan tertentu.
+        """
+        xs, ys = points[0::2], points[1::2]
+        pad = width // 2 + 2  # Tambahan untuk sambungan "curve" dan anti-aliasing
+        return (int(min(xs)) - pad, int(min(ys)) - pad,
+                int(max(xs)) + pad + 1, int(max(ys)) + pad + 1)
 
     def start_draw(self, x: int, y: int):
         """
@@ -48,15 +68,17 @@ class BrushTool(BaseTool):
         if self._last_x is not None:
             try:
                 # Menggambar garis antara titik terakhir dan titik saat ini
+                points = [self._last_x, self._last_y, x2, y2]
                 self.drawing_context.line(
-                    [self._last_x, self._last_y, x2, y2],
+                    points,
                     fill=self.color,
                     width=self.size,
                     joint="curve"  # Membuat garis lebih halus
                 )
+                self.dirty_bbox = self._stroke_bbox(points, self.size)
                 self._last_x, self._last_y = x2, y2
             except ImportError:
-                print("PIL tidak terinstal, tidak dapat menggambar dengan kuas.")
+                log.error("PIL tidak terinstal, tidak dapat menggambar dengan kuas.")
 
     def end_draw(self, x: int, y: int):
         self._last_x, self._last_y = None, None
@@ -79,15 +101,17 @@ class EraserTool(BaseTool):
     def draw(self, x1: int, y1: int, x2: int, y2: int):
         if self._last_x is not None:
             try:
+                points = [self._last_x, self._last_y, x2, y2]
                 self.drawing_context.line(
-                    [self._last_x, self._last_y, x2, y2],
+                    points,
                     fill=self.color,
                     width=self.size,
                     joint="curve"
                 )
+                self.dirty_bbox = self._stroke_bbox(points, self.size)
                 self._last_x, self._last_y = x2, y2
             except ImportError:
-                print("PIL tidak terinstal, tidak dapat menghapus.")
+                log.error("PIL tidak terinstal, tidak dapat menghapus.")
 
     def end_draw(self, x: int, y: int):
         self._last_x, self._last_y = None, None
@@ -98,6 +122,8 @@ class LineTool(BaseTool):
     Alat garis lurus.
     """
 
+    draws_on_release = True
+
     def __init__(self, drawing_context, color: str, size: int):
         super().__init__(drawing_context)
         self.color = color
@@ -122,13 +148,15 @@ class LineTool(BaseTool):
                 # Hapus pratinjau
                 # self.drawing_context.canvas.delete(self._current_line_id)
                 # Gambar garis final ke gambar PIL
+                points = [self._start_x, self._start_y, x, y]
                 self.drawing_context.line(
-                    [self._start_x, self._start_y, x, y],
+                    points,
                     fill=self.color,
                     width=self.size
                 )
+                self.dirty_bbox = self._stroke_bbox(points, self.size)
             except ImportError:
-                print("PIL tidak terinstal, tidak dapat menggambar garis.")
+                log.error("PIL tidak terinstal, tidak dapat menggambar garis.")
             finally:
                 self._start_x, self._start_y = None, None
                 self._current_line_id = None
@@ -139,6 +167,8 @@ class RectangleTool(BaseTool):
     Alat persegi panjang.
     """
 
+    draws_on_release = True
+
     def __init__(self, drawing_context, color: str, size: int, fill: bool = False):
         super().__init__(drawing_context)
         self.color = color
@@ -162,15 +192,18 @@ class RectangleTool(BaseTool):
             try:
                 # Hapus pratinjau
                 # self.drawing_context.canvas.delete(self._current_rect_id)
-                # Gambar persegi panjang final ke gambar PIL
-                bbox = [self._start_x, self._start_y, x, y]
+                # Gambar persegi panjang final ke gambar PIL; titik awal boleh
+                # berada di kanan/bawah titik akhir (digeser ke arah mana pun)
+                bbox = [min(self._start_x, x), min(self._start_y, y),
+                        max(self._start_x, x), max(self._start_y, y)]
                 if self.fill:
                     self.drawing_context.rectangle(bbox, fill=self.color)
                 else:
                     self.drawing_context.rectangle(
                         bbox, outline=self.color, width=self.size)
+                self.dirty_bbox = self._stroke_bbox(bbox, self.size)
             except ImportError:
-                print("PIL tidak terinstal, tidak dapat menggambar persegi panjang.")
+                log.error("PIL tidak terinstal, tidak dapat menggambar persegi panjang.")
             finally:
                 self._start_x, self._start_y = None, None
                 self._current_rect_id = None
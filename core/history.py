@@ -0,0 +1,43 @@
+# core/history.py
+
+
+class HistoryAction:
+    """
+    Kelas dasar untuk entri riwayat undo/redo yang bukan salinan piksel.
+
+    Entri seperti ini menyimpan perubahan (misal: parameter adjustment layer
+    atau tile yang diedit) alih-alih snapshot gambar komposit, sehingga jauh
+    lebih murah untuk disimpan dan membatalkan piksel layer yang sebenarnya.
+    Semua entri riwayat Document adalah HistoryAction.
+    """
+
+    description = "Aksi"
+
+    def undo(self):
+        """
+        Membatalkan perubahan yang diwakili entri ini.
+        """
+        raise NotImplementedError
+
+    def redo(self):
+        """
+        Menerapkan kembali perubahan yang diwakili entri ini.
+        """
+        raise NotImplementedError
+
+    def memory_bytes(self) -> int:
+        """
+        Perkiraan memori piksel yang hanya ditahan oleh entri ini (bukan
+        oleh layer yang sedang tampil). Dipakai HUD performa.
+        """
+        return 0
+
+
+def image_bytes(image) -> int:
+    """
+    Perkiraan ukuran buffer piksel PIL Image (RGB disimpan 4 byte per piksel).
+    """
+    if image is None:
+        return 0
+    bands = len(image.getbands())
+    return image.width * image.height * (4 if bands == 3 else bands)
@@ -0,0 +1,263 @@
+# core/input_trace.py
+
+import json
+import time
+from types import SimpleNamespace
+
+from utils.log import get_logger
+
+log = get_logger("trace")
+
+# Versi format file trace
+TRACE_VERSION = 1
+# Jenis event pointer: kode singkat di file trace -> nama handler CanvasManager
+POINTER_EVENTS = {
+    "d": "_on_mouse_down",    # <Button-1>
+    "m": "_on_mouse_drag",    # <B1-Motion>
+    "u": "_on_mouse_up",      # <ButtonRelease-1>
+}
+# Pengaturan alat yang dicatat -> nama metode Application
+SETTING_EVENTS = {
+    "tool": "set_tool",
+    "color": "set_color",
+    "size": "set_brush_size",
+}
+
+
+class TraceRecorder:
+    """
+    Merekam event input kanvas mentah ke file trace untuk diputar ulang.
+
+    Baris pertama file adalah header JSON (ukuran dokumen, viewport, dan
+    alat/warna/ukuran saat perekaman dimulai). Setiap baris berikutnya adalah
+    satu event berbentuk array ringkas:
+        [waktu_ms, "d"|"m"|"u", x, y]     event pointer (koordinat dokumen)
+        [waktu_ms, "tool"|"color"|"size", nilai]
+    Koordinat dicatat dalam koordinat dokumen, bukan widget, sehingga trace
+    tetap mengenai piksel yang sama meski ukuran jendela saat replay berbeda.
+    """
+
+    def __init__(self, app_instance, path: str):
+        self.app = app_instance
+        self.path = path
+        self.event_count = 0
+        self._file = open(path, "w", encoding="utf-8")
+        canvas_manager = app_instance.canvas_manager
+        header = {
+            "format": "mini-paint-trace",
+            "version": TRACE_VERSION,
+            "width": app_instance.layer_manager.canvas_width,
+            "height": app_instance.layer_manager.canvas_height,
+            "view": [canvas_manager.view_x, canvas_manager.view_y],
+            "tool": app_instance.current_tool,
+            "color": app_instance.current_color,
+            "size": app_instance.current_brush_size,
+            "recorded_at": time.time(),
+        }
+        self._file.write(json.dumps(header) + "\n")
+        self._start = time.perf_counter()
+        log.info("Merekam input ke: %s", path)
+
+    def _write(self, event: list):
+        # Tanpa spasi agar file tetap ringkas untuk ribuan event motion
+        self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+        self.event_count += 1
+
+    def _timestamp(self) -> float:
+        return round((time.perf_counter() - self._start) * 1000, 2)
+
+    def record_pointer(self, kind: str, x: int, y: int):
+        """
+        Mencatat event pointer ("d", "m", atau "u") pada koordinat dokumen.
+        """
+        if self._file:
+            self._write([self._timestamp(), kind, x, y])
+
+    def record_setting(self, name: str, value):
+        """
+        Mencatat perubahan alat, warna, atau ukuran kuas.
+        """
+        if self._file:
+            self._write([self._timestamp(), name, value])
+
+    def stop(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            log.info("Perekaman input selesai: %d event di %s", self.event_count, self.path)
+
+
+def read_trace(path: str):
+    """
+    Membaca file trace.
+
+    Returns:
+        tuple: (header dict, daftar event).
+    """
+    with open(path, encoding="utf-8") as trace_file:
+        header = json.loads(trace_file.readline())
+        if header.get("format") != "mini-paint-trace":
+            raise ValueError(f"'{path}' bukan file trace input.")
+        if header.get("version", 0) > TRACE_VERSION:
+            raise ValueError(f"Versi trace {header['version']} tidak didukung.")
+        events = [json.loads(line) for line in trace_file if line.strip()]
+    return header, events
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """
+    Persentil dengan interpolasi linear dari daftar yang sudah diurutkan.
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def latency_summary(latencies: dict) -> dict:
+    """
+    Meringkas latensi (ms) per jenis event menjadi jumlah, p50, p90, p99, dan maks.
+    """
+    summary = {}
+    for kind, values in latencies.items():
+        values = sorted(values)
+        summary[kind] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50), 3),
+            "p90_ms": round(percentile(values, 0.90), 3),
+            "p99_ms": round(percentile(values, 0.99), 3),
+            "max_ms": round(values[-1], 3) if values else 0.0,
+        }
+    return summary
+
+
+class TraceReplayer:
+    """
+    Memutar ulang file trace melalui handler event CanvasManager, seperti
+    event Tk sungguhan, lalu melaporkan persentil latensi per jenis event.
+
+    Latensi satu event adalah waktu handler ditambah update_idletasks(),
+    yaitu sampai kanvas selesai digambar ulang. Pada kecepatan "recorded"
+    event dijadwalkan sesuai waktu rekaman; keterlambatan terhadap jadwal itu
+    (karena event sebelumnya lambat) dilaporkan terpisah sebagai "lag".
+    Pada kecepatan "max" event dikirim berurutan secepat mungkin.
+    """
+
+    def __init__(self, app_instance, path: str, speed: str = "recorded",
+                 on_done=None):
+        if speed not in ("recorded", "max"):
+            raise ValueError(f"Kecepatan replay '{speed}' tidak dikenal.")
+        self.app = app_instance
+        self.path = path
+        self.speed = speed
+        self.on_done = on_done
+        self.header, self.events = read_trace(path)
+        self.latencies = {}
+        self.lag = []
+        self._index = 0
+        self._start = None
+
+    def start(self):
+        """
+        Mengembalikan keadaan alat dan viewport seperti saat perekaman, lalu
+        menjadwalkan event pertama di event loop Tk.
+        """
+        app = self.app
+        header = self.header
+        if (header["width"], header["height"]) != (app.layer_manager.canvas_width,
+                                                   app.layer_manager.canvas_height):
+            log.warning("Trace direkam pada dokumen %dx%d, dokumen saat ini %dx%d.",
+                        header["width"], header["height"],
+                        app.layer_manager.canvas_width, app.layer_manager.canvas_height)
+        app.set_tool(header["tool"])
+        app.set_color(header["color"])
+        app.set_brush_size(header["size"])
+        app.canvas_manager.view_x, app.canvas_manager.view_y = header["view"]
+        app.canvas_manager._update_canvas_display()
+        app.root.update_idletasks()
+
+        app.main_window.update_status(
+            f"Replay {len(self.events)} event ({self.speed})...")
+        self._start = time.perf_counter()
+        app.root.after(0, self._step)
+
+    def _dispatch(self, event):
+        """
+        Mengirim satu event trace ke handler yang sesuai dan mengukur latensinya.
+        """
+        kind = event[1]
+        canvas_manager = self.app.canvas_manager
+        start = time.perf_counter()
+        if kind in POINTER_EVENTS:
+            # Koordinat dokumen -> koordinat widget pada viewport saat ini
+            offset_x, offset_y = canvas_manager._document_offset
+            tk_event = SimpleNamespace(x=event[2] + offset_x, y=event[3] + offset_y)
+            getattr(canvas_manager, POINTER_EVENTS[kind])(tk_event)
+        elif kind in SETTING_EVENTS:
+            getattr(self.app, SETTING_EVENTS[kind])(event[2])
+        else:
+            log.warning("Event trace '%s' tidak dikenal, dilewati.", kind)
+            return
+        self.app.root.update_idletasks()
+        self.latencies.setdefault(kind, []).append(
+            (time.perf_counter() - start) * 1000)
+
+    def _step(self):
+        """
+        Mengirim event yang sudah jatuh tempo lalu menjadwalkan sisanya.
+        """
+        while self._index < len(self.events):
+            event = self.events[self._index]
+            if self.speed == "recorded":
+                due = self._start + event[0] / 1000
+                now = time.perf_counter()
+                if now < due:
+                    # Kembali ke event loop sampai event berikutnya jatuh tempo
+                    self.app.root.after(max(1, int((due - now) * 1000)), self._step)
+                    return
+                self.lag.append((now - due) * 1000)
+            self._dispatch(event)
+            self._index += 1
+            if self.speed == "max" and self._index % 50 == 0:
+                # Beri kesempatan Tk memproses event lain (misal menutup jendela)
+                self.app.root.after(0, self._step)
+                return
+        self._finish()
+
+    def report(self) -> dict:
+        """
+        Ringkasan hasil replay (dapat ditulis sebagai JSON).
+        """
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        report = {
+            "trace": self.path,
+            "speed": self.speed,
+            "events": len(self.events),
+            "duration_s": round(time.perf_counter() - self._start, 3),
+            "document": [self.app.layer_manager.canvas_width,
+                         self.app.layer_manager.canvas_height],
+            "latency": latency_summary(self.latencies),
+            "all": latency_summary({"all": all_latencies})["all"],
+        }
+        if self.lag:
+            report["lag"] = latency_summary({"lag": self.lag})["lag"]
+        return report
+
+    def _finish(self):
+        report = self.report()
+        log.info("Replay selesai: %d event dalam %.2f detik.",
+                 report["events"], report["duration_s"])
+        for kind, stats in sorted(report["latency"].items()):
+            log.info("  %-6s n=%-6d p50=%.2f ms p90=%.2f ms p99=%.2f ms maks=%.2f ms",
+                     kind, stats["count"], stats["p50_ms"], stats["p90_ms"],
+                     stats["p99_ms"], stats["max_ms"])
+        if "lag" in report:
+            log.info("  lag    p50=%.2f ms p99=%.2f ms",
+                     report["lag"]["p50_ms"], report["lag"]["p99_ms"])
+        self.app.main_window.update_status(
+            f"Replay selesai: p50 {report['all']['p50_ms']:.1f} ms, "
+            f"p99 {report['all']['p99_ms']:.1f} ms per event.")
+        if self.on_done:
+            self.on_done(report)
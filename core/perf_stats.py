@@ -0,0 +1,146 @@
+# core/perf_stats.py
+"""
+Statistik performa ringan untuk HUD performa (lihat ui/perf_hud.py).
+
+Penghitung hit/miss cache selalu aktif karena biayanya hanya satu
+penambahan integer per akses cache. Waktu per tahap pipeline tampilan hanya
+diukur jika CanvasManager.frame_timer diisi, yaitu selama HUD ditampilkan.
+"""
+
+import time
+from collections import deque
+
+from config import AppConfig
+
+# Tahap pipeline _on_mouse_drag -> _update_canvas_display, sesuai urutannya
+FRAME_STAGES = ("rasterize", "composite", "crop", "photo", "blit")
+
+_caches = {}
+
+
+class CacheStats:
+    """
+    Penghitung hit/miss untuk satu cache.
+    """
+
+    __slots__ = ("name", "hits", "misses")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """
+        Rasio hit (0.0-1.0), atau None jika cache belum pernah diakses.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+
+def cache_stats(name: str) -> CacheStats:
+    """
+    Mengembalikan penghitung cache bernama (dibuat sekali, lalu dipakai ulang).
+    """
+    stats = _caches.get(name)
+    if stats is None:
+        stats = _caches[name] = CacheStats(name)
+    return stats
+
+
+def all_cache_stats():
+    """
+    Semua penghitung cache, urut sesuai pertama kali didaftarkan.
+    """
+    return list(_caches.values())
+
+
+def history_bytes(entries) -> int:
+    """
+    Perkiraan memori piksel yang ditahan daftar riwayat undo/redo.
+    """
+    return sum(entry.memory_bytes() for entry in entries)
+
+
+class FrameTimer:
+    """
+    Mengukur waktu per tahap setiap frame tampilan kanvas.
+
+    Event input memulai frame (begin_frame), setiap tahap ditutup dengan
+    mark(), dan end_frame() menjadwalkan frame_displayed() lewat after_idle.
+    Tk menggambar ulang kanvas di idle handler yang terdaftar lebih dulu,
+    sehingga frame_displayed() berjalan setelah gambar benar-benar di-blit:
+    selisihnya dengan tahap terakhir adalah waktu "blit", dan selisihnya
+    dengan event input pertama adalah latensi input ke layar. Beberapa event
+    motion sebelum satu penggambaran ulang dihitung sebagai satu frame.
+    """
+
+    def __init__(self, window: int = AppConfig.PERF_HUD_SAMPLE_FRAMES):
+        # Waktu (ms) per tahap untuk frame terakhir; tahap yang tidak berjalan
+        # pada suatu frame (misal rasterize saat menggulir) tidak dicatat
+        self.stages = {stage: deque(maxlen=window) for stage in FRAME_STAGES}
+        self.latency = deque(maxlen=window)
+        self.displayed_at = deque(maxlen=window)
+        self._frame_start = None
+        self._last_mark = None
+        self._current = {}
+        self._display_pending = False
+
+    def begin_frame(self):
+        """
+        Menandai awal pekerjaan untuk frame berikutnya (event input atau
+        pembaruan tampilan). Awal frame yang sudah berjalan tidak diubah.
+        """
+        now = time.perf_counter()
+        if self._frame_start is None:
+            self._frame_start = now
+        self._last_mark = now
+
+    def mark(self, stage: str):
+        """
+        Menutup tahap stage: waktunya sejak mark/begin_frame sebelumnya.
+        """
+        now = time.perf_counter()
+        if self._last_mark is not None:
+            self._current[stage] = self._current.get(stage, 0.0) + now - self._last_mark
+        self._last_mark = now
+
+    def end_frame(self, widget):
+        """
+        Menjadwalkan pengukuran blit setelah Tk menggambar ulang widget.
+        """
+        if not self._display_pending:
+            self._display_pending = True
+            widget.after_idle(self.frame_displayed)
+
+    def frame_displayed(self):
+        now = time.perf_counter()
+        self._display_pending = False
+        if self._frame_start is None:
+            return
+        self._current["blit"] = now - self._last_mark
+        for stage, seconds in self._current.items():
+            self.stages[stage].append(seconds * 1000)
+        self.latency.append((now - self._frame_start) * 1000)
+        self.displayed_at.append(now)
+        self._frame_start = self._last_mark = None
+        self._current = {}
+
+    def fps(self) -> int:
+        """
+        Jumlah frame yang ditampilkan dalam satu detik terakhir.
+        """
+        cutoff = time.perf_counter() - 1.0
+        return sum(1 for displayed in self.displayed_at if displayed >= cutoff)
+
+    def stage_means(self) -> dict:
+        """
+        Rata-rata waktu (ms) per tahap atas frame dalam jendela sampel.
+        """
+        return {stage: sum(values) / len(values) if values else None
+                for stage, values in self.stages.items()}
@@ -0,0 +1,321 @@
+# features/compositor.py
+
+from PIL import Image
+
+from features.layer_storage import load_numpy, pixel_view
+
+# NumPy dipakai untuk kernel blending berbasis array. Modul ini diisi saat
+# Compositor pertama dibuat (lihat load_numpy); jika NumPy tidak terinstal,
+# LayerManager kembali ke Image.alpha_composite biasa.
+np = None
+
+# Mode blend yang didukung oleh Compositor
+BLEND_MODES = ("normal", "multiply", "screen",
+               "overlay", "add", "darken", "lighten")
+
+
+def _union(a, b):
+    """
+    Menggabungkan dua kotak (x1, y1, x2, y2); None berarti kosong.
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+class Compositor:
+    """
+    Menggabungkan layer ke satu buffer akumulasi float32 yang dipakai ulang
+    antar frame, dengan dukungan opacity per layer dan mode blend.
+
+    Buffer akumulasi berisi warna RGBA premultiplied (warna sudah dikalikan
+    alpha) dalam rentang 0.0 - 1.0, disimpan planar (kanal, tinggi, lebar) agar
+    setiap kanal bersebelahan di memori. Dengan premultiplied alpha, mode
+    'normal' cukup berupa acc = src + acc * (1 - as) tanpa pembagian.
+
+    Blending dilakukan per pita baris (band) agar array sementara tetap kecil
+    dan muat di cache CPU. Buffer akumulasi, array sementara, dan buffer output
+    uint8 semuanya dialokasikan sekali dan hanya dibuat ulang jika ukuran
+    dokumen berubah.
+
+    Compositor mencatat area yang disentuh sejak flatten terakhir, sehingga
+    pembersihan buffer dan konversi ke output hanya dilakukan di area itu.
+    Di luar area tersebut buffer akumulasi selalu nol dan output selalu hitam.
+    """
+
+    BAND_HEIGHT = 64  # Jumlah baris yang diproses sekaligus oleh kernel
+
+    def __init__(self):
+        global np
+        np = load_numpy()
+        if np is None:
+            raise ImportError("NumPy diperlukan untuk Compositor.")
+        self._accumulator = None
+        self._output = None  # uint8 (tinggi, lebar, 4), alpha selalu 255
+        self._size = None
+        self._scratch = {}
+        self._touched = None  # Area akumulator yang mungkin tidak nol
+        self._stale = None  # Area output yang perlu dikonversi ulang saat flatten
+        self._clip = None  # Area yang sedang dikomposit ulang (None = seluruh dokumen)
+
+    @property
+    def size(self):
+        """
+        Ukuran (lebar, tinggi) buffer saat ini, atau None jika belum dialokasikan.
+        """
+        return self._size
+
+    def begin(self, width: int, height: int, region=None):
+        """
+        Menyiapkan buffer akumulasi kosong (transparan) untuk satu komposit.
+        Buffer hanya dialokasikan ulang jika ukuran dokumen berubah.
+
+        Args:
+            region (tuple, optional): Jika diberikan, hanya area (x1, y1, x2, y2)
+                ini yang dibersihkan dan dikomposit ulang; isi buffer di luar
+                area tetap dari komposit sebelumnya.
+        """
+        if self._size != (width, height):
+            region = None
+            self._accumulator = np.zeros((4, height, width), dtype=np.float32)
+            self._output = np.zeros((height, width, 4), dtype=np.uint8)
+            self._output[..., 3] = 255
+            self._size = (width, height)
+            self._scratch.clear()
+            self._touched = None
+            self._stale = None
+        elif region is not None:
+            x1, y1 = max(0, region[0]), max(0, region[1])
+            x2, y2 = min(width, region[2]), min(height, region[3])
+            region = (x1, y1, x2, y2) if x2 > x1 and y2 > y1 else (0, 0, 0, 0)
+            self._accumulator[:, y1:y2, x1:x2] = 0.0
+            self._stale = _union(self._stale, region)
+        elif self._touched:
+            # Cukup bersihkan area yang terisi pada komposit sebelumnya
+            x1, y1, x2, y2 = self._touched
+            self._accumulator[:, y1:y2, x1:x2] = 0.0
+            self._stale = _union(self._stale, self._touched)
+            self._touched = None
+        self._clip = region
+
+    def _get_scratch(self, name: str, shape):
+        """
+        Mengembalikan array sementara yang dipakai ulang untuk nama dan bentuk tertentu.
+        """
+        buffer = self._scratch.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.float32)
+            self._scratch[name] = buffer
+        return buffer
+
+    @property
+    def clip(self):
+        """
+        Area yang sedang dikomposit ulang (lihat begin), atau None untuk seluruh dokumen.
+        """
+        return self._clip
+
+    @property
+    def touched_bbox(self):
+        """
+        Kotak (x1, y1, x2, y2) area yang terisi sejak begin(), atau None jika kosong.
+        """
+        return self._touched
+
+    def blend_layer(self, image, opacity: float = 1.0, mode: str = "normal", bbox=None,
+                    offset=(0, 0)):
+        """
+        Memadukan gambar RGBA ke buffer akumulasi secara in-place.
+
+        Args:
+            image: PIL Image RGBA yang akan dipadukan.
+            opacity (float): Opacity layer, 0.0 - 1.0.
+            mode (str): Salah satu dari BLEND_MODES.
+            bbox (tuple, optional): Kotak (x1, y1, x2, y2) berisi piksel layer,
+                dalam koordinat dokumen. Area di luar kotak dianggap transparan.
+            offset (tuple): Posisi sudut kiri atas gambar di dokumen.
+        """
+        if mode not in BLEND_MODES:
+            raise ValueError(f"Mode blend '{mode}' tidak dikenal.")
+        if opacity <= 0.0:
+            return
+
+        # Potong ke area yang beririsan dengan dokumen dan gambar
+        width, height = self._size
+        ox, oy = offset
+        x1, y1, x2, y2 = bbox if bbox else (
+            ox, oy, ox + image.width, oy + image.height)
+        x1, y1 = max(0, x1, ox), max(0, y1, oy)
+        x2 = min(x2, width, ox + image.width)
+        y2 = min(y2, height, oy + image.height)
+        if self._clip is not None:
+            x1, y1 = max(x1, self._clip[0]), max(y1, self._clip[1])
+            x2, y2 = min(x2, self._clip[2]), min(y2, self._clip[3])
+        if x2 <= x1 or y2 <= y1:
+            return
+
+        self._touched = _union(self._touched, (x1, y1, x2, y2))
+        self._stale = _union(self._stale, (x1, y1, x2, y2))
+
+        view = pixel_view(image)
+        if view is not None:
+            # Layer di memory map dibaca langsung tanpa salinan
+            source = view[y1 - oy:y2 - oy, x1 - ox:x2 - ox]
+        else:
+            # Hanya area bbox yang disalin ke array, bukan seluruh layer
+            region = image.crop((x1 - ox, y1 - oy, x2 - ox, y2 - oy))
+            source = np.asarray(region.convert("RGBA")
+                                if region.mode != "RGBA" else region)
+
+        for y in range(y1, y2, self.BAND_HEIGHT):
+            y_end = min(y + self.BAND_HEIGHT, y2)
+            self._blend_band(self._accumulator[:, y:y_end, x1:x2],
+                             source[y - y1:y_end - y1], opacity, mode)
+
+    def _blend_band(self, backdrop, source_band, opacity: float, mode: str):
+        """
+        Kernel blending untuk satu pita baris (rumus compositing W3C, premultiplied).
+
+        co = cb * (1 - as) + as * (Cs + ab * (B(Cb, Cs) - Cs))
+        ao = ab * (1 - as) + as
+        """
+        rows, cols = source_band.shape[:2]
+        src = self._get_scratch("src", (4, rows, cols))
+        blended = self._get_scratch("blended", (3, rows, cols))
+        weight = self._get_scratch("weight", (1, rows, cols))
+
+        # Ubah piksel interleaved (baris, kolom, kanal) menjadi planar
+        np.multiply(source_band.transpose(2, 0, 1),
+                    np.float32(1.0 / 255.0), out=src)
+        src_color, src_alpha = src[:3], src[3:4]
+        if opacity < 1.0:
+            src_alpha *= np.float32(opacity)
+
+        if mode == "normal":
+            np.multiply(src_color, src_alpha, out=blended)
+        else:
+            # Fungsi blend membutuhkan warna backdrop tanpa premultiply
+            dst_alpha = backdrop[3:4]
+            straight = self._get_scratch("straight", (3, rows, cols))
+            straight.fill(0.0)
+            np.divide(backdrop[:3], dst_alpha, out=straight,
+                      where=dst_alpha > 0)
+            self._blend_function(mode, straight, src_color, blended)
+            blended -= src_color
+            blended *= dst_alpha
+            blended += src_color
+            blended *= src_alpha
+
+        # Semua kanal backdrop (termasuk alpha) dikalikan (1 - as)
+        np.subtract(1.0, src_alpha, out=weight)
+        backdrop *= weight
+        backdrop[:3] += blended
+        backdrop[3:4] += src_alpha
+
+    @staticmethod
+    def _blend_function(mode: str, backdrop, source, out):
+        """
+        Menghitung fungsi blend terpisah B(Cb, Cs) ke array out.
+        """
+        if mode == "multiply":
+            np.multiply(backdrop, source, out=out)
+        elif mode == "screen":
+            # Cb + Cs - Cb * Cs
+            np.multiply(backdrop, source, out=out)
+            np.subtract(source, out, out=out)
+            out += backdrop
+        elif mode == "overlay":
+            # Cb <= 0.5: 2 * Cb * Cs, selain itu: 1 - 2 * (1 - Cb) * (1 - Cs)
+            np.multiply(backdrop, source, out=out)
+            out *= 2.0
+            screen = 1.0 - 2.0 * (1.0 - backdrop) * (1.0 - source)
+            np.copyto(out, screen, where=backdrop > 0.5)
+        elif mode == "add":
+            np.add(backdrop, source, out=out)
+            np.minimum(out, 1.0, out=out)
+        elif mode == "darken":
+            np.minimum(backdrop, source, out=out)
+        elif mode == "lighten":
+            np.maximum(backdrop, source, out=out)
+
+    def load_image(self, image, offset=None):
+        """
+        Mengganti isi buffer akumulasi dengan gambar RGBA alpha lurus
+        (misal hasil adjustment layer), lalu mengubahnya menjadi premultiplied.
+
+        Args:
+            offset (tuple, optional): Posisi gambar di dokumen jika gambar hanya
+                mencakup sebagian dokumen; None jika gambar seukuran dokumen.
+        """
+        x1, y1 = offset or (0, 0)
+        box = (x1, y1, x1 + image.width, y1 + image.height)
+        region = self._accumulator[:, box[1]:box[3], box[0]:box[2]]
+        np.multiply(np.asarray(image.convert("RGBA")).transpose(2, 0, 1),
+                    np.float32(1.0 / 255.0), out=region)
+        region[:3] *= region[3:4]
+        self._touched = _union(self._touched, box) if offset else box
+        self._stale = _union(self._stale, box)
+
+    def read_region(self, box):
+        """
+        Menyalin isi buffer akumulasi di area box, untuk restore_region().
+        """
+        x1, y1, x2, y2 = box
+        return self._accumulator[:, y1:y2, x1:x2].copy()
+
+    def restore_region(self, saved, box, keep):
+        """
+        Mengembalikan isi area box dari read_region(), kecuali area keep
+        (di dalam box) yang hasil komposit barunya dipertahankan.
+        """
+        x1, y1, x2, y2 = box
+        kx1, ky1, kx2, ky2 = keep
+        saved[:, ky1 - y1:ky2 - y1, kx1 - x1:kx2 - x1] = self._accumulator[:, ky1:ky2, kx1:kx2]
+        self._accumulator[:, y1:y2, x1:x2] = saved
+        self._touched = _union(self._touched, box)
+        self._stale = _union(self._stale, box)
+
+    def to_image(self, bbox=None):
+        """
+        Mengonversi buffer akumulasi menjadi PIL Image RGBA baru (alpha lurus).
+        Dipakai oleh adjustment layer dan cache grup, yang bekerja pada warna
+        tanpa premultiply.
+
+        Args:
+            bbox (tuple, optional): Hanya area (x1, y1, x2, y2) ini yang dikonversi.
+        """
+        x1, y1, x2, y2 = bbox if bbox else (0, 0) + self._size
+        region = self._accumulator[:, y1:y2, x1:x2]
+        alpha = region[3:4]
+        pixels = np.zeros_like(region)
+        np.divide(region[:3], alpha, out=pixels[:3], where=alpha > 0)
+        pixels[3:4] = alpha
+        pixels *= np.float32(255.0)
+        pixels += 0.5
+        return Image.fromarray(
+            np.ascontiguousarray(pixels.transpose(1, 2, 0).astype(np.uint8)), "RGBA")
+
+    def flatten(self):
+        """
+        Menulis hasil komposit ke buffer output uint8 yang persisten dan
+        mengembalikan PIL Image yang berbagi memori dengannya (tanpa salinan).
+
+        Hasilnya adalah komposit di atas latar hitam dengan alpha 255, setara
+        dengan convert("RGB") sebelumnya. Image ini bersifat read-only dan akan
+        berubah pada komposit berikutnya; gunakan copy() untuk menyimpannya.
+        """
+        if self._stale:
+            x1, y1, x2, y2 = self._stale
+            channel = self._get_scratch("channel", (y2 - y1, x2 - x1))
+            for index in range(3):
+                # Warna premultiplied = warna di atas latar hitam
+                np.multiply(self._accumulator[index, y1:y2, x1:x2],
+                            np.float32(255.0), out=channel)
+                channel += 0.5
+                self._output[y1:y2, x1:x2, index] = channel
+            self._stale = None
+        # Tampilan tanpa salinan; objek Image baru tiap kali agar salinan
+        # copy-on-write milik pemanggil sebelumnya tidak ikut terpengaruh
+        return Image.frombuffer("RGBA", self._size, self._output, "raw", "RGBA", 0, 1)
@@ -2,102 +2,103 @@
 
 # Import pustaka yang mungkin diperlukan untuk filter gambar
 # Dipindahkan ke atas
-from PIL import Image, ImageFilter, ImageOps, ImageEnhance, ImageDraw
+from PIL import Image, ImageFilter, ImageOps, ImageEnhance, ImageStat
 
+# Matriks konversi warna sepia (RGB -> RGB), dipakai oleh Image.convert
+_SEPIA_MATRIX = (
+    0.393, 0.769, 0.189, 0,
+    0.349, 0.686, 0.168, 0,
+    0.272, 0.534, 0.131, 0,
+)
 
-class ImageFilters:
+# Daftar filter yang dikenali oleh apply_filter_to_image
+FILTER_NAMES = ("grayscale", "sepia", "blur", "sharpen",
+                "invert", "brightness", "contrast")
+# Filter yang hasilnya bergantung pada statistik seluruh gambar (contrast:
+# rata-rata kecerahan), sehingga tidak bisa dihitung per tile secara mandiri
+GLOBAL_FILTERS = ("contrast",)
+
+
+def filter_margin(filter_name: str, **kwargs) -> int:
+    """
+    Mengembalikan jumlah piksel tetangga yang dibaca filter di sekitar setiap piksel.
+
+    Filter per-piksel (invert, sepia, dll.) bermargin 0, sedangkan filter spasial
+    seperti blur membutuhkan margin agar hasil per-tile tidak memiliki sambungan.
+    """
+    if filter_name == "blur":
+        return int(kwargs.get("radius", 2) * 3) + 1
+    if filter_name == "sharpen":
+        return 2
+    return 0
+
+
+def filter_statistics(image, filter_name: str) -> dict:
+    """
+    Statistik seluruh gambar yang dibutuhkan filter global (GLOBAL_FILTERS),
+    sebagai kwargs tambahan untuk apply_filter_to_image. Pemanggil yang
+    memproses gambar per tile menghitungnya sekali dari gambar utuh agar
+    setiap tile memakai nilai yang sama; filter lain mengembalikan {}.
+    """
+    if filter_name == "contrast":
+        # Sama seperti ImageEnhance.Contrast: rata-rata kanal L, dibulatkan
+        return {"mean": int(ImageStat.Stat(image.convert("L")).mean[0] + 0.5)}
+    return {}
+
+
+def apply_filter_to_image(image, filter_name: str, **kwargs):
     """
-    Kumpulan fungsi untuk menerapkan berbagai filter gambar.
+    Menerapkan filter ke salinan gambar dan mengembalikan hasilnya.
+
+    Fungsi ini tidak menyentuh UI sehingga dapat dipakai ulang oleh filter
+    destruktif, adjustment layer, maupun pemrosesan lainnya. Kanal alpha
+    gambar RGBA selalu dipertahankan.
+
+    Args:
+        image: Objek PIL Image (RGB atau RGBA).
+        filter_name (str): Nama filter, salah satu dari FILTER_NAMES.
+        **kwargs: Parameter filter (misal: radius untuk blur, factor untuk brightness),
+            ditambah hasil filter_statistics jika image hanya potongan gambar.
+
+    Returns:
+        PIL Image baru dengan mode yang sama seperti input.
+
+    Raises:
+        ValueError: Jika nama filter tidak dikenal.
     """
+    # Filter spasial bekerja langsung pada semua kanal (termasuk alpha),
+    # sama seperti perilaku filter destruktif sebelumnya
+    if filter_name == "blur":
+        return image.filter(ImageFilter.GaussianBlur(kwargs.get("radius", 2)))
+    if filter_name == "sharpen":
+        return image.filter(ImageFilter.SHARPEN)
+
+    alpha = image.getchannel("A") if image.mode == "RGBA" else None
+    rgb_image = image.convert("RGB")
+
+    if filter_name == "grayscale":
+        processed = ImageOps.grayscale(rgb_image).convert("RGB")
+    elif filter_name == "sepia":
+        # Konversi matriks dilakukan di C, jauh lebih cepat dari loop per piksel
+        processed = rgb_image.convert("RGB", _SEPIA_MATRIX)
+    elif filter_name == "invert":
+        processed = ImageOps.invert(rgb_image)
+    elif filter_name == "brightness":
+        # >1.0 lebih cerah, <1.0 lebih gelap
+        processed = ImageEnhance.Brightness(
+            rgb_image).enhance(kwargs.get("factor", 1.2))
+    elif filter_name == "contrast":
+        # Dicampur dengan abu-abu rata-rata seperti ImageEnhance.Contrast, tetapi
+        # rata-ratanya bisa diberikan pemanggil (lihat filter_statistics)
+        mean = kwargs.get("mean")
+        if mean is None:
+            mean = filter_statistics(rgb_image, filter_name)["mean"]
+        processed = Image.blend(Image.new("RGB", rgb_image.size, (mean,) * 3),
+                                rgb_image, kwargs.get("factor", 1.2))
+    else:
+        raise ValueError(f"Filter '{filter_name}' tidak dikenal.")
+
+    if alpha is not None:
+        processed.putalpha(alpha)
+    return processed
 
-    def __init__(self, app_instance):
-        self.app = app_instance
-        print("ImageFilters diinisialisasi.")
-
-    def apply_filter(self, filter_name: str, **kwargs):
-        """
-        Menerapkan filter ke gambar aktif pada kanvas.
-        """
-        current_image = self.app.canvas_manager.current_image
-        if not current_image:
-            print("Tidak ada gambar untuk diterapkan filter.")
-            self.app.main_window.update_status(
-                "Tidak ada gambar untuk filter.")
-            return
-
-        try:
-            # from PIL import Image, ImageFilter, ImageOps, ImageEnhance # Impor sudah di atas
-
-            # Simpan keadaan sebelum filter untuk undo
-            self.app.canvas_manager._add_to_history()
-
-            processed_image = current_image.copy()
-
-            if filter_name == "grayscale":
-                processed_image = ImageOps.grayscale(processed_image)
-                print("Filter: Grayscale diterapkan.")
-            elif filter_name == "sepia":
-                # Implementasi sederhana sepia
-                pixels = processed_image.load()
-                for i in range(processed_image.size[0]):
-                    for j in range(processed_image.size[1]):
-                        r, g, b = pixels[i, j]
-                        tr = int(0.393 * r + 0.769 * g + 0.189 * b)
-                        tg = int(0.349 * r + 0.686 * g + 0.168 * b)
-                        tb = int(0.272 * r + 0.534 * g + 0.131 * b)
-                        pixels[i, j] = (min(255, tr), min(
-                            255, tg), min(255, tb))
-                print("Filter: Sepia diterapkan.")
-            elif filter_name == "blur":
-                radius = kwargs.get("radius", 2)
-                processed_image = processed_image.filter(
-                    ImageFilter.GaussianBlur(radius))
-                print(f"Filter: Blur (Radius: {radius}) diterapkan.")
-            elif filter_name == "sharpen":
-                processed_image = processed_image.filter(ImageFilter.SHARPEN)
-                print("Filter: Sharpen diterapkan.")
-            elif filter_name == "invert":
-                processed_image = ImageOps.invert(processed_image)
-                print("Filter: Invert diterapkan.")
-            elif filter_name == "brightness":
-                # >1.0 lebih cerah, <1.0 lebih gelap
-                factor = kwargs.get("factor", 1.2)
-                enhancer = ImageEnhance.Brightness(processed_image)
-                processed_image = enhancer.enhance(factor)
-                print(f"Filter: Brightness (Factor: {factor}) diterapkan.")
-            elif filter_name == "contrast":
-                factor = kwargs.get("factor", 1.2)
-                enhancer = ImageEnhance.Contrast(processed_image)
-                processed_image = enhancer.enhance(factor)
-                print(f"Filter: Contrast (Factor: {factor}) diterapkan.")
-            # Tambahkan lebih banyak filter di sini
-
-            else:
-                print(
-                    f"Filter '{filter_name}' tidak dikenal atau belum diimplementasikan.")
-                self.app.main_window.update_status(
-                    f"Filter '{filter_name}' tidak dikenal.")
-                # Hapus dari riwayat undo jika tidak ada filter yang diterapkan
-                self.app.canvas_manager.undo_history.pop()
-                return
-
-            self.app.canvas_manager.current_image = processed_image
-            # Perbarui drawing_context setelah gambar diubah
-            self.app.canvas_manager.drawing_context = ImageDraw.Draw(
-                self.app.canvas_manager.current_image)
-            self.app.canvas_manager._update_canvas_display()
-            self.app.main_window.update_status(
-                f"Filter '{filter_name}' diterapkan.")
-
-        except ImportError:
-            print("Pillow (PIL) tidak terinstal, tidak dapat menerapkan filter gambar.")
-            self.app.main_window.update_status(
-                "Pillow tidak terinstal. Filter dibatalkan.")
-            # Hapus dari riwayat undo jika PIL tidak ada
-            self.app.canvas_manager.undo_history.pop()
-        except Exception as e:
-            print(f"Error saat menerapkan filter '{filter_name}': {e}")
-            self.app.main_window.update_status(
-                f"Error filter: {filter_name}. ({e})")
-            # Hapus dari riwayat undo jika ada error
-            self.app.canvas_manager.undo_history.pop()
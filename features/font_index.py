@@ -0,0 +1,285 @@
+# features/font_index.py
+"""
+Indeks font dan cache ImageFont untuk TextTool.
+
+Indeks dibangun sekali dengan memindai AppConfig.FONTS_PATH dan direktori
+font sistem, membaca nama keluarga dan gaya setiap file lewat FreeType,
+lalu disimpan ke AppConfig.FONT_INDEX_PATH. Indeks yang tersimpan dipakai
+ulang selama mtime semua direktori yang dipindai tidak berubah (menambah
+atau menghapus file font mengubah mtime direktorinya).
+
+ImageFont yang sudah dimuat disimpan di cache LRU per (keluarga, ukuran,
+tebal, miring), sehingga menerapkan teks dengan font yang sama tidak
+menyentuh filesystem lagi.
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from PIL import ImageFont
+
+from config import AppConfig
+from core.perf_stats import cache_stats
+from utils.log import get_logger
+
+log = get_logger("tools")
+
+INDEX_VERSION = 1
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+MAX_COLLECTION_FACES = 16  # Batas face yang dibaca dari satu file .ttc
+# Kata di nama gaya yang menandai face tebal / miring
+BOLD_WORDS = ("bold", "black", "heavy")
+ITALIC_WORDS = ("italic", "oblique")
+# Nama gaya "polos" yang diutamakan untuk kombinasi tebal/miring tertentu
+REGULAR_STYLES = ("regular", "normal", "book", "roman", "")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_font_cache = cache_stats("font")
+
+
+def font_directories():
+    """
+    Direktori yang dipindai: AppConfig.FONTS_PATH (relatif terhadap direktori
+    aplikasi) lalu direktori font sistem untuk platform ini.
+    """
+    directories = [os.path.join(REPO_DIR, AppConfig.FONTS_PATH)]
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        directories.append(os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"))
+        local = os.environ.get("LOCALAPPDATA")
+        if local:
+            directories.append(os.path.join(local, "Microsoft", "Windows", "Fonts"))
+    elif sys.platform == "darwin":
+        directories += ["/System/Library/Fonts", "/Library/Fonts",
+                        os.path.join(home, "Library", "Fonts")]
+    else:
+        directories += ["/usr/share/fonts", "/usr/local/share/fonts",
+                        os.path.join(home, ".local", "share", "fonts"),
+                        os.path.join(home, ".fonts")]
+    return [os.path.normpath(directory) for directory in directories]
+
+
+def _style_flags(style: str):
+    style = style.lower()
+    return (any(word in style for word in BOLD_WORDS),
+            any(word in style for word in ITALIC_WORDS))
+
+
+def _style_rank(style: str) -> int:
+    """
+    0 untuk nama gaya standar (misal "Bold Italic"), 1 untuk varian lain
+    (misal "Medium", "Light Italic") yang hanya dipakai jika tidak ada yang standar.
+    """
+    words = [word for word in style.lower().replace("-", " ").split()
+             if word not in BOLD_WORDS + ITALIC_WORDS]
+    return 0 if " ".join(words) in REGULAR_STYLES else 1
+
+
+def _read_faces(path: str):
+    """
+    Membaca (index, keluarga, gaya) setiap face di file font.
+    """
+    faces = []
+    count = MAX_COLLECTION_FACES if path.lower().endswith(".ttc") else 1
+    for index in range(count):
+        try:
+            family, style = ImageFont.truetype(path, 12, index=index).getname()
+        except (OSError, ValueError):
+            break  # File rusak atau tidak ada face berikutnya di koleksi
+        if family:
+            faces.append((index, family, style or ""))
+    return faces
+
+
+class FontIndex:
+    """
+    Pemetaan keluarga font -> file dan index face untuk setiap kombinasi
+    (tebal, miring).
+    """
+
+    def __init__(self, faces, directory_mtimes: dict):
+        # faces: [{"path", "index", "family", "style"}]
+        self.faces = faces
+        self.directory_mtimes = directory_mtimes
+        self._families = {}
+        for face in faces:
+            key = _style_flags(face["style"])
+            styles = self._families.setdefault(face["family"].lower(), {})
+            current = styles.get(key)
+            if current is None or _style_rank(face["style"]) < _style_rank(current["style"]):
+                styles[key] = face
+
+    @property
+    def families(self):
+        return sorted({face["family"] for face in self.faces}, key=str.lower)
+
+    def resolve(self, family: str, bold: bool = False, italic: bool = False):
+        """
+        Mencari face untuk keluarga dan gaya. Jika gaya yang diminta tidak
+        ada, dipakai face terdekat dari keluarga yang sama (miring tanpa
+        tebal, lalu tebal tanpa miring, lalu reguler).
+
+        Returns:
+            dict face ({"path", "index", "family", "style"}), atau None jika
+            keluarga tidak ditemukan.
+        """
+        styles = self._families.get(family.lower())
+        if not styles:
+            return None
+        for key in ((bold, italic), (False, italic), (bold, False), (False, False)):
+            if key in styles:
+                return styles[key]
+        return next(iter(styles.values()))
+
+    @classmethod
+    def scan(cls, directories):
+        faces = []
+        mtimes = {}
+        for root_directory in directories:
+            for directory, _, file_names in os.walk(root_directory):
+                mtimes[directory] = os.stat(directory).st_mtime
+                for file_name in sorted(file_names):
+                    if not file_name.lower().endswith(FONT_EXTENSIONS):
+                        continue
+                    path = os.path.join(directory, file_name)
+                    faces += [{"path": path, "index": index, "family": family, "style": style}
+                              for index, family, style in _read_faces(path)]
+        return cls(faces, mtimes)
+
+    @classmethod
+    def load(cls, directories=None, index_path: str = None):
+        """
+        Memuat indeks dari file cache jika masih valid, atau memindai ulang
+        direktori font dan menyimpan hasilnya.
+        """
+        directories = font_directories() if directories is None else directories
+        index_path = index_path or AppConfig.FONT_INDEX_PATH
+        cached = cls._read_cache(index_path, directories)
+        if cached is not None:
+            log.debug("Indeks font dimuat dari cache: %d face.", len(cached.faces))
+            return cached
+
+        index = cls.scan(directories)
+        log.info("Indeks font dibangun: %d face dari %d direktori.",
+                 len(index.faces), len(index.directory_mtimes))
+        try:
+            index.save(index_path, directories)
+        except OSError as e:
+            log.warning("Gagal menyimpan indeks font: %s", e)
+        return index
+
+    @classmethod
+    def _read_cache(cls, index_path: str, directories):
+        try:
+            with open(index_path, encoding="utf-8") as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION or data.get("roots") != directories:
+            return None
+        mtimes = data.get("directories", {})
+        for directory, mtime in mtimes.items():
+            try:
+                if os.stat(directory).st_mtime != mtime:
+                    return None
+            except OSError:
+                return None  # Direktori dihapus
+        # Direktori akar yang dulu tidak ada bisa saja sudah dibuat
+        if any(os.path.isdir(root) and root not in mtimes for root in directories):
+            return None
+        return cls(data.get("faces", []), mtimes)
+
+    def save(self, index_path: str, directories):
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        temp_path = index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump({"version": INDEX_VERSION, "roots": directories,
+                       "directories": self.directory_mtimes, "faces": self.faces},
+                      index_file)
+        os.replace(temp_path, index_path)
+
+
+class FontCache:
+    """
+    Cache LRU ImageFont per (keluarga, ukuran, tebal, miring). Indeks font
+    dimuat saat pertama dibutuhkan; warm_up() dapat memuatnya lebih awal di
+    thread latar belakang.
+    """
+
+    def __init__(self, max_size: int = None, index_loader=None):
+        self.max_size = max_size or AppConfig.FONT_CACHE_SIZE
+        self._index_loader = index_loader or FontIndex.load
+        self._index = None
+        self._index_lock = threading.Lock()
+        self._fonts = OrderedDict()
+
+    @property
+    def index(self) -> FontIndex:
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = self._index_loader()
+        return self._index
+
+    def warm_up(self):
+        """
+        Memuat indeks font di thread latar belakang.
+        """
+        threading.Thread(target=lambda: self.index, name="font-index",
+                         daemon=True).start()
+
+    def get(self, family: str, size: int, bold: bool = False, italic: bool = False):
+        """
+        ImageFont untuk keluarga dan gaya; keluarga yang tidak dikenal diganti
+        AppConfig.FALLBACK_FONT_FAMILIES, lalu font bawaan Pillow.
+        """
+        key = (family.lower(), size, bold, italic)
+        font = self._fonts.get(key)
+        if font is not None:
+            self._fonts.move_to_end(key)
+            _font_cache.hits += 1
+            return font
+        _font_cache.misses += 1
+
+        font = self._load(family, size, bold, italic)
+        self._fonts[key] = font
+        if len(self._fonts) > self.max_size:
+            self._fonts.popitem(last=False)
+        return font
+
+    def _load(self, family: str, size: int, bold: bool, italic: bool):
+        for candidate in (family,) + tuple(AppConfig.FALLBACK_FONT_FAMILIES):
+            face = self.index.resolve(candidate, bold, italic)
+            if face is None:
+                continue
+            try:
+                font = ImageFont.truetype(face["path"], size, index=face["index"])
+            except OSError as e:
+                log.warning("Gagal memuat font '%s': %s", face["path"], e)
+                continue
+            if candidate.lower() != family.lower():
+                log.warning("Font '%s' tidak ditemukan, memakai '%s'.", family, face["family"])
+            log.debug("Font dimuat: %s %s (%s).", face["family"], face["style"], face["path"])
+            return font
+        log.warning("Font '%s' tidak ditemukan, menggunakan font default.", family)
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:  # Pillow < 10.1 tidak menerima ukuran
+            return ImageFont.load_default()
+
+
+_shared_cache = None
+
+
+def shared_font_cache() -> FontCache:
+    """
+    FontCache bersama untuk seluruh aplikasi.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = FontCache()
+    return _shared_cache
@@ -0,0 +1,193 @@
+# features/large_image.py
+
+import math
+import threading
+
+from PIL import Image
+
+from config import AppConfig
+from features.layer_manager import Layer, _tiles_in_box, union_bbox
+from features.layer_storage import allocate_image, blank_image
+from utils.log import get_logger
+from utils.tracing import traced
+
+log = get_logger("image")
+
+# Pillow menolak gambar di atas ~179 MP sebagai "decompression bomb"; hasil
+# pindaian besar adalah kasus penggunaan yang sah di sini
+if Image.MAX_IMAGE_PIXELS is not None:
+    Image.MAX_IMAGE_PIXELS = max(Image.MAX_IMAGE_PIXELS, AppConfig.MAX_IMAGE_PIXELS)
+
+
+def is_large_image(file_path: str) -> bool:
+    """
+    Memeriksa ukuran gambar dari header file saja (tanpa mendekode piksel).
+    """
+    try:
+        with Image.open(file_path) as image_file:
+            width, height = image_file.size
+    except Exception:
+        return False
+    return width * height >= AppConfig.LARGE_IMAGE_PIXELS
+
+
+def load_proxy(image_file, max_side: int):
+    """
+    Membuat proxy beresolusi rendah secepat mungkin. Untuk JPEG, draft()
+    membuat decoder langsung menghasilkan gambar 1/2-1/8 ukuran (skala DCT),
+    lalu reduce() mengecilkannya lagi ke max_side. Format tanpa dekode
+    bertingkat tidak punya proxy murah, sehingga mengembalikan None.
+    """
+    width, height = image_file.size
+    scale = max(1, math.ceil(max(width, height) / max_side))
+    if scale == 1:
+        return None
+    image_file.draft("RGB", (width // scale, height // scale))
+    if image_file.size == (width, height):
+        return None  # Format tidak mendukung draft
+    # Format dengan draft (JPEG) tidak memiliki alpha; RGB juga menghindari
+    # konversi premultiplied seluruh proxy pada setiap resize
+    proxy = image_file.convert("RGB")
+    factor = math.ceil(max(proxy.size) / max_side)
+    if factor > 1:
+        proxy = proxy.reduce(factor)
+    return proxy
+
+
+class ImageFileTileSource:
+    """
+    Piksel layer yang berasal dari file gambar besar yang belum selesai didekode.
+
+    Dekode resolusi penuh berjalan di thread latar belakang. Decoder Pillow
+    menghasilkan gambar utuh dalam mode aslinya (misal RGB) di heap, lalu
+    gambar itu dikonversi per pita baris ke buffer RGBA di memory map
+    (allocate_image) dan dilepas; selama konversi keduanya sempat ada
+    bersamaan. Selama belum selesai, load_into() dengan box hanya mengisi
+    tile di box dengan proxy yang diperbesar (untuk tampilan); layer
+    tersebut tidak boleh diedit atau dibaca utuh (lihat Layer.decoding).
+    Setelah selesai, Layer.ensure_loaded() mengambil alih buffer memory map
+    lewat take_full() sebagai piksel layer, tanpa salinan.
+    """
+
+    def __init__(self, file_path: str, size, proxy, tile_size: int):
+        self.file_path = file_path
+        self.size = size
+        self.proxy = proxy
+        self.tile_size = tile_size
+        columns = math.ceil(size[0] / tile_size)
+        rows = math.ceil(size[1] / tile_size)
+        self.entries = {(tx, ty): None for ty in range(rows) for tx in range(columns)}
+        self.error = None
+        self._previewed = set()
+        self._full = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(
+            target=self._decode, name="large-image-decode", daemon=True)
+        self._thread.start()
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    @traced("decode_full_image", "image")
+    def _decode(self):
+        # Decoder Pillow melepas GIL, jadi UI tetap berjalan selama dekode
+        try:
+            with Image.open(self.file_path) as image_file:
+                image_file.load()
+                width, height = self.size
+                full = allocate_image(width, height)
+                # Konversi ke RGBA per pita agar salinan RGBA penuh di heap tidak
+                # pernah ada; gambar hasil dekode (mode asli) dilepas setelahnya
+                for y in range(0, height, self.tile_size):
+                    box = (0, y, width, min(y + self.tile_size, height))
+                    band = image_file.crop(box)
+                    if band.mode != "RGBA":
+                        band = band.convert("RGBA")
+                    full.paste(band, box[:2])
+                self._full = full
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    def take_full(self):
+        """
+        Menyerahkan gambar resolusi penuh dan mengosongkan sumber ini. Menunggu
+        dekode jika belum selesai, sehingga di thread UI hanya dipanggil setelah
+        ready (lihat LayerManager.refuse_while_decoding).
+
+        Returns:
+            PIL Image RGBA di memory map, atau None jika dekode gagal.
+        """
+        self._done.wait()
+        full, self._full = self._full, None
+        if self.error is not None:
+            log.error("Gagal mendekode '%s': %s", self.file_path, self.error)
+            self.entries.clear()
+            return None
+        self.entries.clear()
+        return full
+
+    def tile_box(self, tile):
+        tx, ty = tile
+        size = self.tile_size
+        return (tx * size, ty * size,
+                min((tx + 1) * size, self.size[0]), min((ty + 1) * size, self.size[1]))
+
+    def load_into(self, image, box):
+        """
+        Mengisi tile di box yang belum dimuat dengan pratinjau proxy selama
+        dekode berjalan. Piksel resolusi penuh tidak disalin per tile; lihat
+        take_full().
+
+        Returns:
+            Gabungan kotak tile yang berubah, atau None jika tidak ada.
+        """
+        if self.ready:
+            return None
+        tiles = [tile for tile in _tiles_in_box(box, self.tile_size)
+                 if tile in self.entries]
+        return self._preview_into(image, tiles)
+
+    def _preview_into(self, image, tiles):
+        """
+        Mengisi tile dengan proxy yang diperbesar; hanya sekali per tile.
+        """
+        if self.proxy is None:
+            return None
+        scale_x = self.proxy.width / self.size[0]
+        scale_y = self.proxy.height / self.size[1]
+        region = None
+        for tile in tiles:
+            if tile in self._previewed:
+                continue
+            x1, y1, x2, y2 = self.tile_box(tile)
+            preview = self.proxy.resize(
+                (x2 - x1, y2 - y1), Image.BILINEAR,
+                box=(x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y))
+            image.paste(preview, (x1, y1))
+            self._previewed.add(tile)
+            region = union_bbox(region, (x1, y1, x2, y2))
+        return region
+
+
+def create_proxy_layer(file_path: str, name: str):
+    """
+    Membuat layer seukuran gambar besar tanpa mendekode resolusi penuhnya.
+    Piksel dimuat lewat ImageFileTileSource (lihat Layer.ensure_loaded).
+
+    Returns:
+        tuple: (layer, sumber tile).
+    """
+    with Image.open(file_path) as image_file:
+        size = image_file.size
+        proxy = load_proxy(image_file, AppConfig.PROXY_MAX_SIDE)
+    layer = Layer(1, 1, name)
+    layer.replace_image(blank_image(*size), None)
+    source = ImageFileTileSource(file_path, size, proxy, AppConfig.TILE_SIZE)
+    layer.tile_source = source
+    return layer, source
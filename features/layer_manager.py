@@ -1,7 +1,162 @@
 # features/layer_manager.py
 
-import tkinter as tk
-from PIL import Image, ImageDraw  # Dipindahkan ke atas
+import itertools
+import threading
+
+from PIL import Image, ImageDraw, ImageColor  # Dipindahkan ke atas
+
+from config import AppConfig
+from core.history import HistoryAction, image_bytes
+from core.perf_stats import cache_stats
+from features.compositor import Compositor, BLEND_MODES
+from features.layer_storage import allocate_image, load_numpy
+from utils.log import get_logger
+from utils.tracing import traced
+# features.filters dan concurrent.futures diimpor saat pertama dipakai
+# agar tidak menambah waktu startup
+
+log = get_logger("layers")
+
+# Penghitung hit/miss untuk HUD performa
+_composite_cache = cache_stats("composite")  # Hit: buffer komposit dipakai ulang
+_adjustment_cache = cache_stats("adjustment")  # Per tile adjustment
+_group_cache = cache_stats("group")  # Hasil flatten grup
+
+# Nomor unik layer. Berbeda dengan id(), nomor tidak pernah dipakai ulang
+# setelah layer dibuang, sehingga aman dipakai sebagai stamp cache.
+_layer_uids = itertools.count(1)
+
+
+def _tiles_in_box(box, tile_size: int):
+    """
+    Menghasilkan koordinat tile (tx, ty) yang beririsan dengan kotak (x1, y1, x2, y2).
+    """
+    x1, y1, x2, y2 = box
+    if x2 <= x1 or y2 <= y1:
+        return
+    for ty in range(max(0, y1) // tile_size, (y2 - 1) // tile_size + 1):
+        for tx in range(max(0, x1) // tile_size, (x2 - 1) // tile_size + 1):
+            yield tx, ty
+
+
+# Kotak yang mencakup seluruh dokumen berapa pun ukurannya
+FULL_BBOX = (0, 0, 1 << 30, 1 << 30)
+
+
+def union_bbox(a, b):
+    """
+    Menggabungkan dua kotak (x1, y1, x2, y2); None berarti kotak kosong.
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _expand_bbox(bbox, margin: int):
+    x1, y1, x2, y2 = bbox
+    return (x1 - margin, y1 - margin, x2 + margin, y2 + margin)
+
+
+def _shrink_bbox(bbox, margin: int, width: int, height: int):
+    """
+    Mengecilkan kotak sebesar margin, kecuali sisi yang berada di tepi dokumen.
+    """
+    x1, y1, x2, y2 = bbox
+    return (x1 + margin if x1 > 0 else 0, y1 + margin if y1 > 0 else 0,
+            x2 - margin if x2 < width else width, y2 - margin if y2 < height else height)
+
+
+def intersect_bbox(a, b):
+    """
+    Irisan dua kotak (x1, y1, x2, y2), atau None jika tidak beririsan.
+    """
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return (x1, y1, x2, y2)
+
+
+def clip_bbox(bbox, width: int, height: int):
+    """
+    Memotong kotak ke area (0, 0, width, height). Mengembalikan None jika kosong.
+    """
+    if bbox is None:
+        return None
+    x1, y1 = max(0, bbox[0]), max(0, bbox[1])
+    x2, y2 = min(width, bbox[2]), min(height, bbox[3])
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return (x1, y1, x2, y2)
+
+
+class TileSnapshot:
+    """
+    Snapshot copy-on-write sejumlah tile layer untuk disimpan di thread pekerja.
+
+    Saat snapshot diambil tidak ada piksel yang disalin. Thread pekerja
+    menyalin tile satu per satu lewat take(); sebelum layer ditulis di
+    tempat, Layer.prepare_write() lebih dulu menyalin tile snapshot yang
+    masih tertunda di area tulis. Dengan begitu pekerja selalu mendapat
+    piksel saat snapshot diambil, sedangkan thread UI hanya menyalin tile
+    yang benar-benar akan ditimpa selama penyimpanan berjalan.
+    """
+
+    def __init__(self, image, tiles, tile_size: int):
+        # Objek gambar saat snapshot; replace_image() memasang objek baru
+        # sehingga hanya penulisan di tempat yang perlu disalin lebih dulu
+        self.image = image
+        self.tile_size = tile_size
+        self._pending = set(tiles)
+        self._copies = {}  # Tile yang sudah disalin sebelum ditimpa
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return bool(self._pending)
+
+    def _crop(self, tile):
+        tx, ty = tile
+        size = self.tile_size
+        box = clip_bbox((tx * size, ty * size, (tx + 1) * size, (ty + 1) * size),
+                        *self.image.size)
+        return self.image.crop(box) if box else None
+
+    def preserve(self, bbox=None):
+        """
+        Thread UI: menyalin tile tertunda di dalam bbox (semua jika None)
+        sebelum piksel di sana ditimpa.
+        """
+        with self._lock:
+            if bbox is None:
+                tiles = list(self._pending)
+            else:
+                tiles = [tile for tile in _tiles_in_box(bbox, self.tile_size)
+                         if tile in self._pending]
+            for tile in tiles:
+                self._pending.discard(tile)
+                self._copies[tile] = self._crop(tile)
+
+    def take(self, tile):
+        """
+        Thread pekerja: piksel tile saat snapshot (PIL Image), atau None jika
+        tile berada di luar gambar.
+        """
+        with self._lock:
+            if tile in self._copies:
+                return self._copies.pop(tile)
+            self._pending.discard(tile)
+            return self._crop(tile)
+
+    def release(self):
+        """
+        Melepas tile yang belum diambil (penyimpanan selesai atau gagal).
+        """
+        with self._lock:
+            self._pending.clear()
+            self._copies.clear()
 
 
 class Layer:
@@ -13,29 +168,652 @@ class Layer:
     def __init__(self, width: int, height: int, name: str = "Layer", background_color: str = "#00000000"):
         try:
             # from PIL import Image, ImageDraw # Impor sudah di atas
-            # Default transparan penuh
-            self.image = Image.new("RGBA", (width, height), background_color)
+            # Default transparan penuh; piksel berada di memory map (lihat layer_storage)
+            self.image = allocate_image(width, height, background_color)
             self.draw_context = ImageDraw.Draw(self.image)
         except ImportError:
-            print("Pillow (PIL) tidak terinstal. Layer tidak akan berfungsi penuh.")
+            log.error("Pillow (PIL) tidak terinstal. Layer tidak akan berfungsi penuh.")
             self.image = None
             self.draw_context = None
 
+        self.uid = next(_layer_uids)
         self.name = name
+        # Warna pengisi area baru saat ukuran kanvas diperbesar
+        self.fill_color = background_color
+        self.parent = None  # LayerGroup induk, None untuk layer tingkat atas
         self.is_visible = True
         self.opacity = 1.0  # 0.0 (transparan) - 1.0 (buram)
+        self.blend_mode = "normal"  # Lihat features.compositor.BLEND_MODES
+
+        # Kotak pembatas konservatif untuk piksel yang tidak transparan.
+        # None berarti layer kosong; kotak boleh lebih besar dari isi sebenarnya.
+        self.content_bbox = None
+        if self.image and ImageColor.getcolor(background_color, "RGBA")[3] > 0:
+            self.content_bbox = (0, 0, width, height)
+
+        # Pelacakan perubahan per tile, dipakai cache adjustment layer.
+        # Revisi sebuah tile = max(revisi penuh, revisi tile itu sendiri).
+        self.revision = 0
+        self._full_revision = 0
+        self._tile_revisions = {}
+        # Area yang berubah sejak komposit terakhir (lihat take_damage)
+        self._damage = None
+        # Sumber tile yang belum didekode (file proyek yang dibuka), atau None
+        self.tile_source = None
+        # Pelacakan perubahan piksel saja (bukan tampilan atau pemuatan tile),
+        # dipakai penyimpanan inkremental untuk menulis ulang tile yang diedit
+        self.edit_revision = 0
+        self._edit_full_revision = 0
+        self._edit_tiles = {}
+        # TileSnapshot penyimpanan yang masih berjalan (lihat prepare_write)
+        self._snapshots = []
 
     def set_visible(self, visible: bool):
-        self.is_visible = visible
+        if visible != self.is_visible:
+            self.is_visible = visible
+            self._appearance_changed()
 
     def set_opacity(self, opacity: float):
-        self.opacity = max(0.0, min(1.0, opacity))
+        opacity = max(0.0, min(1.0, opacity))
+        if opacity != self.opacity:
+            self.opacity = opacity
+            self._appearance_changed()
+
+    def set_blend_mode(self, mode: str):
+        if mode not in BLEND_MODES:
+            raise ValueError(f"Mode blend '{mode}' tidak dikenal.")
+        if mode != self.blend_mode:
+            self.blend_mode = mode
+            self._appearance_changed()
+
+    def _appearance_changed(self):
+        """
+        Dipanggil saat visibilitas, opacity, atau mode blend berubah: hanya area
+        yang berisi piksel yang tampilannya ikut berubah.
+        """
+        bbox = self.content_bbox
+        if bbox is not None:
+            self._bump_revision(bbox)
 
     def clear(self):
         if self.image:
             # Clear to transparent
-            self.image = Image.new("RGBA", self.image.size, (0, 0, 0, 0))
+            self.image = allocate_image(*self.image.size)
             self.draw_context = ImageDraw.Draw(self.image)
+            self.content_bbox = None
+            self.tile_source = None
+            self._record_edit()
+            self._bump_revision()
+
+    def replace_image(self, image, content_bbox=None):
+        """
+        Mengganti seluruh piksel layer dengan gambar baru yang content_bbox-nya
+        sudah diketahui, sehingga tidak perlu memindai ulang kanal alpha.
+        """
+        self.image = image
+        self.tile_source = None
+        self.draw_context = ImageDraw.Draw(self.image)
+        self.content_bbox = clip_bbox(content_bbox, *image.size)
+        self._record_edit()
+        self._bump_revision()
+
+    def ensure_loaded(self, box=None) -> bool:
+        """
+        Mendekode tile yang belum dimuat di dalam box (semua jika None).
+        Harus dipanggil sebelum membaca atau mengubah piksel di luar area
+        yang sudah dimuat.
+
+        Returns:
+            True jika ada tile yang baru dimuat.
+        """
+        if not self.tile_source:
+            return False
+        source = self.tile_source
+        if hasattr(source, "take_full") and (box is None or source.ready):
+            # Gambar besar (features/large_image.py): hasil dekode di memory map
+            # diambil alih utuh sebagai piksel layer, bukan disalin per tile
+            full = source.take_full()
+            self.tile_source = None
+            if full is None:
+                return False
+            self.image = full
+            self.draw_context = ImageDraw.Draw(self.image)
+            self.content_bbox = (0, 0, *full.size)
+            self._bump_revision()  # Bukan edit: piksel sama dengan file
+            return True
+        region = self.tile_source.load_into(self.image, box)
+        if not self.tile_source:
+            self.tile_source = None
+        if region is None:
+            return False
+        # Bukan edit: piksel sama dengan yang ada di file
+        self.content_bbox = clip_bbox(
+            union_bbox(self.content_bbox, region), *self.image.size)
+        self._bump_revision(region)
+        return True
+
+    @property
+    def decoding(self) -> bool:
+        """
+        True selama piksel resolusi penuh layer masih didekode di latar
+        belakang (features/large_image.py): layer hanya berisi pratinjau proxy,
+        sehingga belum boleh diedit atau dibaca utuh.
+        """
+        return hasattr(self.tile_source, "take_full") and not self.tile_source.ready
+
+    def snapshot_tiles(self, tiles) -> TileSnapshot:
+        """
+        Mengambil snapshot copy-on-write tile untuk disimpan di thread pekerja.
+        Penulisan piksel di tempat harus didahului prepare_write().
+        """
+        snapshot = TileSnapshot(self.image, tiles, AppConfig.TILE_SIZE)
+        self._snapshots.append(snapshot)
+        return snapshot
+
+    def prepare_write(self, bbox=None):
+        """
+        Dipanggil sebelum menulis piksel di tempat di dalam bbox (seluruh
+        layer jika None): menyalin dulu tile yang masih dibutuhkan snapshot
+        penyimpanan yang sedang berjalan.
+        """
+        if not self._snapshots:
+            return
+        self._snapshots = [snapshot for snapshot in self._snapshots if snapshot.active]
+        for snapshot in self._snapshots:
+            if snapshot.image is self.image:
+                snapshot.preserve(bbox)
+
+    def mark_dirty(self, bbox=None):
+        """
+        Menandai area piksel layer sebagai berubah dan memperbarui content_bbox.
+
+        Args:
+            bbox (tuple, optional): Kotak (x1, y1, x2, y2) yang berubah.
+                Jika None, seluruh layer dianggap berubah dan content_bbox
+                dihitung ulang dari kanal alpha.
+        """
+        if self.image:
+            if bbox is None:
+                self.content_bbox = self.image.getbbox()
+            else:
+                self.content_bbox = clip_bbox(
+                    union_bbox(self.content_bbox, bbox), *self.image.size)
+        self._record_edit(bbox)
+        self._bump_revision(bbox)
+
+    def _record_edit(self, bbox=None):
+        """
+        Mencatat perubahan piksel pada tile dalam bbox (seluruh layer jika None).
+        """
+        self.edit_revision += 1
+        if bbox is None:
+            self._edit_full_revision = self.edit_revision
+            self._edit_tiles.clear()
+        else:
+            for tile in _tiles_in_box(bbox, AppConfig.TILE_SIZE):
+                self._edit_tiles[tile] = self.edit_revision
+
+    def edited_tiles_since(self, edit_revision: int):
+        """
+        Mengembalikan tile yang pikselnya diedit setelah edit_revision:
+        set tile (bisa kosong), atau None jika seluruh layer berubah.
+        """
+        if self._edit_full_revision > edit_revision:
+            return None
+        return {tile for tile, revision in self._edit_tiles.items()
+                if revision > edit_revision}
+
+    def _bump_revision(self, bbox=None):
+        """
+        Menaikkan revisi layer (atau tile dalam bbox) tanpa menyentuh piksel.
+        Dipakai juga untuk perubahan visibilitas, opacity, dan mode blend.
+        """
+        self.revision += 1
+        if bbox is None:
+            self._full_revision = self.revision
+            self._tile_revisions.clear()
+            self._damage = FULL_BBOX
+        else:
+            for tile in _tiles_in_box(bbox, AppConfig.TILE_SIZE):
+                self._tile_revisions[tile] = self.revision
+            self._damage = union_bbox(self._damage, bbox)
+        if self.parent is not None:
+            # Perubahan apa pun pada layer membuat hasil flatten grup induknya basi
+            self.parent._child_changed(bbox)
+
+    def take_damage(self):
+        """
+        Mengembalikan area yang berubah sejak pemanggilan terakhir, lalu mengosongkannya.
+        """
+        damage, self._damage = self._damage, None
+        return damage
+
+    def dirty_region_since(self, revision: int):
+        """
+        Mengembalikan area yang berubah setelah revisi tertentu: None jika tidak
+        ada perubahan, FULL_BBOX jika seluruh layer berubah, atau gabungan
+        kotak tile yang revisinya lebih baru.
+        """
+        if revision >= self.revision:
+            return None
+        if self._full_revision > revision:
+            return FULL_BBOX
+        tile_size = AppConfig.TILE_SIZE
+        region = None
+        for (tx, ty), tile_revision in self._tile_revisions.items():
+            if tile_revision > revision:
+                region = union_bbox(region, (tx * tile_size, ty * tile_size,
+                                             (tx + 1) * tile_size, (ty + 1) * tile_size))
+        return region
+
+    def region_revision(self, box) -> int:
+        """
+        Mengembalikan revisi terbaru dari semua tile yang beririsan dengan kotak.
+        """
+        revision = self._full_revision
+        if self._tile_revisions:
+            for tile in _tiles_in_box(box, AppConfig.TILE_SIZE):
+                revision = max(revision, self._tile_revisions.get(tile, 0))
+        return revision
+
+
+class AdjustmentLayer(Layer):
+    """
+    Layer non-destruktif yang menerapkan filter ke semua layer di bawahnya
+    saat komposit. Hasilnya di-cache per tile dan hanya dihitung ulang jika
+    parameter berubah atau tile di bawahnya ditandai kotor. Visibilitas dan
+    opacity diterapkan setelah cache, sehingga mengubahnya tidak membuang
+    tile yang sudah dihitung.
+    """
+
+    def __init__(self, kind: str, name: str = None, **params):
+        from features.filters import FILTER_NAMES
+        if kind not in FILTER_NAMES:
+            raise ValueError(f"Jenis adjustment '{kind}' tidak dikenal.")
+        super().__init__(1, 1, name or kind.capitalize())
+        # Adjustment layer tidak memiliki piksel sendiri
+        self.image = None
+        self.draw_context = None
+
+        self.kind = kind
+        self.params = dict(params)
+        self._tile_cache = {}  # (tx, ty) -> (stamp, tile PIL Image)
+        self._cache_size = None
+
+    def _appearance_changed(self):
+        # Adjustment memengaruhi semua piksel di bawahnya, bukan hanya content_bbox.
+        # Revisi layer sendiri tidak termasuk stamp cache tile (lihat apply_to)
+        self._bump_revision()
+
+    @property
+    def margin(self) -> int:
+        """
+        Jarak (piksel) sejauh mana perubahan di bawah adjustment ini menyebar
+        ke hasilnya: 0 untuk filter per-piksel, radius untuk filter spasial.
+        """
+        from features.filters import filter_margin
+        return filter_margin(self.kind, **self.params)
+
+    @property
+    def is_global(self) -> bool:
+        """
+        True jika hasil setiap piksel bergantung pada seluruh gambar di bawahnya
+        (misal contrast, yang memakai rata-rata kecerahan). Perubahan di mana pun
+        di bawahnya mengubah seluruh hasil, jadi apply_to harus menerima gambar
+        seluruh dokumen.
+        """
+        from features.filters import GLOBAL_FILTERS
+        return self.kind in GLOBAL_FILTERS
+
+    def set_params(self, **params):
+        """
+        Mengubah parameter adjustment dan membatalkan cache tile.
+        """
+        self.params.update(params)
+        self._tile_cache.clear()
+        self._bump_revision()
+
+    def apply_to(self, image, layers_below, box=None, document_size=None, valid_box=None):
+        """
+        Menerapkan adjustment ke gambar komposit layer-layer di bawahnya.
+
+        Args:
+            image: PIL Image RGBA hasil komposit layer di bawah adjustment ini.
+            layers_below (list): Layer di bawah adjustment, untuk memeriksa tile kotor.
+            box (tuple, optional): Posisi image di dokumen (x1, y1, x2, y2) saat
+                hanya sebagian dokumen yang dikomposit ulang; None jika image
+                adalah seluruh dokumen.
+            document_size (tuple, optional): (lebar, tinggi) dokumen; wajib jika box diberikan.
+            valid_box (tuple, optional): Bagian image yang isinya benar (default
+                box). Tile hanya di-cache jika seluruh sumbernya di dalam area ini.
+                Adjustment global (lihat is_global) tidak boleh diberi box parsial.
+
+        Returns:
+            PIL Image RGBA hasil adjustment, seukuran image.
+        """
+        width, height = document_size or image.size
+        if self._cache_size != (width, height):
+            self._tile_cache.clear()
+            self._cache_size = (width, height)
+
+        from features.filters import apply_filter_to_image, filter_statistics
+        tile_size = AppConfig.TILE_SIZE
+        margin = self.margin
+        # Statistik filter global dihitung sekali dari seluruh gambar dan dipakai
+        # setiap tile; nilainya ikut stamp cache
+        statistics = filter_statistics(image, self.kind)
+        params = dict(self.params, **statistics)
+        box = box or (0, 0, width, height)
+        valid_box = valid_box or box
+        result = image.copy()
+        reused = recomputed = 0
+
+        for tx, ty in _tiles_in_box(box, tile_size):
+            tile_box = (tx * tile_size, ty * tile_size,
+                        min((tx + 1) * tile_size, width), min((ty + 1) * tile_size, height))
+            # Filter spasial membaca piksel di luar tile, jadi area sumbernya diperlebar
+            source_box = (max(0, tile_box[0] - margin), max(0, tile_box[1] - margin),
+                          min(width, tile_box[2] + margin), min(height, tile_box[3] + margin))
+            cacheable = intersect_bbox(source_box, valid_box) == source_box
+            if cacheable:
+                stamp = (tuple(sorted(statistics.items())),) + tuple(
+                    (layer.uid, layer.region_revision(source_box)) for layer in layers_below)
+                cached = self._tile_cache.get((tx, ty))
+                if cached and cached[0] == stamp:
+                    result.paste(cached[1], (tile_box[0] - box[0], tile_box[1] - box[1]))
+                    reused += 1
+                    continue
+            else:
+                # Tile di tepi area komposit ulang: hanya bagian di dalam box yang
+                # dihitung (tepinya diperbaiki pemanggil), dan hasilnya tidak di-cache
+                source_box = intersect_bbox(source_box, box)
+                tile_box = intersect_bbox(tile_box, box)
+            processed = apply_filter_to_image(
+                image.crop((source_box[0] - box[0], source_box[1] - box[1],
+                            source_box[2] - box[0], source_box[3] - box[1])),
+                self.kind, **params)
+            tile = processed.crop((tile_box[0] - source_box[0], tile_box[1] - source_box[1],
+                                   tile_box[2] - source_box[0], tile_box[3] - source_box[1]))
+            if cacheable:
+                self._tile_cache[(tx, ty)] = (stamp, tile)
+            recomputed += 1
+            result.paste(tile, (tile_box[0] - box[0], tile_box[1] - box[1]))
+
+        if recomputed:
+            log.debug("Adjustment '%s': %d tile dihitung ulang.", self.name, recomputed)
+        _adjustment_cache.misses += recomputed
+        _adjustment_cache.hits += reused
+        if self.opacity < 1.0:
+            # Opacity adjustment mencampur hasil dengan gambar aslinya
+            result = Image.blend(image, result, self.opacity)
+        return result
+
+
+class LayerGroup(Layer):
+    """
+    Grup berisi layer lain (termasuk grup bersarang) dengan visibilitas,
+    opacity, dan mode blend sendiri. Hasil flatten grup di-cache dan hanya
+    dibuat ulang jika ada turunan yang berubah; perubahan visibilitas,
+    opacity, atau mode blend grup itu sendiri tidak membatalkan cache.
+    """
+
+    def __init__(self, name: str = "Group", children=None):
+        super().__init__(1, 1, name)
+        # Grup tidak memiliki piksel sendiri
+        self.image = None
+        self.draw_context = None
+
+        self.children = []  # Urutan dari bawah ke atas, sama seperti LayerManager.layers
+        self.active_child_index = -1
+        # (PIL Image RGBA terpotong, bbox) hasil flatten terakhir, None jika basi
+        self._cache = None
+        for child in children or []:
+            self.insert(len(self.children), child)
+
+    def insert(self, index: int, layer: Layer):
+        """
+        Menyisipkan layer ke dalam grup pada posisi tertentu.
+        """
+        layer.parent = self
+        self.children.insert(index, layer)
+        self.active_child_index = index
+        self._child_changed(layer.content_bbox)
+
+    def pop(self, index: int) -> Layer:
+        """
+        Mengeluarkan layer dari grup.
+        """
+        layer = self.children.pop(index)
+        layer.parent = None
+        if self.active_child_index >= len(self.children):
+            self.active_child_index = len(self.children) - 1
+        self._child_changed(layer.content_bbox)
+        return layer
+
+    def set_active_child(self, index: int):
+        if 0 <= index < len(self.children):
+            self.active_child_index = index
+
+    def get_active_child(self):
+        if 0 <= self.active_child_index < len(self.children):
+            return self.children[self.active_child_index]
+        return None
+
+    def _child_changed(self, bbox=None):
+        """
+        Dipanggil oleh turunan yang berubah: membatalkan cache dan meneruskan
+        perubahan ke grup induk melalui _bump_revision. Adjustment spasial di
+        dalam grup melebarkan area yang berubah sejauh marginnya; adjustment
+        global membuat seluruh grup berubah.
+        """
+        self._cache = None
+        adjustments = [child for child in self.children
+                       if isinstance(child, AdjustmentLayer) and child.is_visible]
+        if any(child.is_global for child in adjustments):
+            bbox = None
+        if bbox is not None:
+            bbox = _expand_bbox(bbox, sum(child.margin for child in adjustments))
+        self._bump_revision(bbox)
+
+    @property
+    def content_bbox(self):
+        """
+        Gabungan content_bbox semua turunan (konservatif).
+        """
+        if self._cache is not None:
+            return self._cache[1]
+        bbox = None
+        for child in self.children:
+            bbox = union_bbox(bbox, child.content_bbox)
+        return bbox
+
+    @content_bbox.setter
+    def content_bbox(self, value):
+        # Diabaikan: bbox grup selalu diturunkan dari anak-anaknya
+        pass
+
+    @property
+    def flattened(self):
+        """
+        Hasil flatten terakhir (PIL Image terpotong, bbox), atau None jika basi.
+        """
+        return self._cache
+
+
+def _resized_layer_image(layer: Layer, width: int, height: int, offset):
+    """
+    Membuat gambar layer untuk ukuran kanvas baru, dengan isi lama digeser
+    sejauh offset. Hanya area content_bbox yang disalin.
+
+    Returns:
+        tuple: (PIL Image baru, content_bbox baru).
+    """
+    image = allocate_image(width, height, layer.fill_color)
+    bbox = None
+    if ImageColor.getcolor(layer.fill_color, "RGBA")[3] > 0:
+        bbox = (0, 0, width, height)
+    if layer.content_bbox:
+        x1, y1, x2, y2 = layer.content_bbox
+        dx, dy = offset
+        image.paste(layer.image.crop(layer.content_bbox), (x1 + dx, y1 + dy))
+        bbox = union_bbox(bbox, clip_bbox(
+            (x1 + dx, y1 + dy, x2 + dx, y2 + dy), width, height))
+    return image, bbox
+
+
+class CanvasResizeAction(HistoryAction):
+    """
+    Entri undo untuk perubahan ukuran kanvas. Menyimpan referensi gambar
+    lama dan baru setiap layer, sehingga undo/redo cukup menukar referensi.
+    """
+
+    def __init__(self, layer_manager, old_size, new_size, changes):
+        self.layer_manager = layer_manager
+        self.old_size = old_size
+        self.new_size = new_size
+        # [(layer, (gambar lama, bbox lama), (gambar baru, bbox baru))]
+        self.changes = changes
+        self.description = "Ukuran kanvas {}x{}".format(*new_size)
+
+    def _apply(self, size, state_index: int):
+        self.layer_manager.canvas_width, self.layer_manager.canvas_height = size
+        for change in self.changes:
+            image, bbox = change[state_index]
+            change[0].replace_image(image, bbox)
+
+    def undo(self):
+        self._apply(self.old_size, 1)
+
+    def redo(self):
+        self._apply(self.new_size, 2)
+
+    def memory_bytes(self) -> int:
+        # Gambar yang sedang dipakai layer tidak dihitung
+        return sum(image_bytes(image) for change in self.changes
+                   for image, _ in change[1:] if image is not change[0].image)
+
+
+class LayerStackChange(HistoryAction):
+    """
+    Entri undo untuk operasi yang mengganti susunan layer tingkat atas
+    (merge/flatten). Objek layer lama tidak diubah, jadi undo/redo cukup
+    menukar daftar layer.
+    """
+
+    def __init__(self, layer_manager, description: str, old_layers, old_active: int,
+                 new_layers, new_active: int):
+        self.layer_manager = layer_manager
+        self.description = description
+        self.old_state = (list(old_layers), old_active)
+        self.new_state = (list(new_layers), new_active)
+
+    def _apply(self, state):
+        layers, active = state
+        self.layer_manager.layers = list(layers)
+        self.layer_manager.active_layer_index = active
+
+    def undo(self):
+        self._apply(self.old_state)
+
+    def redo(self):
+        self._apply(self.new_state)
+
+    def memory_bytes(self) -> int:
+        # Hanya layer yang tidak ada di susunan saat ini (misal layer sebelum merge)
+        current = set(map(id, self.layer_manager.layers))
+        held = {id(layer): layer for layer in self.old_state[0] + self.new_state[0]
+                if id(layer) not in current}
+        return sum(image_bytes(layer.image) for layer in held.values())
+
+
+class LayerPixelsChange(HistoryAction):
+    """
+    Entri undo untuk edit piksel di tempat (goresan, filter) pada satu layer.
+    Hanya tile yang disentuh yang disalin, sekali, sebelum ditulis (capture).
+    Undo dan redo menukar salinan itu dengan isi layer saat ini, sehingga
+    entri selalu menahan tepat satu salinan tile: keadaan sebelum edit
+    setelah redo, atau hasil edit setelah undo.
+    """
+
+    def __init__(self, layer: Layer, description: str):
+        self.layer = layer
+        self.description = description
+        self.tile_size = AppConfig.TILE_SIZE
+        # tile -> (kotak, PIL Image) keadaan yang sedang tidak tampil di layer
+        self._tiles = {}
+        self._content_bbox = layer.content_bbox
+
+    def capture(self, bbox):
+        """
+        Menyalin tile dalam bbox yang belum disalin. Dipanggil sebelum
+        piksel di dalam bbox ditulis.
+        """
+        image = self.layer.image
+        for tile in _tiles_in_box(bbox, self.tile_size):
+            if tile in self._tiles:
+                continue
+            tx, ty = tile
+            box = clip_bbox((tx * self.tile_size, ty * self.tile_size,
+                             (tx + 1) * self.tile_size, (ty + 1) * self.tile_size),
+                            *image.size)
+            if box:
+                self._tiles[tile] = (box, image.crop(box))
+
+    def finish(self) -> bool:
+        """
+        Menandai edit selesai. Hasil edit tidak disalin; redo mengambilnya
+        dari layer saat undo.
+
+        Returns:
+            False jika tidak ada tile yang disentuh (entri tidak perlu disimpan).
+        """
+        return bool(self._tiles)
+
+    def _swap(self):
+        """
+        Menukar tile yang disimpan dengan isi layer saat ini beserta content_bbox-nya.
+        """
+        layer = self.layer
+        bbox = None
+        for box, _ in self._tiles.values():
+            bbox = union_bbox(bbox, box)
+        layer.prepare_write(bbox)
+        for tile, (box, tile_image) in self._tiles.items():
+            self._tiles[tile] = (box, layer.image.crop(box))
+            layer.image.paste(tile_image, box[:2])
+        content_bbox, self._content_bbox = self._content_bbox, layer.content_bbox
+        layer.mark_dirty(bbox)
+        layer.content_bbox = content_bbox
+
+    def undo(self):
+        self._swap()
+
+    def redo(self):
+        self._swap()
+
+    def memory_bytes(self) -> int:
+        return sum(image_bytes(tile_image) for _, tile_image in self._tiles.values())
+
+
+class AdjustmentParamsChange(HistoryAction):
+    """
+    Entri undo untuk perubahan parameter adjustment layer.
+    Hanya menyimpan parameter lama dan baru, bukan salinan piksel.
+    """
+
+    def __init__(self, layer: AdjustmentLayer, old_params: dict, new_params: dict):
+        self.layer = layer
+        self.old_params = dict(old_params)
+        self.new_params = dict(new_params)
+        self.description = f"Adjustment '{layer.name}'"
+
+    def undo(self):
+        self.layer.params = {}
+        self.layer.set_params(**self.old_params)
+
+    def redo(self):
+        self.layer.params = {}
+        self.layer.set_params(**self.new_params)
 
 
 class LayerManager:
@@ -44,15 +822,31 @@ class LayerManager:
     pengurutan, dan penggabungan.
     """
 
-    def __init__(self, app_instance, canvas_width: int, canvas_height: int):
-        self.app = app_instance
+    def __init__(self, document, canvas_width: int, canvas_height: int,
+                 initial_layer: bool = True):
+        """
+        Args:
+            document: Pemilik LayerManager (core.document.Document), tempat
+                pesan status dan entri undo dikirim.
+            initial_layer (bool): Tambahkan layer latar belakang putih.
+        """
+        self.document = document
         self.layers = []
         self.active_layer_index = -1
         self.canvas_width = canvas_width
         self.canvas_height = canvas_height
+        # Compositor menyimpan buffer akumulasi yang dipakai ulang antar komposit;
+        # dibuat saat komposit pertama (lihat _display_compositor)
+        self._compositor = None
+        # Satu compositor per tingkat kedalaman grup, dipakai bergantian oleh grup
+        self._group_compositors = []
+        # Urutan layer tingkat atas pada komposit terakhir, untuk mendeteksi
+        # penambahan/penghapusan/pengurutan ulang layer
+        self._composited_layer_ids = None
 
-        self._add_initial_layer()
-        print("LayerManager diinisialisasi.")
+        if initial_layer:
+            self._add_initial_layer()
+        log.debug("LayerManager diinisialisasi.")
 
     def _add_initial_layer(self):
         """Menambahkan layer pertama (latar belakang) secara otomatis."""
@@ -60,7 +854,7 @@ class LayerManager:
                               background_color="#FFFFFFFF")  # Latar belakang putih buram
         self.layers.append(initial_layer)
         self.active_layer_index = 0
-        print("Layer 'Background' ditambahkan.")
+        log.debug("Layer 'Background' ditambahkan.")
 
     def add_layer(self, name: str = "New Layer"):
         """
@@ -70,10 +864,199 @@ class LayerManager:
         self.layers.append(new_layer)
         # Set layer baru sebagai aktif
         self.active_layer_index = len(self.layers) - 1
-        print(f"Layer '{name}' ditambahkan. Total layer: {len(self.layers)}")
-        self.app.main_window.update_status(f"Layer '{name}' ditambahkan.")
+        log.info("Layer '%s' ditambahkan. Total layer: %d", name, len(self.layers))
+        self.document.update_status(f"Layer '{name}' ditambahkan.")
         # Pemicu pembaruan UI daftar layer
 
+    def image_to_layer(self, image, name: str) -> Layer:
+        """
+        Membuat layer seukuran dokumen berisi gambar yang diletakkan di tengah.
+        Tidak mengubah LayerManager, sehingga aman dipanggil dari thread pekerja.
+        """
+        image = image if image.mode == "RGBA" else image.convert("RGBA")
+        layer = Layer(self.canvas_width, self.canvas_height, name)
+        x_offset = (layer.image.width - image.width) // 2
+        y_offset = (layer.image.height - image.height) // 2
+        # Gunakan mask untuk transparansi
+        layer.image.paste(image, (x_offset, y_offset), image)
+        layer.mark_dirty(
+            (x_offset, y_offset, x_offset + image.width, y_offset + image.height))
+        return layer
+
+    def add_layers(self, new_layers, description: str):
+        """
+        Menambahkan beberapa layer sekaligus di atas tumpukan sebagai satu
+        entri undo. Layer teratas yang ditambahkan menjadi aktif.
+        """
+        if not new_layers:
+            return
+        old_layers, old_active = list(self.layers), self.active_layer_index
+        self.layers.extend(new_layers)
+        self.active_layer_index = len(self.layers) - 1
+        action = LayerStackChange(self, description, old_layers, old_active,
+                                  self.layers, self.active_layer_index)
+        self.document.add_history_entry(action)
+        log.info("%s. Total layer: %d", description, len(self.layers))
+        self.document.update_status(f"{description}.")
+
+    def add_adjustment_layer(self, kind: str, name: str = None, **params):
+        """
+        Menambahkan adjustment layer non-destruktif di atas layer aktif.
+
+        Args:
+            kind (str): Jenis filter (lihat features.filters.FILTER_NAMES).
+            name (str, optional): Nama layer, default nama filter.
+            **params: Parameter filter (misal: factor, radius).
+        """
+        try:
+            new_layer = AdjustmentLayer(kind, name, **params)
+        except ValueError as e:
+            log.warning("%s", e)
+            self.document.update_status(str(e))
+            return None
+        insert_index = self.active_layer_index + 1 if self.layers else 0
+        self.layers.insert(insert_index, new_layer)
+        self.active_layer_index = insert_index
+        log.info("Adjustment layer '%s' ditambahkan. Total layer: %d",
+                 new_layer.name, len(self.layers))
+        self.document.update_status(
+            f"Adjustment '{new_layer.name}' ditambahkan.")
+        return new_layer
+
+    def set_adjustment_params(self, layer: AdjustmentLayer, **params):
+        """
+        Mengubah parameter adjustment layer. Undo untuk operasi ini hanya
+        berupa perubahan parameter, bukan salinan piksel.
+        """
+        if not isinstance(layer, AdjustmentLayer):
+            log.warning("Layer '%s' bukan adjustment layer.", layer.name)
+            return
+        old_params = dict(layer.params)
+        layer.set_params(**params)
+        self.document.add_history_entry(
+            AdjustmentParamsChange(layer, old_params, layer.params))
+        log.info("Parameter adjustment '%s' diubah: %s", layer.name, layer.params)
+        self.document.update_status(
+            f"Adjustment '{layer.name}' diperbarui.")
+
+    def group_layers(self, indices, name: str = "Group"):
+        """
+        Memindahkan layer tingkat atas pada indeks tertentu ke dalam grup baru.
+        Grup ditempatkan di posisi layer teratas yang dikelompokkan.
+        """
+        indices = sorted(set(i for i in indices if 0 <= i < len(self.layers)))
+        if not indices:
+            log.warning("Tidak ada layer valid untuk dikelompokkan.")
+            return None
+        children = [self.layers[i] for i in indices]
+        for i in reversed(indices):
+            self.layers.pop(i)
+        group = LayerGroup(name, children)
+        insert_index = indices[-1] - (len(indices) - 1)
+        self.layers.insert(insert_index, group)
+        self.active_layer_index = insert_index
+        log.info("Grup '%s' dibuat dengan %d layer.", name, len(children))
+        self.document.update_status(f"Grup '{name}' dibuat.")
+        return group
+
+    def ungroup(self, index: int):
+        """
+        Mengeluarkan semua anak grup pada indeks tertentu ke tingkat atas.
+        """
+        if not (0 <= index < len(self.layers)) or not isinstance(self.layers[index], LayerGroup):
+            log.warning("Layer %d bukan grup.", index)
+            return
+        group = self.layers.pop(index)
+        children = [group.pop(0) for _ in range(len(group.children))]
+        self.layers[index:index] = children
+        self.active_layer_index = index + len(children) - 1
+        log.info("Grup '%s' dibubarkan.", group.name)
+        self.document.update_status(f"Grup '{group.name}' dibubarkan.")
+
+    def all_layers(self, layers=None):
+        """
+        Menghasilkan semua layer, termasuk isi grup (urutan bawah ke atas).
+        """
+        for layer in self.layers if layers is None else layers:
+            yield layer
+            if isinstance(layer, LayerGroup):
+                yield from self.all_layers(layer.children)
+
+    def resize_canvas(self, width: int, height: int):
+        """
+        Mengubah ukuran dokumen (semua layer) dengan jangkar di tengah.
+
+        Gambar baru setiap layer dibuat paralel di thread pool (Pillow melepas
+        GIL saat menyalin piksel), lalu dipasang di thread utama.
+
+        Returns:
+            CanvasResizeAction yang dicatat di riwayat undo, atau None jika
+            ukuran tidak berubah.
+        """
+        old_size = (self.canvas_width, self.canvas_height)
+        if (width, height) == old_size or width < 1 or height < 1:
+            return None
+
+        if self.refuse_while_decoding():
+            return None
+        from concurrent.futures import ThreadPoolExecutor
+        offset = ((width - old_size[0]) // 2, (height - old_size[1]) // 2)
+        self.ensure_loaded()
+        layers = [layer for layer in self.all_layers() if layer.image]
+        with ThreadPoolExecutor(max_workers=AppConfig.WORKER_THREADS) as executor:
+            results = list(executor.map(
+                lambda layer: _resized_layer_image(layer, width, height, offset), layers))
+
+        changes = [(layer, (layer.image, layer.content_bbox), result)
+                   for layer, result in zip(layers, results)]
+        action = CanvasResizeAction(self, old_size, (width, height), changes)
+        action.redo()
+        self.document.add_history_entry(action)
+        log.info("Ukuran kanvas diubah dari %s ke %s.", old_size, (width, height))
+        self.document.update_status(
+            f"Ukuran kanvas: {width}x{height}.")
+        return action
+
+    def refuse_while_decoding(self, layers=None) -> bool:
+        """
+        Memeriksa apakah ada layer (default semua, termasuk isi grup) yang
+        masih didekode di latar belakang. Operasi yang mengedit atau membaca
+        seluruh piksel layer itu ditolak dengan pesan status, bukan menunggu
+        dekode selesai di thread UI.
+
+        Returns:
+            True jika operasi harus dibatalkan.
+        """
+        layer = next((layer for layer in self.all_layers(layers) if layer.decoding), None)
+        if layer is None:
+            return False
+        log.info("Operasi ditunda: layer '%s' masih didekode.", layer.name)
+        self.document.update_status(
+            f"Layer '{layer.name}' masih didekode; coba lagi setelah selesai.")
+        return True
+
+    def ensure_loaded(self, box=None) -> bool:
+        """
+        Mendekode tile yang belum dimuat di semua layer (lihat Layer.ensure_loaded).
+
+        Returns:
+            True jika ada tile yang baru dimuat.
+        """
+        loaded = False
+        for layer in self.all_layers():
+            if layer.image is not None and layer.ensure_loaded(box):
+                loaded = True
+        return loaded
+
+    def load_document(self, width: int, height: int, layers, active_layer_index: int):
+        """
+        Mengganti seluruh dokumen dengan layer yang sudah dibuat (misal dari file proyek).
+        """
+        self.canvas_width, self.canvas_height = width, height
+        self.layers = list(layers)
+        self.active_layer_index = min(active_layer_index, len(self.layers) - 1)
+        log.info("Dokumen %dx%d dengan %d layer dimuat.", width, height, len(self.layers))
+
     def remove_layer(self, index: int):
         """
         Menghapus lapisan pada indeks tertentu.
@@ -81,22 +1064,22 @@ class LayerManager:
         if 0 <= index < len(self.layers):
             if len(self.layers) > 1:  # Pastikan selalu ada setidaknya satu layer
                 removed_layer = self.layers.pop(index)
-                print(f"Layer '{removed_layer.name}' dihapus.")
+                log.info("Layer '%s' dihapus.", removed_layer.name)
                 # Sesuaikan active_layer_index jika layer aktif dihapus
                 if self.active_layer_index >= len(self.layers):
                     self.active_layer_index = len(self.layers) - 1
                 elif self.active_layer_index > index:
                     self.active_layer_index -= 1
 
-                self.app.main_window.update_status(
+                self.document.update_status(
                     f"Layer '{removed_layer.name}' dihapus.")
                 # Pemicu pembaruan UI daftar layer
             else:
-                print("Tidak dapat menghapus layer terakhir.")
-                self.app.main_window.update_status(
+                log.warning("Tidak dapat menghapus layer terakhir.")
+                self.document.update_status(
                     "Tidak dapat menghapus layer terakhir.")
         else:
-            print(f"Indeks layer {index} tidak valid untuk dihapus.")
+            log.warning("Indeks layer %d tidak valid untuk dihapus.", index)
 
     def set_active_layer(self, index: int):
         """
@@ -104,8 +1087,8 @@ class LayerManager:
         """
         if 0 <= index < len(self.layers):
             self.active_layer_index = index
-            print(f"Layer aktif diatur ke: {self.layers[index].name}")
-            self.app.main_window.update_status(
+            log.debug("Layer aktif diatur ke: %s", self.layers[index].name)
+            self.document.update_status(
                 f"Layer aktif: {self.layers[index].name}")
             # Pemicu pembaruan UI daftar layer
 
@@ -114,7 +1097,11 @@ class LayerManager:
         Mengembalikan objek lapisan aktif.
         """
         if self.layers and 0 <= self.active_layer_index < len(self.layers):
-            return self.layers[self.active_layer_index]
+            layer = self.layers[self.active_layer_index]
+            # Turun ke anak aktif jika layer aktif adalah grup
+            while isinstance(layer, LayerGroup) and layer.get_active_child():
+                layer = layer.get_active_child()
+            return layer
         return None
 
     def merge_layers(self, layer_index_top: int, layer_index_bottom: int):
@@ -122,11 +1109,11 @@ class LayerManager:
         Menggabungkan layer_index_top ke layer_index_bottom.
         """
         if not (0 <= layer_index_top < len(self.layers) and 0 <= layer_index_bottom < len(self.layers)):
-            print("Indeks layer tidak valid untuk penggabungan.")
+            log.warning("Indeks layer tidak valid untuk penggabungan.")
             return
 
         if layer_index_top == layer_index_bottom:
-            print("Tidak bisa menggabungkan layer ke dirinya sendiri.")
+            log.warning("Tidak bisa menggabungkan layer ke dirinya sendiri.")
             return
 
         # Pastikan layer_index_top di atas layer_index_bottom
@@ -137,49 +1124,386 @@ class LayerManager:
         bottom_layer = self.layers[layer_index_bottom]
 
         if not top_layer.is_visible:
-            print(
-                f"Layer {top_layer.name} tidak terlihat, tidak akan digabungkan.")
+            log.warning("Layer %s tidak terlihat, tidak akan digabungkan.", top_layer.name)
             return
 
+        return self._merge([layer_index_bottom, layer_index_top], bottom_layer.name,
+                           f"Layer digabungkan: {top_layer.name} -> {bottom_layer.name}")
+
+    def merge_down(self, index: int = None):
+        """
+        Menggabungkan layer (default: layer aktif) dengan layer tepat di bawahnya.
+        """
+        if index is None:
+            index = self.active_layer_index
+        if not 1 <= index < len(self.layers):
+            log.warning("Tidak ada layer di bawah untuk digabungkan.")
+            self.document.update_status(
+                "Tidak ada layer di bawah untuk digabungkan.")
+            return None
+        return self.merge_layers(index, index - 1)
+
+    def merge_visible(self):
+        """
+        Menggabungkan semua layer tingkat atas yang terlihat menjadi satu layer,
+        di posisi layer terlihat paling bawah. Layer tersembunyi tetap ada.
+        """
+        indices = [i for i, layer in enumerate(self.layers) if layer.is_visible]
+        if len(indices) < 2:
+            log.warning("Perlu setidaknya dua layer terlihat untuk digabungkan.")
+            self.document.update_status(
+                "Perlu setidaknya dua layer terlihat untuk digabungkan.")
+            return None
+        return self._merge(indices, self.layers[indices[0]].name,
+                           f"{len(indices)} layer terlihat digabungkan")
+
+    def flatten(self):
+        """
+        Meratakan seluruh dokumen menjadi satu layer. Layer tersembunyi dibuang.
+        """
+        return self._merge(list(range(len(self.layers))), "Background",
+                           f"{len(self.layers)} layer diratakan")
+
+    def _merge(self, indices, name: str, description: str):
+        """
+        Mengomposit layer tingkat atas pada indeks tertentu dalam satu lintasan
+        ke layer baru yang menggantikan semuanya, di posisi indeks terendah.
+        Layer asli tidak diubah sehingga undo cukup mengembalikan daftar layer.
+
+        Returns:
+            Layer hasil penggabungan, atau None jika gagal.
+        """
+        indices = sorted(indices)
+        if self.refuse_while_decoding([self.layers[i] for i in indices]):
+            return None
         try:
-            # Komposit top_layer ke bottom_layer
-            # Alpha_composite digunakan untuk menangani transparansi
-            bottom_layer.image.alpha_composite(top_layer.image)
-
-            # Hapus layer atas setelah digabungkan
-            self.remove_layer(layer_index_top)
-            print(
-                f"Layer '{top_layer.name}' digabungkan ke '{bottom_layer.name}'.")
-            self.app.main_window.update_status(
-                f"Layer digabungkan: {top_layer.name} -> {bottom_layer.name}.")
-            # Pemicu pembaruan UI daftar layer
+            merged = self._render_layers([self.layers[i] for i in indices], name)
         except Exception as e:  # Tangani semua Exception, termasuk ImportError jika PIL belum diimpor
-            print(
-                f"Error saat menggabungkan layer: {e}. Pastikan Pillow (PIL) terinstal.")
+            log.error("Error saat menggabungkan layer: %s. Pastikan Pillow (PIL) terinstal.", e)
+            return None
+
+        removed = set(indices)
+        new_layers = [layer for i, layer in enumerate(self.layers) if i not in removed]
+        new_layers.insert(indices[0], merged)
+        action = LayerStackChange(self, description, self.layers, self.active_layer_index,
+                                  new_layers, indices[0])
+        action.redo()
+        self.document.add_history_entry(action)
+        log.info("%s.", description)
+        self.document.update_status(f"{description}.")
+        # Pemicu pembaruan UI daftar layer
+        return merged
+
+    def _render_layers(self, layers, name: str) -> Layer:
+        """
+        Mengomposit daftar layer (bawah ke atas) ke layer baru berukuran dokumen,
+        dengan memperhitungkan opacity, mode blend, grup, dan adjustment.
+        """
+        for layer in self.all_layers(layers):
+            if layer.image is not None:
+                layer.ensure_loaded()
+        merged = Layer(self.canvas_width, self.canvas_height, name)
+        if load_numpy() is None:
+            image = self._composite_layers_pillow(layers)
+            merged.replace_image(image, image.getbbox())
+            return merged
+
+        # Compositor terpisah agar buffer komposit tampilan tetap utuh
+        compositor = Compositor()
+        compositor.begin(self.canvas_width, self.canvas_height)
+        self._composite_layers(compositor, layers, 0)
+        bbox = compositor.touched_bbox
+        if bbox:
+            merged.image.paste(compositor.to_image(bbox), bbox[:2])
+        merged.replace_image(merged.image, bbox)
+        return merged
 
+    @traced("composite", "layers")
     def get_composite_image(self):
         """
-        Menggabungkan semua lapisan yang terlihat menjadi satu gambar komposit.
+        Menggabungkan semua lapisan yang terlihat menjadi satu gambar komposit,
+        dengan memperhitungkan opacity dan mode blend setiap layer.
+
+        Gambar yang dikembalikan berbagi memori dengan buffer compositor dan
+        akan berubah pada pemanggilan berikutnya; gunakan copy() untuk menyimpannya.
         """
         try:
-            # from PIL import Image # Impor sudah di atas
             if not self.layers:
                 return None
+            if self._display_compositor() is None:
+                _composite_cache.misses += 1
+                return self._composite_layers_pillow(self.layers).convert("RGB")
 
-            # Mulai dengan gambar kosong transparan
-            composite_image = Image.new(
-                "RGBA", (self.canvas_width, self.canvas_height), (0, 0, 0, 0))
-
-            for layer in self.layers:
-                if layer.is_visible and layer.image:
-                    # Gabungkan layer ke gambar komposit
-                    # PIL's alpha_composite handles opacity if images are RGBA
-                    composite_image = Image.alpha_composite(
-                        composite_image, layer.image)
-
-            # Konversi kembali ke RGB untuk kanvas Tkinter jika diperlukan
-            return composite_image.convert("RGB")
+            damage = self._collect_damage()
+            if damage is FULL_BBOX:
+                self._compositor.begin(self.canvas_width, self.canvas_height)
+                self._composite_layers(self._compositor, self.layers, 0)
+            elif damage is not None:
+                self._composite_damage(damage)
+            if damage is FULL_BBOX:
+                _composite_cache.misses += 1
+            else:
+                _composite_cache.hits += 1
+            # Hasil berbagi memori dengan buffer output compositor (tanpa salinan)
+            return self._compositor.flatten()
         except Exception as e:  # Tangani semua Exception, termasuk ImportError jika PIL belum diimpor
-            print(
-                f"Error saat membuat gambar komposit: {e}. Pastikan Pillow (PIL) terinstal.")
+            log.error("Error saat membuat gambar komposit: %s. Pastikan Pillow (PIL) terinstal.", e)
             return None
+
+    def _display_compositor(self):
+        """
+        Compositor untuk komposit tampilan. Dibuat (dan NumPy diimpor) saat
+        komposit pertama, bukan saat startup; None jika NumPy tidak terinstal.
+        """
+        if self._compositor is None and load_numpy() is not None:
+            self._compositor = Compositor()
+        return self._compositor
+
+    def _collect_damage(self):
+        """
+        Menentukan area dokumen yang harus dikomposit ulang.
+
+        Returns:
+            None jika tidak ada yang berubah, FULL_BBOX jika seluruh dokumen harus
+            dikomposit ulang, atau kotak (x1, y1, x2, y2) area yang berubah.
+        """
+        damage = None
+        for layer in self.layers:
+            damage = union_bbox(damage, layer.take_damage())
+
+        layer_ids = [layer.uid for layer in self.layers]
+        if (layer_ids != self._composited_layer_ids
+                or self._compositor.size != (self.canvas_width, self.canvas_height)):
+            # Susunan layer atau ukuran berubah
+            self._composited_layer_ids = layer_ids
+            return FULL_BBOX
+        if damage is None or damage == FULL_BBOX:
+            return None if damage is None else FULL_BBOX
+        return clip_bbox(damage, self.canvas_width, self.canvas_height)
+
+    def _composite_damage(self, damage):
+        """
+        Mengkomposit ulang hanya area yang berubah. Adjustment per-piksel
+        meneruskan area itu apa adanya. Adjustment spasial (misal blur)
+        menyebarkan perubahan sejauh marginnya, dan juga membaca piksel sejauh
+        margin di sekitarnya. Karena itu area dikomposit ulang dengan lebar
+        dua kali total margin, lalu cincin di luar area yang benar-benar
+        berubah dikembalikan ke isi komposit sebelumnya. Adjustment global
+        (misal contrast) membutuhkan seluruh gambar di bawahnya, sehingga
+        dokumen dikomposit ulang seluruhnya; tile yang statistik dan sumbernya
+        tidak berubah tetap diambil dari cache adjustment.
+        """
+        compositor = self._compositor
+        size = (self.canvas_width, self.canvas_height)
+        adjustments = [layer for layer in self.layers
+                       if isinstance(layer, AdjustmentLayer) and layer.is_visible]
+        if any(layer.is_global for layer in adjustments):
+            compositor.begin(*size)
+            self._composite_layers(compositor, self.layers, 0)
+            return
+        spread = sum(layer.margin for layer in adjustments)
+        changed = clip_bbox(_expand_bbox(damage, spread), *size)
+        region = clip_bbox(_expand_bbox(damage, 2 * spread), *size)
+        saved = compositor.read_region(region) if spread else None
+        compositor.begin(*size, region)
+        self._composite_layers(compositor, self.layers, 0)
+        if saved is not None:
+            compositor.restore_region(saved, region, changed)
+
+    def _composite_layers(self, compositor, layers, depth: int):
+        """
+        Memadukan daftar layer (bawah ke atas) ke compositor yang sudah disiapkan.
+        """
+        region = compositor.clip
+        valid_box = region  # Bagian region yang masih benar setelah adjustment spasial
+        for index, layer in enumerate(layers):
+            if not layer.is_visible:
+                continue
+            if isinstance(layer, AdjustmentLayer) and region is not None:
+                # Hanya area yang dikomposit ulang yang diadjust
+                size = (self.canvas_width, self.canvas_height)
+                adjusted = layer.apply_to(
+                    compositor.to_image(region), layers[:index], region, size, valid_box)
+                compositor.load_image(adjusted, region[:2])
+                valid_box = _shrink_bbox(valid_box, layer.margin, *size)
+            elif isinstance(layer, AdjustmentLayer):
+                # Adjustment diterapkan ke semua yang ada di bawahnya
+                adjusted = layer.apply_to(
+                    compositor.to_image(), layers[:index])
+                compositor.load_image(adjusted)
+            elif isinstance(layer, LayerGroup):
+                image, bbox = self._flatten_group(layer, depth + 1)
+                if bbox:
+                    compositor.blend_layer(image, layer.opacity, layer.blend_mode,
+                                           bbox, offset=bbox[:2])
+            elif layer.image and layer.content_bbox:
+                # Layer kosong dilewati; layer lain hanya diproses di dalam content_bbox
+                compositor.blend_layer(
+                    layer.image, layer.opacity, layer.blend_mode, layer.content_bbox)
+
+    def _flatten_group(self, group: LayerGroup, depth: int):
+        """
+        Mengembalikan hasil flatten grup (gambar terpotong, bbox), memakai cache
+        jika tidak ada turunan yang berubah sejak flatten terakhir.
+        """
+        if group._cache is None:
+            while len(self._group_compositors) < depth:
+                self._group_compositors.append(Compositor())
+            compositor = self._group_compositors[depth - 1]
+            compositor.begin(self.canvas_width, self.canvas_height)
+            self._composite_layers(compositor, group.children, depth)
+            bbox = compositor.touched_bbox
+            group._cache = (compositor.to_image(bbox) if bbox else None, bbox)
+            log.debug("Grup '%s' di-flatten ulang.", group.name)
+            _group_cache.misses += 1
+        else:
+            _group_cache.hits += 1
+        return group._cache
+
+    def _composite_layers_pillow(self, layers):
+        """
+        Jalur komposit cadangan tanpa NumPy: hanya mode 'normal' dengan opacity.
+        Grup dikomposit ulang setiap kali (tanpa cache).
+        """
+        # Mulai dengan gambar kosong transparan
+        composite_image = Image.new(
+            "RGBA", (self.canvas_width, self.canvas_height), (0, 0, 0, 0))
+
+        for index, layer in enumerate(layers):
+            if not layer.is_visible:
+                continue
+            if isinstance(layer, AdjustmentLayer):
+                composite_image = layer.apply_to(
+                    composite_image, layers[:index])
+                continue
+            if isinstance(layer, LayerGroup):
+                layer_image = self._composite_layers_pillow(layer.children)
+            elif layer.image and layer.content_bbox:
+                layer_image = layer.image
+            else:
+                continue
+            if layer.opacity < 1.0:
+                layer_image = layer_image.copy()
+                layer_image.putalpha(layer_image.getchannel("A").point(
+                    lambda a: int(a * layer.opacity)))
+            composite_image = Image.alpha_composite(
+                composite_image, layer_image)
+
+        return composite_image
+
+
+class _SnapshotTileSource:
+    """
+    Tile layer beku milik CompositeSnapshot: TileSnapshot untuk tile yang
+    sudah dimuat, atau (arsip proyek, nama entri) untuk tile yang belum didekode.
+    """
+
+    def __init__(self, entries: dict, tile_size: int):
+        self.entries = entries
+        self.tile_size = tile_size
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def load_into(self, image, box=None):
+        if box is None:
+            tiles = list(self.entries)
+        else:
+            tiles = [tile for tile in _tiles_in_box(box, self.tile_size)
+                     if tile in self.entries]
+        region = None
+        for tile in tiles:
+            source = self.entries.pop(tile)
+            if isinstance(source, TileSnapshot):
+                tile_image = source.take(tile)
+            else:
+                archive, name = source
+                with archive.open(name) as data:
+                    tile_image = Image.open(data)
+                    tile_image.load()
+            if tile_image is None:
+                continue
+            tx, ty = tile
+            x, y = tx * self.tile_size, ty * self.tile_size
+            image.paste(tile_image.convert("RGBA"), (x, y))
+            region = union_bbox(region, clip_bbox(
+                (x, y, x + tile_image.width, y + tile_image.height), *image.size))
+        return region
+
+
+class CompositeSnapshot:
+    """
+    Salinan beku susunan layer untuk mengomposit dokumen di thread pekerja
+    (misal ekspor gambar datar).
+
+    Dibuat di thread UI tanpa menyalin atau mendekode piksel: tile yang sudah
+    dimuat dirujuk lewat TileSnapshot copy-on-write, dan tile proyek yang
+    belum didekode lewat entri arsipnya. render() lalu memuat tile dan
+    mengomposit di thread pekerja dengan compositor sendiri, sehingga layer
+    asli, cache grup, dan cache adjustment tidak disentuh. Layer yang masih
+    didekode (Layer.decoding) harus ditolak lebih dulu oleh pemanggil.
+    """
+
+    def __init__(self, layer_manager):
+        self.width = layer_manager.canvas_width
+        self.height = layer_manager.canvas_height
+        self._tile_snapshots = []
+        self.layers = [self._freeze(layer) for layer in layer_manager.layers]
+
+    def _freeze(self, layer: Layer) -> Layer:
+        if isinstance(layer, LayerGroup):
+            frozen = LayerGroup(layer.name, [self._freeze(child) for child in layer.children])
+        elif isinstance(layer, AdjustmentLayer):
+            frozen = AdjustmentLayer(layer.kind, layer.name, **layer.params)
+        else:
+            tile_size = AppConfig.TILE_SIZE
+            source = layer.tile_source
+            entries = {tile: (source.archive, name)
+                       for tile, name in source.entries.items()} if source else {}
+            loaded = [tile for tile in _tiles_in_box(layer.content_bbox, tile_size)
+                      if tile not in entries] if layer.content_bbox else []
+            if loaded:
+                snapshot = layer.snapshot_tiles(loaded)
+                self._tile_snapshots.append(snapshot)
+                entries.update((tile, snapshot) for tile in loaded)
+            frozen = Layer(1, 1, layer.name)
+            frozen.fill_color = layer.fill_color
+            # Gambar seukuran dokumen baru dialokasikan di render(); layer
+            # kosong tetap tanpa gambar dan dilewati saat komposit
+            frozen.image = frozen.draw_context = None
+            if entries:
+                frozen.tile_source = _SnapshotTileSource(entries, tile_size)
+        frozen.is_visible = layer.is_visible
+        frozen.opacity = layer.opacity
+        frozen.blend_mode = layer.blend_mode
+        return frozen
+
+    def release(self):
+        """
+        Melepas tile snapshot (render selesai, gagal, atau tidak jadi dijalankan).
+        """
+        for snapshot in self._tile_snapshots:
+            snapshot.release()
+
+    @traced("render_snapshot", "layers")
+    def render(self):
+        """
+        Thread pekerja: memuat tile dan mengembalikan komposit (PIL Image RGBA,
+        alpha 255), sama seperti LayerManager.get_composite_image().
+        """
+        try:
+            manager = LayerManager(None, self.width, self.height, initial_layer=False)
+            for layer in manager.all_layers(self.layers):
+                source = layer.tile_source
+                if isinstance(source, _SnapshotTileSource):
+                    layer.replace_image(allocate_image(self.width, self.height), None)
+                    layer.tile_source = source
+                    layer.ensure_loaded()
+            if load_numpy() is None:
+                return manager._composite_layers_pillow(self.layers).convert("RGB")
+            compositor = Compositor()
+            compositor.begin(self.width, self.height)
+            manager._composite_layers(compositor, self.layers, 0)
+            return compositor.flatten()
+        finally:
+            self.release()
@@ -0,0 +1,121 @@
+# features/layer_storage.py
+
+import atexit
+import mmap
+import os
+import tempfile
+
+from PIL import Image, ImageColor
+
+from config import AppConfig
+
+# NumPy opsional dan baru diimpor saat pertama dibutuhkan (lihat load_numpy);
+# tanpanya pixel_view() selalu mengembalikan None
+np = None
+_numpy_checked = False
+
+# File scratch yang tidak bisa dihapus selagi dipetakan (Windows)
+_leftover_files = []
+
+
+def load_numpy():
+    """
+    Mengimpor NumPy saat pertama dibutuhkan. Impornya memakan puluhan
+    milidetik, jadi ditunda dari startup ke komposit pertama.
+
+    Returns:
+        Modul numpy, atau None jika tidak terinstal.
+    """
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+
+def _use_file_storage(nbytes: int) -> bool:
+    storage = AppConfig.LAYER_STORAGE
+    return storage == "file" or (
+        storage == "auto" and nbytes >= AppConfig.FILE_STORAGE_MIN_BYTES)
+
+
+def _file_buffer(nbytes: int):
+    """
+    Memetakan file scratch sparse di SCRATCH_DIR. Halaman yang jarang dipakai
+    dapat dikeluarkan OS ke file ini, bukan ke swap, sehingga dokumen boleh
+    lebih besar dari RAM.
+    """
+    os.makedirs(AppConfig.SCRATCH_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(
+        prefix="layer-", suffix=".raw", dir=AppConfig.SCRATCH_DIR)
+    try:
+        os.ftruncate(fd, nbytes)  # Sparse: ruang disk baru dipakai saat ditulis
+        buffer = mmap.mmap(fd, nbytes)
+    finally:
+        os.close(fd)
+    try:
+        os.remove(path)  # POSIX: isi tetap ada sampai pemetaan ditutup
+    except OSError:
+        _leftover_files.append(path)
+    return buffer
+
+
+def allocate_image(width: int, height: int, color=None):
+    """
+    Membuat gambar RGBA yang pikselnya berada di memory map, bukan di heap.
+
+    Dokumen kecil memakai mmap anonim (tanpa biaya inisialisasi: halaman baru
+    disediakan OS saat pertama disentuh); di atas FILE_STORAGE_MIN_BYTES
+    dipakai file scratch (lihat _file_buffer). Pillow dan NumPy (pixel_view)
+    membaca dan menulis buffer yang sama tanpa salinan.
+
+    Args:
+        color (optional): Warna isi awal; None atau transparan = tidak diisi.
+    """
+    nbytes = max(1, width * height * 4)
+    if _use_file_storage(nbytes):
+        buffer = _file_buffer(nbytes)
+    else:
+        buffer = mmap.mmap(-1, nbytes)
+    image = Image.frombuffer("RGBA", (width, height),
+                             buffer, "raw", "RGBA", 0, 1)
+    image.readonly = 0  # Buffer milik kita sendiri; boleh ditulis langsung
+    # Buffer dicatat bersama objek core-nya; operasi yang mengganti core
+    # (bukan menulis di tempat) membuat catatan ini tidak berlaku lagi
+    image._storage = (buffer, image.im)
+    if color is not None:
+        rgba = ImageColor.getcolor(color, "RGBA") if isinstance(color, str) else color
+        if rgba[3] > 0:
+            image.paste(rgba, (0, 0, width, height))
+    return image
+
+
+def blank_image(width: int, height: int):
+    """
+    Membuat gambar RGBA transparan tanpa biaya inisialisasi.
+    """
+    return allocate_image(width, height)
+
+
+def pixel_view(image):
+    """
+    Mengembalikan array NumPy (tinggi, lebar, 4) yang berbagi memori dengan
+    gambar dari allocate_image(), atau None jika gambar tidak dipetakan.
+    """
+    storage = getattr(image, "_storage", None)
+    if storage is None or storage[1] is not image.im or load_numpy() is None:
+        return None
+    return np.frombuffer(storage[0], np.uint8).reshape(image.height, image.width, 4)
+
+
+@atexit.register
+def _remove_leftover_files():
+    for path in _leftover_files:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,489 @@
+# features/project_file.py
+
+import io
+import json
+import os
+import re
+import zipfile
+
+from PIL import Image
+
+from config import AppConfig
+from features.layer_manager import (
+    Layer, AdjustmentLayer, LayerGroup, TileSnapshot, _tiles_in_box)
+from features.layer_storage import blank_image
+from utils.log import get_logger
+from utils.tracing import traced
+
+log = get_logger("project")
+
+# Ekstensi dan versi format proyek berlapis
+PROJECT_EXTENSION = ".mpaint"
+PROJECT_FORMAT = "mini-paint-project"
+PROJECT_VERSION = 2
+# Versi 1 hanya memiliki manifest.json; versi 2 menambahkan manifest per
+# generasi simpan (manifest-000001.json, ...) dan yang terbaru berlaku
+MANIFEST_NAME = "manifest.json"
+MANIFEST_PATTERN = re.compile(r"^manifest-(\d+)\.json$")
+
+
+def is_project_file(file_path: str) -> bool:
+    return file_path.lower().endswith(PROJECT_EXTENSION)
+
+
+class ArchiveTileSource:
+    """
+    Tile layer yang belum didekode dari arsip proyek.
+
+    Dipasang sebagai Layer.tile_source saat proyek dibuka; Layer.ensure_loaded()
+    memanggil load_into() untuk mendekode tile yang dibutuhkan saja.
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, entries: dict, tile_size: int):
+        self.archive = archive
+        self.entries = dict(entries)  # (tx, ty) -> nama entri di arsip
+        self.tile_size = tile_size
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def tile_box(self, tile):
+        tx, ty = tile
+        size = self.tile_size
+        return (tx * size, ty * size, (tx + 1) * size, (ty + 1) * size)
+
+    def read_raw(self, tile) -> bytes:
+        """
+        Mengembalikan data PNG tile apa adanya (tanpa dekode).
+        """
+        return self.archive.read(self.entries[tile])
+
+    @traced("load_tiles", "project")
+    def load_into(self, image, box=None):
+        """
+        Mendekode tile yang beririsan dengan box (semua jika None) ke image.
+
+        Returns:
+            Gabungan kotak tile yang dimuat, atau None jika tidak ada.
+        """
+        if box is None:
+            tiles = list(self.entries)
+        else:
+            tiles = [tile for tile in _tiles_in_box(box, self.tile_size)
+                     if tile in self.entries]
+        region = None
+        for tile in tiles:
+            x1, y1, x2, y2 = self.tile_box(tile)
+            with self.archive.open(self.entries.pop(tile)) as data:
+                tile_image = Image.open(data)
+                tile_image.load()
+            image.paste(tile_image.convert("RGBA"), (x1, y1))
+            x2, y2 = min(x2, image.width), min(y2, image.height)
+            region = (x1, y1, x2, y2) if region is None else (
+                min(region[0], x1), min(region[1], y1),
+                max(region[2], x2), max(region[3], y2))
+        return region
+
+
+def _encode_tile(tile_image) -> bytes:
+    output = io.BytesIO()
+    tile_image.save(output, "PNG",
+                    compress_level=AppConfig.PROJECT_PNG_COMPRESS_LEVEL)
+    return output.getvalue()
+
+
+def _bbox_of_tiles(tiles, tile_size: int):
+    bbox = None
+    for tx, ty in tiles:
+        box = (tx * tile_size, ty * tile_size,
+               (tx + 1) * tile_size, (ty + 1) * tile_size)
+        bbox = box if bbox is None else (
+            min(bbox[0], box[0]), min(bbox[1], box[1]),
+            max(bbox[2], box[2]), max(bbox[3], box[3]))
+    return bbox
+
+
+class ProjectFile:
+    """
+    File proyek berlapis (.mpaint) yang sedang dibuka.
+
+    File proyek adalah arsip zip berisi manifest JSON (ukuran dokumen, pohon
+    layer dan metadatanya, serta indeks tile) dan satu PNG per tile yang tidak
+    kosong. Tile sudah terkompresi sehingga disimpan tanpa kompresi zip.
+
+    Penyimpanan bersifat inkremental: ProjectFile mengingat revisi edit setiap
+    layer saat terakhir disimpan, sehingga hanya tile yang diedit sejak itu
+    yang dikodekan dan ditambahkan ke akhir arsip, diikuti manifest generasi
+    baru. Tile lama yang sudah tidak dirujuk menjadi sampah; jika porsinya
+    melebihi PROJECT_COMPACT_RATIO, arsip ditulis ulang utuh (compaction) ke
+    file sementara lalu diganti secara atomik.
+
+    Secara default ProjectFile mengambil alih tile layer yang belum didekode:
+    setelah disimpan, tile tersebut dibaca dari arsipnya. Dengan
+    adopt_tiles=False (misal autosave), sumber tile layer tidak diubah.
+    """
+
+    def __init__(self, path: str, adopt_tiles: bool = True):
+        self.path = path
+        self.adopt_tiles = adopt_tiles
+        self.generation = 0
+        self._archive = None  # ZipFile baca untuk tile yang belum didekode
+        # id(layer) -> (layer, edit_revision saat disimpan, {tile: nama entri})
+        self._records = {}
+
+    @classmethod
+    @traced("open_project", "project")
+    def open(cls, path: str):
+        """
+        Membaca manifest terbaru dan membuat layer-layernya tanpa mendekode
+        tile apa pun; tile didekode saat dibutuhkan (lihat Layer.ensure_loaded).
+
+        Returns:
+            tuple: (ProjectFile, lebar, tinggi, daftar layer, indeks layer aktif).
+        """
+        project = cls(path)
+        project._archive = zipfile.ZipFile(path, "r")
+        try:
+            name, project.generation = project._latest_manifest()
+            manifest = json.loads(project._archive.read(name))
+            if manifest.get("format") != PROJECT_FORMAT:
+                raise ValueError(f"'{path}' bukan file proyek yang valid.")
+            if manifest.get("version", 0) > PROJECT_VERSION:
+                raise ValueError(
+                    f"Versi proyek {manifest['version']} tidak didukung.")
+        except Exception:
+            project._archive.close()
+            raise
+
+        width, height = manifest["width"], manifest["height"]
+        layers = [project._build_layer(entry, width, height, manifest["tile_size"])
+                  for entry in manifest["layers"]]
+        return project, width, height, layers, manifest["active_layer_index"]
+
+    @classmethod
+    def read_metadata(cls, path: str) -> dict:
+        """
+        Membaca data tambahan manifest terbaru tanpa membuat layer.
+        """
+        project = cls(path)
+        with zipfile.ZipFile(path, "r") as project._archive:
+            name, _ = project._latest_manifest()
+            return json.loads(project._archive.read(name)).get("metadata", {})
+
+    def _latest_manifest(self):
+        latest = (MANIFEST_NAME, 0)
+        for name in self._archive.namelist():
+            match = MANIFEST_PATTERN.match(name)
+            if match and int(match.group(1)) >= latest[1]:
+                latest = (name, int(match.group(1)))
+        return latest
+
+    def _build_layer(self, entry: dict, width: int, height: int, tile_size: int):
+        """
+        Membuat layer dari metadata manifest. Piksel tidak didekode di sini.
+        """
+        kind = entry["type"]
+        if kind == "group":
+            layer = LayerGroup(entry["name"], [
+                self._build_layer(child, width, height, tile_size)
+                for child in entry["children"]])
+        elif kind == "adjustment":
+            layer = AdjustmentLayer(
+                entry["kind"], entry["name"], **entry["params"])
+        else:
+            layer = Layer(1, 1, entry["name"])
+            layer.fill_color = entry.get("fill_color", "#00000000")
+            # Layer masih kosong di memori; content_bbox bertambah saat tile dimuat
+            layer.replace_image(blank_image(width, height), None)
+            entries = {(tx, ty): name for tx, ty, name in entry["tiles"]}
+            if entries:
+                layer.tile_source = ArchiveTileSource(
+                    self._archive, entries, tile_size)
+            self._records[id(layer)] = (layer, layer.edit_revision, entries)
+        layer.is_visible = entry["visible"]
+        layer.opacity = entry["opacity"]
+        layer.blend_mode = entry["blend_mode"]
+        return layer
+
+    def reference_saved_tiles(self, other: "ProjectFile"):
+        """
+        Merujuk tile yang tersimpan di proyek lain (misal proyek pengguna yang
+        sedang dibuka) sebagai (arsip, nama entri). Simpan berikutnya ke file
+        ini menyalin data PNG tile yang tidak diedit apa adanya, tanpa
+        menyalin piksel atau mengodekan ulang.
+        """
+        if other._archive is None:
+            return
+        for key, (layer, edit_revision, names) in other._records.items():
+            self._records[key] = (layer, edit_revision, {
+                tile: (other._archive, name) for tile, name in names.items()})
+
+    def save(self, layer_manager, path: str = None, progress=None) -> int:
+        """
+        Menyimpan dokumen secara sinkron. Ke path yang sama hanya tile yang
+        berubah yang ditulis; ke path lain (Save As) seluruh arsip ditulis baru.
+        Untuk menyimpan di thread lain, gunakan prepare_save(), write_save(),
+        dan finish_save() secara terpisah.
+
+        Returns:
+            Jumlah tile yang ditulis.
+        """
+        snapshot = self.prepare_save(layer_manager, path)
+        result = self.write_save(snapshot, progress)
+        self.finish_save(snapshot, result)
+        return result["written"]
+
+    @traced("prepare_save", "project")
+    def prepare_save(self, layer_manager, path: str = None, metadata: dict = None) -> dict:
+        """
+        Tahap 1 (thread UI): mengambil snapshot yang akan disimpan. Tile yang
+        tidak diedit sejak simpan terakhir dirujuk dengan nama entri lamanya;
+        tile yang diedit dirujuk lewat TileSnapshot copy-on-write dan baru
+        disalin di write_save(), sehingga simpan pertama dokumen besar pun
+        tidak menyalin piksel di thread UI.
+
+        Args:
+            metadata (dict, optional): Data tambahan yang disimpan di manifest
+                (misal info pemulihan autosave), dibaca kembali lewat read_metadata().
+        """
+        tile_size = AppConfig.TILE_SIZE
+        plans = []  # (layer, edit_revision, entry manifest)
+        layers = [self._layer_entry(layer, plans, tile_size)
+                  for layer in layer_manager.layers]
+        manifest = {
+            "format": PROJECT_FORMAT,
+            "version": PROJECT_VERSION,
+            "width": layer_manager.canvas_width,
+            "height": layer_manager.canvas_height,
+            "tile_size": tile_size,
+            "active_layer_index": layer_manager.active_layer_index,
+            "layers": layers,
+        }
+        if metadata:
+            manifest["metadata"] = metadata
+        return {"path": path or self.path, "manifest": manifest, "plans": plans}
+
+    def _layer_entry(self, layer: Layer, plans: list, tile_size: int) -> dict:
+        """
+        Membuat metadata manifest untuk layer dan mencatat sumber setiap tile:
+        nama entri di arsip ini, (arsip lain, nama entri), atau TileSnapshot layer.
+        """
+        entry = {
+            "name": layer.name,
+            "visible": layer.is_visible,
+            "opacity": layer.opacity,
+            "blend_mode": layer.blend_mode,
+        }
+        if isinstance(layer, LayerGroup):
+            entry["type"] = "group"
+            entry["children"] = [self._layer_entry(child, plans, tile_size)
+                                 for child in layer.children]
+            return entry
+        if isinstance(layer, AdjustmentLayer):
+            entry["type"] = "adjustment"
+            entry["kind"] = layer.kind
+            entry["params"] = dict(layer.params)
+            return entry
+
+        entry["type"] = "layer"
+        entry["fill_color"] = layer.fill_color
+        record = self._records.get(id(layer))
+        if record and record[0] is layer:
+            saved, edited = record[2], layer.edited_tiles_since(record[1])
+        else:
+            saved, edited = {}, None  # Layer baru: tulis semua tile
+
+        if layer.tile_source and not isinstance(layer.tile_source, ArchiveTileSource):
+            layer.ensure_loaded()  # Sumber selain arsip proyek tidak bisa dirujuk
+        sources = {}
+        copies = []  # Tile yang pikselnya diambil dari layer di memori
+        # Tile yang belum didekode tidak mungkin diedit; rujuk entri lamanya
+        pending = layer.tile_source.entries if layer.tile_source else {}
+        candidates = set(pending) | set(saved)
+        if layer.content_bbox:
+            candidates.update(_tiles_in_box(layer.content_bbox, tile_size))
+        for tile in candidates:
+            if tile in pending and layer.tile_source.archive is self._archive:
+                sources[tile] = pending[tile]
+            elif edited is not None and tile not in edited and tile in saved:
+                sources[tile] = saved[tile]
+            elif tile in pending:
+                sources[tile] = (layer.tile_source.archive, pending[tile])
+            elif edited is not None and tile not in edited:
+                continue  # Tidak diedit dan tidak pernah berisi piksel
+            else:
+                copies.append(tile)
+        if copies:
+            snapshot = layer.snapshot_tiles(copies)
+            sources.update((tile, snapshot) for tile in copies)
+        entry["tiles"] = sources  # Diganti daftar [tx, ty, nama] saat ditulis
+        plans.append((layer, layer.edit_revision, entry))
+        return entry
+
+    @traced("write_save", "project")
+    def write_save(self, snapshot: dict, progress=None) -> dict:
+        """
+        Tahap 2 (boleh di thread lain): mengodekan tile dan menulis arsip.
+        Tidak mengubah state ProjectFile; hasilnya diterapkan oleh finish_save().
+
+        Args:
+            progress (callable, optional): Dipanggil dengan (selesai, total) tile.
+        """
+        plans = snapshot["plans"]
+        work = [(entry, tile) for _, _, entry in plans
+                for tile, source in entry["tiles"].items() if not isinstance(source, str)]
+        tile_snapshots = {source for _, _, entry in plans
+                          for source in entry["tiles"].values()
+                          if isinstance(source, TileSnapshot)}
+        try:
+            for done, (entry, tile) in enumerate(work, 1):
+                source = entry["tiles"][tile]
+                if isinstance(source, tuple):
+                    archive, name = source
+                    entry["tiles"][tile] = archive.read(name)
+                else:
+                    tile_image = source.take(tile)
+                    if tile_image is not None and tile_image.getbbox():
+                        entry["tiles"][tile] = _encode_tile(tile_image)
+                    else:
+                        del entry["tiles"][tile]  # Tile transparan penuh tidak disimpan
+                if progress:
+                    progress(done, len(work))
+        finally:
+            for tile_snapshot in tile_snapshots:
+                tile_snapshot.release()
+        for _, _, entry in plans:
+            bbox = _bbox_of_tiles(entry["tiles"], AppConfig.TILE_SIZE)
+            entry["content_bbox"] = list(bbox) if bbox else None
+
+        path = snapshot["path"]
+        incremental = (path == self.path and self._archive is not None
+                       and os.path.exists(path)
+                       and self._garbage_ratio(plans) <= AppConfig.PROJECT_COMPACT_RATIO)
+        if incremental:
+            result = self._append(path, plans, snapshot["manifest"])
+            log.info("Proyek disimpan (inkremental, %d tile baru): %s",
+                     result["written"], path)
+        else:
+            result = self._rewrite(path, plans, snapshot["manifest"])
+            log.info("Proyek disimpan (utuh, %d tile ditulis): %s",
+                     result["written"], path)
+        return result
+
+    def finish_save(self, snapshot: dict, result: dict):
+        """
+        Tahap 3 (thread UI): mencatat revisi yang tersimpan dan mengarahkan
+        tile yang belum didekode ke entri di arsip yang baru ditulis.
+        """
+        self.path = snapshot["path"]
+        self.generation = result["generation"]
+        self._records = {}
+        for (layer, edit_revision, _), names in zip(snapshot["plans"], result["names"]):
+            self._records[id(layer)] = (layer, edit_revision, names)
+            if layer.tile_source and self.adopt_tiles:
+                layer.tile_source.entries = {
+                    tile: names[tile] for tile in layer.tile_source.entries if tile in names}
+        self._reopen()
+
+    def _garbage_ratio(self, plans: list) -> float:
+        """
+        Perkiraan porsi arsip yang tidak akan dirujuk lagi setelah simpan ini.
+        """
+        live = 0
+        new = 0
+        sizes = {info.filename: info.compress_size
+                 for info in self._archive.infolist()}
+        for _, _, entry in plans:
+            for source in entry["tiles"].values():
+                if isinstance(source, str):
+                    live += sizes.get(source, 0)
+                else:
+                    new += len(source)
+        total = sum(sizes.values())
+        garbage = total - live
+        if garbage < AppConfig.PROJECT_COMPACT_MIN_BYTES:
+            return 0.0
+        return garbage / max(1, total + new)
+
+    def _write_tiles(self, archive, plans: list, generation: int, copy_from=None):
+        """
+        Menulis tile baru ke arsip dan mengganti sumber tile dengan indeks tile.
+        Jika copy_from diberikan, entri lama juga disalin (apa adanya) dari sana.
+
+        Returns:
+            tuple: (jumlah tile ditulis, list {tile: nama entri} per layer).
+        """
+        written = 0
+        all_names = []
+        for number, (_, _, entry) in enumerate(plans):
+            tiles = []
+            names = {}
+            for tile in sorted(entry["tiles"], key=lambda t: (t[1], t[0])):
+                source = entry["tiles"][tile]
+                if isinstance(source, str) and copy_from is None:
+                    name = source
+                else:
+                    data = source if isinstance(source, bytes) else copy_from.read(source)
+                    name = f"layers/{number}/{tile[0]}_{tile[1]}.g{generation}.png"
+                    archive.writestr(name, data)
+                    written += 1
+                tiles.append([tile[0], tile[1], name])
+                names[tile] = name
+            entry["tiles"] = tiles
+            all_names.append(names)
+        return written, all_names
+
+    def _append(self, path: str, plans: list, manifest: dict) -> dict:
+        """
+        Menambahkan tile yang berubah dan manifest baru ke akhir arsip yang ada.
+        Jika gagal, central directory lama dipulihkan sehingga arsip tetap utuh.
+        """
+        generation = self.generation + 1
+        start_dir = self._archive.start_dir
+        with open(path, "rb") as data:
+            data.seek(start_dir)
+            old_directory = data.read()
+        try:
+            with zipfile.ZipFile(path, "a", zipfile.ZIP_STORED) as archive:
+                written, names = self._write_tiles(archive, plans, generation)
+                archive.writestr(f"manifest-{generation:06d}.json",
+                                 json.dumps(manifest, separators=(",", ":")), zipfile.ZIP_DEFLATED)
+        except Exception:
+            with open(path, "r+b") as data:
+                data.seek(start_dir)
+                data.truncate()
+                data.write(old_directory)
+            raise
+        return {"written": written, "names": names, "generation": generation}
+
+    def _rewrite(self, path: str, plans: list, manifest: dict) -> dict:
+        """
+        Menulis arsip baru berisi hanya entri yang masih dirujuk (compaction
+        atau Save As), lewat file sementara yang lalu diganti secara atomik.
+        """
+        generation = 1
+        temp_path = path + ".tmp"
+        try:
+            with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_STORED) as archive:
+                written, names = self._write_tiles(
+                    archive, plans, generation, copy_from=self._archive)
+                archive.writestr(f"manifest-{generation:06d}.json",
+                                 json.dumps(manifest, separators=(",", ":")), zipfile.ZIP_DEFLATED)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return {"written": written, "names": names, "generation": generation}
+
+    def _reopen(self):
+        """
+        Membuka ulang arsip baca dan mengarahkan tile yang belum didekode ke sana.
+        """
+        old_archive = self._archive
+        self._archive = zipfile.ZipFile(self.path, "r")
+        for layer, _, _ in self._records.values():
+            if layer.tile_source and self.adopt_tiles:
+                layer.tile_source.archive = self._archive
+        if old_archive is not None:
+            old_archive.close()
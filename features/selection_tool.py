@@ -6,6 +6,10 @@ import tkinter as tk
 # Import dari core.drawing_tools untuk inheritance jika diperlukan
 # from core.drawing_tools import BaseTool
 
+from utils.log import get_logger
+
+log = get_logger("tools")
+
 
 class SelectionTool:  # Bisa juga mewarisi dari BaseTool jika ingin berinteraksi dengan CanvasManager
     """
@@ -21,7 +25,7 @@ class SelectionTool:  # Bisa juga mewarisi dari BaseTool jika ingin berinteraksi
         """
         Mengaktifkan alat seleksi.
         """
-        print("Alat Seleksi diaktifkan.")
+        log.debug("Alat Seleksi diaktifkan.")
         self.canvas_manager.canvas.bind("<Button-1>", self._on_mouse_down)
         self.canvas_manager.canvas.bind("<B1-Motion>", self._on_mouse_drag)
         self.canvas_manager.canvas.bind("<ButtonRelease-1>", self._on_mouse_up)
@@ -30,7 +34,7 @@ class SelectionTool:  # Bisa juga mewarisi dari BaseTool jika ingin berinteraksi
         """
         Menonaktifkan alat seleksi.
         """
-        print("Alat Seleksi dinonaktifkan.")
+        log.debug("Alat Seleksi dinonaktifkan.")
         self.canvas_manager.canvas.unbind("<Button-1>")
         self.canvas_manager.canvas.unbind("<B1-Motion>")
         self.canvas_manager.canvas.unbind("<ButtonRelease-1>")
@@ -56,8 +60,11 @@ class SelectionTool:  # Bisa juga mewarisi dari BaseTool jika ingin berinteraksi
         if self._start_x is not None:
             x1, y1 = min(self._start_x, event.x), min(self._start_y, event.y)
             x2, y2 = max(self._start_x, event.x), max(self._start_y, event.y)
+            # Seleksi disimpan dalam koordinat dokumen agar tidak bergantung viewport
+            x1, y1 = self.canvas_manager.widget_to_document(x1, y1)
+            x2, y2 = self.canvas_manager.widget_to_document(x2, y2)
             self.current_selection = (x1, y1, x2, y2)
-            print(f"Seleksi dibuat: {self.current_selection}")
+            log.debug("Seleksi dibuat: %s", self.current_selection)
             self._start_x, self._start_y = None, None
             # Biarkan visualisasi seleksi tetap ada sampai seleksi baru dimulai atau dibatalkan
 
@@ -67,7 +74,7 @@ class SelectionTool:  # Bisa juga mewarisi dari BaseTool jika ingin berinteraksi
             self.canvas_manager.canvas.delete(self._selection_rect_id)
             self._selection_rect_id = None
             self.current_selection = None
-            print("Visualisasi seleksi dihapus.")
+            log.debug("Visualisasi seleksi dihapus.")
 
     def get_selected_area(self):
         """
@@ -77,30 +84,15 @@ class SelectionTool:  # Bisa juga mewarisi dari BaseTool jika ingin berinteraksi
 
     def apply_to_selection(self, operation_func):
         """
-        Menerapkan fungsi ke area yang terseleksi.
-        operation_func akan menerima objek gambar (PIL Image) dan koordinat seleksi,
-        dan mengembalikan gambar yang dimodifikasi.
+        Menerapkan fungsi ke area yang terseleksi pada layer aktif.
+        operation_func akan menerima potongan area (PIL Image) dan
+        mengembalikan gambar yang dimodifikasi dengan ukuran yang sama.
         """
-        if self.current_selection and self.canvas_manager.current_image:
-            x1, y1, x2, y2 = self.current_selection
-
-            try:
-                from PIL import Image
-                # Crop bagian yang terseleksi
-                selected_region = self.canvas_manager.current_image.crop(
-                    (x1, y1, x2, y2))
-
-                # Terapkan operasi
-                modified_region = operation_func(selected_region)
-
-                # Paste kembali ke gambar utama
-                self.canvas_manager.current_image.paste(
-                    modified_region, (x1, y1))
-                self.canvas_manager._update_canvas_display()
-                self.canvas_manager._add_to_history()
-                print("Operasi diterapkan ke area seleksi.")
-            except ImportError:
-                print(
-                    "Pillow (PIL) tidak terinstal, tidak dapat menerapkan operasi ke seleksi.")
+        if self.current_selection:
+            # Entri undo dicatat oleh Document
+            if self.canvas_manager.app.document.apply_to_region(
+                    self.current_selection, operation_func):
+                self.canvas_manager.refresh_composite()
+                log.debug("Operasi diterapkan ke area seleksi.")
         else:
-            print("Tidak ada area yang terseleksi atau gambar.")
+            log.warning("Tidak ada area yang terseleksi.")
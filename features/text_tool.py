@@ -3,7 +3,11 @@
 import tkinter as tk
 from tkinter import simpledialog, font  # Untuk input teks dan pemilihan font
 
-# from PIL import ImageFont, ImageDraw # Akan digunakan untuk menggambar teks ke gambar PIL
+# features.font_index (dan PIL.ImageFont) diimpor saat teks pertama diterapkan
+
+from utils.log import get_logger
+
+log = get_logger("tools")
 
 
 class TextTool:
@@ -22,13 +26,17 @@ class TextTool:
         self.active_text_entry = None  # Objek entry Tkinter sementara untuk input teks
         self.text_position_x, self.text_position_y = None, None
 
-        print("TextTool diinisialisasi.")
+        # Indeks font dimuat di latar belakang agar teks pertama tidak tertunda
+        from features.font_index import shared_font_cache
+        shared_font_cache().warm_up()
+
+        log.debug("TextTool diinisialisasi.")
 
     def activate(self):
         """
         Mengaktifkan alat teks. Menunggu klik untuk menempatkan teks.
         """
-        print("Alat Teks diaktifkan. Klik pada kanvas untuk menempatkan teks.")
+        log.debug("Alat Teks diaktifkan. Klik pada kanvas untuk menempatkan teks.")
         self.canvas_manager.canvas.bind("<Button-1>", self._on_canvas_click)
         self.app.main_window.update_status(
             "Alat Teks aktif. Klik untuk menempatkan.")
@@ -37,7 +45,7 @@ class TextTool:
         """
         Menonaktifkan alat teks.
         """
-        print("Alat Teks dinonaktifkan.")
+        log.debug("Alat Teks dinonaktifkan.")
         self.canvas_manager.canvas.unbind("<Button-1>")
         self.app.main_window.update_status("Alat Teks tidak aktif.")
         if self.active_text_entry:
@@ -50,12 +58,14 @@ class TextTool:
         """
         if self.active_text_entry:  # Jika sudah ada entry aktif, pindahkan
             self.active_text_entry.place(x=event.x, y=event.y, anchor="nw")
-            self.text_position_x, self.text_position_y = event.x, event.y
-            print(f"Memindahkan entry teks ke ({event.x}, {event.y})")
+            self.text_position_x, self.text_position_y = \
+                self.canvas_manager.widget_to_document(event.x, event.y)
+            log.debug("Memindahkan entry teks ke (%d, %d)", event.x, event.y)
             return
 
-        # Simpan posisi klik
-        self.text_position_x, self.text_position_y = event.x, event.y
+        # Simpan posisi klik (dalam koordinat dokumen, bukan widget)
+        self.text_position_x, self.text_position_y = \
+            self.canvas_manager.widget_to_document(event.x, event.y)
 
         # Buat entry teks sementara di kanvas
         self.active_text_entry = tk.Entry(self.canvas_manager.canvas,
@@ -70,7 +80,7 @@ class TextTool:
         # Bind event untuk menekan Enter (menggambar teks) dan Escape (membatalkan)
         self.active_text_entry.bind("<Return>", self._draw_text_to_canvas)
         self.active_text_entry.bind("<Escape>", self._cancel_text_entry)
-        print(f"Entry teks dibuat di ({event.x}, {event.y})")
+        log.debug("Entry teks dibuat di (%d, %d)", event.x, event.y)
         self.app.main_window.update_status(
             "Ketik teks, tekan Enter untuk menerapkan.")
 
@@ -86,69 +96,27 @@ class TextTool:
         x, y = self.text_position_x, self.text_position_y
         color = self.app.current_color
 
-        if self.canvas_manager.current_image and self.canvas_manager.drawing_context:
+        if self.canvas_manager.current_image:
             try:
-                from PIL import ImageFont, ImageDraw
-
-                # Coba muat font kustom jika ada, jika tidak, gunakan font default PIL
-                try:
-                    # PIL membutuhkan path ke file font .ttf/.otf
-                    # Anda mungkin perlu logika yang lebih canggih untuk menemukan font
-                    # Untuk kesederhanaan, kita bisa asumsikan font ada di sistem atau mengabaikan pengaturan font
-                    # Jika menggunakan font sistem, gunakan tk.font untuk mendapatkan nama font yang benar
-
-                    # Font Tkinter dapat digunakan untuk mengukur teks, tetapi untuk menggambar di PIL Image
-                    # kita perlu objek ImageFont dari PIL.ImageFont.truetype
-
-                    # Untuk contoh ini, kita akan menggunakan font default PIL jika tidak ada file font spesifik
-                    # atau font Arial/Times New Roman dari sistem jika PIL bisa menemukannya.
-
-                    # Coba muat font dari nama
-                    # font_path = ImageFont.get_path_from_system(self._font_name) # Tidak ada fungsi langsung seperti ini di PIL
-                    # Solusi yang lebih baik adalah menggunakan ImageFont.truetype dengan jalur font yang diketahui
-
-                    # Untuk demo, kita akan menggunakan font default yang dibangun di PIL
-                    # atau fallback ke font sistem jika ImageFont.truetype menemukan namanya.
-                    # Ini bisa jadi kompleks karena PIL mungkin tidak selalu menemukan font sistem hanya dengan nama.
-
-                    # Pendekatan yang lebih andal untuk font sistem:
-                    # Mencari file font berdasarkan nama atau menggunakan font default jika tidak ditemukan.
-                    # Asumsikan 'arial.ttf' atau 'times.ttf' adalah font umum
-
-                    try:
-                        # Ini mungkin memerlukan instalasi font di sistem atau jalur ke file font
-                        pil_font = ImageFont.truetype(
-                            self._font_name + ".ttf", self._font_size)
-                    except IOError:
-                        # Fallback ke font default jika font spesifik tidak ditemukan
-                        print(
-                            f"Font '{self._font_name}.ttf' tidak ditemukan, menggunakan font default.")
-                        pil_font = ImageFont.load_default()
-                        # Sesuaikan ukuran jika menggunakan font default
-                        # pil_font = ImageFont.truetype("arial.ttf", self._font_size) # Atau Arial jika tersedia
-                        # Perlu cara lebih baik untuk menangani gaya font (bold/italic) dengan ImageFont.load_default()
-
-                except Exception as e:
-                    print(
-                        f"Error memuat font: {e}. Menggunakan font default PIL.")
-                    pil_font = ImageFont.load_default()
-
-                self.canvas_manager._add_to_history()  # Simpan keadaan sebelum menggambar teks
-                self.canvas_manager.drawing_context.text(
-                    (x, y),
-                    text_to_draw,
-                    font=pil_font,
-                    fill=color
-                )
-                self.canvas_manager._update_canvas_display()
-                self.app.main_window.update_status("Teks diterapkan.")
+                from features.font_index import shared_font_cache
+
+                # Font dari cache LRU; file font hanya dibaca saat pertama dipakai
+                pil_font = shared_font_cache().get(
+                    self._font_name, self._font_size,
+                    bold=self._font_weight == "bold",
+                    italic=self._font_slant == "italic")
+
+                # Teks digambar ke layer aktif; entri undo dicatat oleh Document
+                if self.app.document.draw_text(x, y, text_to_draw, pil_font, color):
+                    self.canvas_manager.refresh_composite()
+                    self.app.main_window.update_status("Teks diterapkan.")
 
             except ImportError:
-                print("Pillow (PIL) tidak terinstal, tidak dapat menggambar teks.")
+                log.error("Pillow (PIL) tidak terinstal, tidak dapat menggambar teks.")
                 self.app.main_window.update_status(
                     "Pillow tidak terinstal. Teks dibatalkan.")
             except Exception as e:
-                print(f"Error menggambar teks: {e}")
+                log.error("Error menggambar teks: %s", e)
                 self.app.main_window.update_status(f"Error teks: {e}")
 
         self._cancel_text_entry()  # Hapus entry setelah teks diterapkan
@@ -161,7 +129,7 @@ class TextTool:
             self.active_text_entry.destroy()
             self.active_text_entry = None
             self.text_position_x, self.text_position_y = None, None
-            print("Entry teks dibatalkan.")
+            log.debug("Entry teks dibatalkan.")
             self.app.main_window.update_status("Teks dibatalkan.")
 
     def set_font_properties(self, font_name: str = None, font_size: int = None, weight: str = None, slant: str = None):
@@ -176,8 +144,8 @@ class TextTool:
             self._font_weight = weight
         if slant:
             self._font_slant = slant
-        print(
-            f"Properti font diatur: {self._font_name}, {self._font_size}, {self._font_weight}, {self._font_slant}")
+        log.debug("Properti font diatur: %s, %s, %s, %s", self._font_name,
+                  self._font_size, self._font_weight, self._font_slant)
         self.app.main_window.update_status("Properti font diperbarui.")
 
     def show_font_dialog(self):
@@ -186,7 +154,7 @@ class TextTool:
         """
         # Anda bisa menggunakan simpledialog atau membuat dialog kustom yang lebih kompleks
         # Ini akan memerlukan dialog kustom atau impor dari ui.dialogs
-        print("Menampilkan dialog pemilihan font. (Placeholder)")
+        log.info("Menampilkan dialog pemilihan font. (Placeholder)")
         # Contoh:
         # font_info = self.app.main_window.show_font_properties_dialog(
         #     self._font_name, self._font_size, self._font_weight, self._font_slant
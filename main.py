@@ -1,5 +1,10 @@
 from core.application import Application
+from config import AppConfig
+from utils.log import get_logger
+from utils import tracing
 import tkinter as tk
+from tkinter import messagebox
+import argparse
 import sys
 import os
 import time  # Import modul time untuk mengukur durasi
@@ -16,23 +21,95 @@ sys.path.append(os.path.abspath(
     os.path.join(os.path.dirname(__file__), 'utils')))
 
 
-def main():
+log = get_logger("app")
+
+
+def offer_recovery(app: Application, recovery: dict):
+    """
+    Menawarkan pemulihan dokumen dari autosave sesi sebelumnya.
+    """
+    saved_at = recovery["saved_at"]
+    when = time.strftime("%d-%m-%Y %H:%M", time.localtime(saved_at)) if saved_at else "-"
+    message = f"Aplikasi tidak ditutup dengan normal.\nAutosave terakhir: {when}"
+    if recovery["source_path"]:
+        message += f"\nProyek: {os.path.basename(recovery['source_path'])}"
+    recent = [op["description"] for op in recovery["operations"][-5:]]
+    if recent:
+        message += "\nOperasi terakhir: " + ", ".join(recent)
+    message += "\n\nPulihkan dokumen?"
+    if messagebox.askyesno("Pemulihan Dokumen", message, parent=app.root):
+        app.autosave.recover(recovery)
+    else:
+        app.autosave.discard()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=AppConfig.WINDOW_TITLE)
+    parser.add_argument("file", nargs="?", help="Gambar atau proyek (.mpaint) yang dibuka saat mulai.")
+    parser.add_argument("--record", metavar="TRACE",
+                        help="Rekam event input kanvas ke file trace.")
+    parser.add_argument("--replay", metavar="TRACE",
+                        help="Putar ulang file trace dan laporkan latensi per event.")
+    parser.add_argument("--replay-speed", choices=("recorded", "max"), default="recorded",
+                        help="Kecepatan replay: sesuai rekaman (default) atau secepat mungkin.")
+    parser.add_argument("--replay-report", metavar="JSON",
+                        help="Tulis laporan latensi replay ke file JSON.")
+    parser.add_argument("--exit-after-replay", action="store_true",
+                        help="Tutup aplikasi setelah replay selesai.")
+    parser.add_argument("--profile", metavar="REPORT",
+                        help="Profil sesi dengan cProfile dan tracemalloc; laporan per "
+                             "subsistem ditulis ke file ini (dan REPORT.pstats) saat keluar.")
+    parser.add_argument("--trace-spans", metavar="JSON",
+                        help="Tulis span operasi utama (format Chrome trace-event, "
+                             "untuk chrome://tracing atau Perfetto) ke file ini saat keluar.")
+    return parser
+
+
+def main(argv=None):
     """
     Fungsi utama untuk menjalankan aplikasi Paint yang kompleks.
     """
+    args = build_parser().parse_args(argv)
     start_time_main = time.time()  # Mulai pengukuran waktu untuk main.py
+    profiler = None
+    if args.profile:
+        from utils.profiling import SessionProfiler
+        profiler = SessionProfiler(args.profile)
+        profiler.start()
+    if args.trace_spans:
+        tracing.start(args.trace_spans)
 
     root = tk.Tk()
 
     # Nonaktifkan root.withdraw() jika Anda ingin jendela utama langsung terlihat
     # root.withdraw() # Sembunyikan jendela root sementara selama inisialisasi
 
+    # Cari autosave dari sesi yang berhenti tidak normal sebelum autosave baru dimulai.
+    # Ini satu-satunya bagian autosave yang berjalan sebelum frame pertama:
+    # dialog pemulihan harus muncul sebelum dokumen baru menimpa autosave lama
+    from core.autosave import AutosaveService
+    recovery = AutosaveService.find_recovery()
+
     app = Application(root)
-    app.run()
+    if recovery:
+        offer_recovery(app, recovery)
+    if args.file:
+        app.open_image(args.file)
+    if args.record:
+        app.start_input_recording(args.record)
+    if args.replay:
+        # Dimulai dari event loop agar jendela sudah dipetakan dan berukuran final
+        root.after(200, lambda: app.replay_input_trace(
+            args.replay, args.replay_speed, args.replay_report, args.exit_after_replay))
+    try:
+        app.run()
+    finally:
+        tracing.stop()
+        if profiler:
+            profiler.stop()
 
     end_time_main = time.time()  # Akhiri pengukuran waktu untuk main.py
-    print(
-        f"DEBUG: main.py selesai dalam {end_time_main - start_time_main:.4f} detik.")
+    log.debug("main.py selesai dalam %.4f detik.", end_time_main - start_time_main)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Modul aplikasi (config, core, features, ...) diimpor dari akar repo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
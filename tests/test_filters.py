@@ -0,0 +1,78 @@
+# tests/test_filters.py
+"""
+Filter yang diproses per tile (adjustment layer, filter destruktif pada
+content_bbox) harus memberi hasil yang sama dengan filter pada gambar utuh.
+"""
+
+from PIL import Image, ImageChops, ImageEnhance
+
+from config import AppConfig
+from core.document import Document
+from features.filters import apply_filter_to_image, filter_statistics
+
+WIDTH, HEIGHT = 2 * AppConfig.TILE_SIZE + 88, AppConfig.TILE_SIZE + 44
+
+
+def _gradient():
+    # Gradien horizontal: rata-rata tiap tile jauh berbeda dari rata-rata gambar
+    row = Image.linear_gradient("L").rotate(90).resize((WIDTH, 1))
+    gray = row.resize((WIDTH, HEIGHT))
+    return Image.merge("RGBA", (gray, gray, gray, Image.new("L", gray.size, 255)))
+
+
+def _max_difference(a, b) -> int:
+    return max(high for _, high in ImageChops.difference(a, b).getextrema())
+
+
+def _whole_contrast(image, factor: float):
+    return ImageEnhance.Contrast(image.convert("RGB")).enhance(factor)
+
+
+def test_contrast_matches_image_enhance():
+    image = _gradient()
+    processed = apply_filter_to_image(image, "contrast", factor=1.8)
+    assert _max_difference(processed.convert("RGB"), _whole_contrast(image, 1.8)) == 0
+
+
+def test_tiled_contrast_equals_whole_image():
+    image = _gradient()
+    tile_size = AppConfig.TILE_SIZE
+    statistics = filter_statistics(image, "contrast")
+    tiled = Image.new("RGBA", image.size)
+    for y in range(0, HEIGHT, tile_size):
+        for x in range(0, WIDTH, tile_size):
+            box = (x, y, min(x + tile_size, WIDTH), min(y + tile_size, HEIGHT))
+            tiled.paste(apply_filter_to_image(
+                image.crop(box), "contrast", factor=1.8, **statistics), box[:2])
+    assert _max_difference(tiled, apply_filter_to_image(image, "contrast", factor=1.8)) == 0
+
+
+def test_contrast_adjustment_layer_equals_whole_image():
+    document = Document(WIDTH, HEIGHT)
+    manager = document.layer_manager
+    gradient = _gradient()
+    manager.add_layers([manager.image_to_layer(gradient, "Gradien")], "Tambah gradien")
+    manager.add_adjustment_layer("contrast", factor=1.8)
+    composite = document.composite().convert("RGB")
+    assert _max_difference(composite, _whole_contrast(gradient, 1.8)) <= 1
+
+    # Goresan kecil mengubah rata-rata: seluruh hasil adjustment ikut berubah
+    manager.set_active_layer(1)
+    document.draw_stroke("rectangle", [(10, 10), (120, 90)], "#000000", 40)
+    edited = manager.layers[1].image
+    composite = document.composite().convert("RGB")
+    assert _max_difference(composite, _whole_contrast(edited, 1.8)) <= 1
+
+
+def test_destructive_contrast_ignores_content_bbox():
+    document = Document(WIDTH, HEIGHT, initial_layer=False)
+    manager = document.layer_manager
+    patch = _gradient().crop((0, 0, WIDTH // 2, HEIGHT // 2))
+    layer = manager.image_to_layer(patch, "Potongan")
+    manager.load_document(WIDTH, HEIGHT, [layer], 0)
+    original = layer.image.copy()
+    assert document.apply_filter("contrast", factor=1.8)
+
+    expected = apply_filter_to_image(original, "contrast", factor=1.8)
+    bbox = layer.content_bbox
+    assert _max_difference(layer.image.crop(bbox), expected.crop(bbox)) == 0
@@ -0,0 +1,155 @@
+# tests/test_project_file.py
+"""
+File proyek (.mpaint): dokumen yang disimpan lalu dibuka kembali harus
+memberi piksel yang sama, termasuk tile yang masih didekode lazy, simpan
+inkremental, compaction, dan simpan yang gagal di tengah jalan.
+"""
+
+import zipfile
+
+import pytest
+from PIL import Image, ImageChops
+
+from config import AppConfig
+from core.document import Document
+from features.project_file import ProjectFile
+
+WIDTH, HEIGHT = 2 * AppConfig.TILE_SIZE + 88, AppConfig.TILE_SIZE + 44
+
+
+def _max_difference(a, b) -> int:
+    return max(high for _, high in ImageChops.difference(a, b).getextrema())
+
+
+def _document():
+    document = Document(WIDTH, HEIGHT, initial_layer=False)
+    manager = document.layer_manager
+    row = Image.linear_gradient("L").rotate(90).resize((WIDTH, 1))
+    gray = row.resize((WIDTH, HEIGHT))
+    background = Image.merge("RGBA", (gray, gray, gray, Image.new("L", gray.size, 255)))
+    patch = Image.new("RGBA", (120, 80), (200, 40, 40, 160))
+    manager.load_document(WIDTH, HEIGHT, [
+        manager.image_to_layer(background, "Latar"),
+        manager.image_to_layer(patch, "Potongan"),
+    ], 1)
+    return document
+
+
+def _layer_images(document):
+    document.layer_manager.ensure_loaded()
+    return [layer.image.copy() for layer in document.layer_manager.layers]
+
+
+def _assert_same_document(document, path):
+    reopened = Document.open(path)
+    expected = _layer_images(document)
+    actual = _layer_images(reopened)
+    assert len(actual) == len(expected)
+    for a, b in zip(actual, expected):
+        assert a.size == b.size
+        assert _max_difference(a, b) == 0
+    assert _max_difference(reopened.composite(), document.composite()) == 0
+
+
+def test_save_and_open_round_trip(tmp_path):
+    path = str(tmp_path / "gambar.mpaint")
+    document = _document()
+    assert document.save_project(path) > 0
+
+    reopened = Document.open(path)
+    # Membuka proyek tidak mendekode tile apa pun
+    assert all(layer.tile_source for layer in reopened.layer_manager.layers)
+    assert reopened.layer_manager.active_layer_index == 1
+    _assert_same_document(document, path)
+
+
+def _manifests(path):
+    with zipfile.ZipFile(path) as archive:
+        return sorted(name for name in archive.namelist() if name.startswith("manifest-"))
+
+
+def _edit(document):
+    # Goresan di satu tile saja: hanya tile itu yang ditulis ulang
+    document.layer_manager.set_active_layer(0)
+    document.draw_stroke("rectangle", [(10, 10), (60, 50)], "#102030", 8)
+
+
+def test_incremental_save_appends_only_edited_tiles(tmp_path):
+    path = str(tmp_path / "gambar.mpaint")
+    document = _document()
+    project = ProjectFile(path)
+    first = project.save(document.layer_manager)
+    assert project.generation == 1
+
+    _edit(document)
+    assert project.save(document.layer_manager) == 1
+    assert project.generation == 2
+    assert _manifests(path) == ["manifest-000001.json", "manifest-000002.json"]
+    assert first > 1
+    _assert_same_document(document, path)
+
+    # Tanpa edit, simpan berikutnya tidak menulis tile sama sekali
+    assert project.save(document.layer_manager) == 0
+    _assert_same_document(document, path)
+
+
+def test_incremental_save_of_lazily_opened_project(tmp_path):
+    path = str(tmp_path / "gambar.mpaint")
+    _document().save_project(path)
+
+    project, width, height, layers, active_index = ProjectFile.open(path)
+    document = Document(width, height, initial_layer=False)
+    document.layer_manager.load_document(width, height, layers, active_index)
+    _edit(document)
+    assert project.save(document.layer_manager) == 1
+    # Tile yang tidak didekode tetap dibaca dari arsip yang sudah ditambah
+    _assert_same_document(document, path)
+
+
+def test_compaction_rewrites_only_live_tiles(tmp_path, monkeypatch):
+    path = str(tmp_path / "gambar.mpaint")
+    document = _document()
+    project = ProjectFile(path)
+    project.save(document.layer_manager)
+    _edit(document)
+    project.save(document.layer_manager)
+    assert project.generation == 2
+
+    # Sampah sekecil apa pun memicu compaction
+    monkeypatch.setattr(AppConfig, "PROJECT_COMPACT_RATIO", 0.0)
+    monkeypatch.setattr(AppConfig, "PROJECT_COMPACT_MIN_BYTES", 0)
+    document.draw_stroke("rectangle", [(10, 10), (60, 50)], "#405060", 8)
+    project.save(document.layer_manager)
+    assert project.generation == 1
+    assert _manifests(path) == ["manifest-000001.json"]
+    with zipfile.ZipFile(path) as archive:
+        tiles = [name for name in archive.namelist() if name.startswith("layers/")]
+    assert all(name.endswith(".g1.png") for name in tiles)
+    _assert_same_document(document, path)
+
+
+def test_failed_append_keeps_previous_generation(tmp_path, monkeypatch):
+    path = str(tmp_path / "gambar.mpaint")
+    document = _document()
+    project = ProjectFile(path)
+    project.save(document.layer_manager)
+    saved = _document()  # Isi generasi pertama, untuk pembanding
+
+    def failing_end_record(archive):
+        # Tile baru sudah menimpa central directory lama saat direktori baru gagal ditulis
+        raise OSError("disk penuh")
+
+    _edit(document)
+    monkeypatch.setattr(zipfile.ZipFile, "_write_end_record", failing_end_record)
+    with pytest.raises(OSError):
+        project.save(document.layer_manager)
+    monkeypatch.undo()
+
+    assert project.generation == 1
+    assert _manifests(path) == ["manifest-000001.json"]
+    _assert_same_document(saved, path)
+
+    # Simpan berikutnya tetap bisa menambah generasi baru
+    assert project.save(document.layer_manager) == 1
+    assert project.generation == 2
+    _assert_same_document(document, path)
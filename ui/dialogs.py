@@ -84,7 +84,49 @@ class ColorPickerDialog(tk.Toplevel):
         """Mengembalikan warna yang dipilih."""
         return self.result_color
 
+class CanvasSizeDialog(simpledialog.Dialog):
+    """
+    Dialog untuk mengubah ukuran dokumen (semua layer). Hasilnya berupa
+    tuple (lebar, tinggi) di atribut result, atau None jika dibatalkan.
+    """
+
+    def __init__(self, parent, width: int, height: int):
+        self.initial_size = (width, height)
+        super().__init__(parent, title="Ukuran Kanvas")
+
+    def body(self, master):
+        tk.Label(master, text="Lebar:").grid(row=0, column=0, sticky="w")
+        tk.Label(master, text="Tinggi:").grid(row=1, column=0, sticky="w")
+        self.width_entry = tk.Entry(master, width=8)
+        self.height_entry = tk.Entry(master, width=8)
+        self.width_entry.insert(0, str(self.initial_size[0]))
+        self.height_entry.insert(0, str(self.initial_size[1]))
+        self.width_entry.grid(row=0, column=1, padx=5, pady=2)
+        self.height_entry.grid(row=1, column=1, padx=5, pady=2)
+        tk.Label(master, text="Isi lama diletakkan di tengah.").grid(
+            row=2, column=0, columnspan=2, pady=5)
+        return self.width_entry  # Widget yang mendapat fokus awal
+
+    def validate(self):
+        try:
+            width = int(self.width_entry.get())
+            height = int(self.height_entry.get())
+        except ValueError:
+            messagebox.showerror("Ukuran Kanvas", "Lebar dan tinggi harus berupa angka.",
+                                 parent=self)
+            return False
+        if width < 1 or height < 1:
+            messagebox.showerror("Ukuran Kanvas", "Lebar dan tinggi minimal 1 piksel.",
+                                 parent=self)
+            return False
+        self.size = (width, height)
+        return True
+
+    def apply(self):
+        """Dipanggil saat tombol OK ditekan."""
+        self.result = self.size
+
+
 # Anda bisa menambahkan dialog lain di sini, seperti:
 # - SaveConfirmDialog (untuk mengkonfirmasi penyimpanan sebelum keluar)
-# - ResizeImageDialog
 # - TextPropertiesDialog
@@ -0,0 +1,416 @@
+# ui/layers_panel.py
+
+import math
+import queue
+import threading
+import time
+import tkinter as tk
+
+from PIL import Image, ImageTk
+
+# Import dari config
+from config import AppConfig
+
+from core.perf_stats import cache_stats
+from features.layer_manager import AdjustmentLayer, LayerGroup, FULL_BBOX
+from utils.log import get_logger
+from utils.tracing import traced
+
+log = get_logger("ui")
+
+# Hit: thumbnail lama diperbarui hanya di area kotor
+_thumbnail_cache = cache_stats("thumbnail")
+
+
+class ThumbnailCache:
+    """
+    Membuat thumbnail layer di thread latar belakang.
+
+    Thread UI hanya mengirim pekerjaan (gambar layer, area kotor, revisi) dan
+    mengambil hasil jadi melalui poll(); worker memperbarui thumbnail yang ada
+    hanya di area kotor, sehingga goresan kecil tidak memicu pengecilan ulang
+    seluruh layer. Worker memproses satu pekerjaan lalu jeda sejenak agar
+    thread UI tetap mendapat prioritas.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size or AppConfig.THUMBNAIL_SIZE
+        self._thumbnails = {}  # key -> (ukuran dokumen, PIL Image RGBA); hanya disentuh worker
+        self._pending = {}  # key -> pekerjaan; pekerjaan untuk key yang sama digabung
+        self._order = []  # Urutan key yang menunggu diproses
+        self._condition = threading.Condition()
+        self._results = queue.Queue()
+        self._running = True
+        self._worker = threading.Thread(
+            target=self._run, name="thumbnail-worker", daemon=True)
+        self._worker.start()
+
+    def thumbnail_size(self, width: int, height: int):
+        """
+        Ukuran thumbnail untuk dokumen berukuran width x height (rasio dipertahankan).
+        """
+        scale = min(self.max_size[0] / width, self.max_size[1] / height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def request(self, key, image, revision: int, region=FULL_BBOX, offset=(0, 0), doc_size=None):
+        """
+        Menjadwalkan pembaruan thumbnail.
+
+        Args:
+            key: Kunci layer (misal id(layer)).
+            image: PIL Image sumber. Tidak disalin; worker membacanya apa adanya.
+            revision (int): Revisi layer yang diwakili pekerjaan ini.
+            region (tuple): Area dokumen yang berubah, FULL_BBOX untuk seluruhnya.
+            offset (tuple): Posisi image di dokumen (untuk gambar terpotong).
+            doc_size (tuple): Ukuran dokumen; default ukuran image.
+        """
+        doc_size = doc_size or image.size
+        with self._condition:
+            if key not in self._pending:
+                self._order.append(key)
+            job = self._pending.get(key)
+            if job is None:
+                pass  # Pekerjaan baru (atau menggantikan penanda hapus)
+            elif job["doc_size"] == doc_size and job["offset"] == offset:
+                # Gabungkan area kotor dengan pekerjaan yang belum diproses
+                region = FULL_BBOX if FULL_BBOX in (region, job["region"]) else (
+                    min(region[0], job["region"][0]), min(region[1], job["region"][1]),
+                    max(region[2], job["region"][2]), max(region[3], job["region"][3]))
+            else:
+                region = FULL_BBOX
+            self._pending[key] = {"image": image, "revision": revision, "region": region,
+                                  "offset": offset, "doc_size": doc_size}
+            self._condition.notify()
+
+    def discard(self, keys):
+        """
+        Melupakan thumbnail layer yang sudah tidak ada.
+        """
+        with self._condition:
+            for key in keys:
+                if key not in self._pending:
+                    self._order.append(key)
+                # Penanda hapus; thumbnail dihapus oleh worker agar
+                # _thumbnails hanya disentuh satu thread
+                self._pending[key] = None
+            self._condition.notify()
+
+    def poll(self):
+        """
+        Mengambil semua hasil yang sudah selesai: list (key, revisi, PIL Image).
+        Dipanggil dari thread UI.
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        """
+        Menghentikan worker.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._order:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                key = self._order.pop(0)
+                job = self._pending.pop(key)
+
+            if job is None:
+                self._thumbnails.pop(key, None)
+                continue
+            try:
+                thumbnail = self._render(key, job)
+                self._results.put((key, job["revision"], thumbnail.copy()))
+            except Exception as e:  # Gambar bisa diganti saat dibaca; coba lagi di revisi berikutnya
+                log.warning("Gagal membuat thumbnail: %s", e)
+            time.sleep(AppConfig.THUMBNAIL_WORKER_DELAY_MS / 1000.0)
+
+    @traced("thumbnail", "ui")
+    def _render(self, key, job):
+        """
+        Memperbarui thumbnail untuk satu pekerjaan dan mengembalikannya.
+        """
+        doc_width, doc_height = job["doc_size"]
+        size = self.thumbnail_size(doc_width, doc_height)
+        cached = self._thumbnails.get(key)
+        region = job["region"]
+        if cached is None or cached[0] != job["doc_size"]:
+            thumbnail = Image.new("RGBA", size, (0, 0, 0, 0))
+            region = FULL_BBOX
+            _thumbnail_cache.misses += 1
+        else:
+            thumbnail = cached[1]
+            _thumbnail_cache.hits += 1
+
+        # Petakan area kotor ke piksel thumbnail yang utuh, lalu kembali ke
+        # koordinat dokumen agar potongan hasil resize pas tanpa celah
+        scale_x, scale_y = size[0] / doc_width, size[1] / doc_height
+        x1, y1 = max(0, region[0]), max(0, region[1])
+        x2, y2 = min(doc_width, region[2]), min(doc_height, region[3])
+        tx1, ty1 = int(x1 * scale_x), int(y1 * scale_y)
+        tx2 = min(size[0], math.ceil(x2 * scale_x))
+        ty2 = min(size[1], math.ceil(y2 * scale_y))
+        if tx2 > tx1 and ty2 > ty1:
+            image, (ox, oy) = job["image"], job["offset"]
+            source_box = (tx1 / scale_x - ox, ty1 / scale_y - oy,
+                          tx2 / scale_x - ox, ty2 / scale_y - oy)
+            # Area di luar gambar sumber (gambar terpotong) dianggap transparan
+            clipped = (max(0.0, source_box[0]), max(0.0, source_box[1]),
+                       min(float(image.width), source_box[2]),
+                       min(float(image.height), source_box[3]))
+            thumbnail.paste((0, 0, 0, 0), (tx1, ty1, tx2, ty2))
+            if clipped[2] > clipped[0] and clipped[3] > clipped[1]:
+                px1 = tx1 + round((clipped[0] - source_box[0]) * scale_x)
+                py1 = ty1 + round((clipped[1] - source_box[1]) * scale_y)
+                px2 = tx1 + round((clipped[2] - source_box[0]) * scale_x)
+                py2 = ty1 + round((clipped[3] - source_box[1]) * scale_y)
+                if px2 > px1 and py2 > py1:
+                    part = image.resize((px2 - px1, py2 - py1), Image.BILINEAR,
+                                        box=clipped, reducing_gap=2.0)
+                    thumbnail.paste(part.convert("RGBA"), (px1, py1))
+        self._thumbnails[key] = (job["doc_size"], thumbnail)
+        return thumbnail
+
+
+class LayersPanel:
+    """
+    Panel daftar layer dengan thumbnail.
+
+    Daftar divirtualisasi: hanya baris yang terlihat yang digambar di
+    tk.Canvas dan hanya layer di baris itu yang thumbnail-nya dibuat, sehingga
+    dokumen dengan ratusan layer tetap ringan. Panel memeriksa perubahan
+    secara berkala (THUMBNAIL_POLL_MS); selama goresan berlangsung thumbnail
+    hanya dijadwalkan sesekali (THUMBNAIL_STROKE_INTERVAL_MS).
+    """
+
+    INDENT = 12  # Indentasi per tingkat grup (px)
+    VISIBILITY_WIDTH = 20  # Lebar area klik untuk visibilitas di kiri baris
+
+    def __init__(self, parent_frame: tk.Frame, app_instance):
+        """
+        Inisialisasi panel layer.
+
+        Args:
+            parent_frame (tk.Frame): Frame Tkinter tempat panel ditempatkan.
+            app_instance: Instance dari kelas Application.
+        """
+        self.parent_frame = parent_frame
+        self.app = app_instance
+        self.cache = ThumbnailCache()
+
+        self._rows = []  # (layer, kedalaman, path indeks), urutan atas ke bawah
+        self._structure = None
+        self._requested = {}  # key -> revisi yang sudah dijadwalkan
+        self._thumbnails = {}  # key -> (revisi, PIL Image) hasil worker
+        self._photos = {}  # key -> PhotoImage, hanya untuk baris yang terlihat
+        self._visible_signature = None
+        self._last_stroke_schedule = 0.0
+
+        self._create_widgets()
+        self._tick()
+        log.debug("LayersPanel diinisialisasi.")
+
+    def _create_widgets(self):
+        """
+        Membuat kanvas daftar layer dan scrollbar-nya.
+        """
+        frame = tk.LabelFrame(self.parent_frame, text="Layers", padx=2, pady=2)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        self.scrollbar = tk.Scrollbar(frame, orient=tk.VERTICAL,
+                                      command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas = tk.Canvas(frame, width=AppConfig.LAYER_PANEL_WIDTH,
+                                bg="white", highlightthickness=0,
+                                yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Configure>", lambda event: self._redraw_rows())
+        self.canvas.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.canvas.bind("<Button-4>", self._on_mouse_wheel)
+        self.canvas.bind("<Button-5>", self._on_mouse_wheel)
+
+    def _collect_rows(self, layers=None, depth: int = 0, path=()):
+        """
+        Meratakan pohon layer menjadi baris, dari atas ke bawah.
+        """
+        rows = []
+        layers = self.app.layer_manager.layers if layers is None else layers
+        for index in range(len(layers) - 1, -1, -1):
+            layer = layers[index]
+            rows.append((layer, depth, path + (index,)))
+            if isinstance(layer, LayerGroup):
+                rows.extend(self._collect_rows(
+                    layer.children, depth + 1, path + (index,)))
+        return rows
+
+    def _tick(self):
+        """
+        Pemeriksaan berkala: struktur layer, penjadwalan thumbnail, dan hasil worker.
+        """
+        rows = self._collect_rows()
+        structure = [id(row[0]) for row in rows]
+        if structure != self._structure:
+            removed = set(self._structure or ()) - set(structure)
+            if removed:
+                self.cache.discard(removed)
+                for key in removed:
+                    self._requested.pop(key, None)
+                    self._thumbnails.pop(key, None)
+                    self._photos.pop(key, None)
+            self._rows, self._structure = rows, structure
+            self.canvas.configure(scrollregion=(
+                0, 0, 0, len(rows) * AppConfig.LAYER_ROW_HEIGHT))
+
+        now = time.monotonic()
+        stroking = self.app.canvas_manager.stroke_in_progress
+        if not stroking or now - self._last_stroke_schedule >= \
+                AppConfig.THUMBNAIL_STROKE_INTERVAL_MS / 1000.0:
+            self._last_stroke_schedule = now
+            self._schedule_thumbnails()
+
+        for key, revision, thumbnail in self.cache.poll():
+            if key in self._requested:
+                self._thumbnails[key] = (revision, thumbnail)
+                self._photos.pop(key, None)  # PhotoImage dibuat ulang saat digambar
+
+        self._redraw_rows()
+        self.canvas.after(AppConfig.THUMBNAIL_POLL_MS, self._tick)
+
+    def _visible_range(self):
+        """
+        Indeks baris pertama dan setelah terakhir yang terlihat.
+        """
+        row_height = AppConfig.LAYER_ROW_HEIGHT
+        top = int(self.canvas.canvasy(0))
+        height = max(self.canvas.winfo_height(), row_height)
+        first = max(0, top // row_height)
+        last = min(len(self._rows), (top + height) // row_height + 1)
+        return first, last
+
+    def _schedule_thumbnails(self):
+        """
+        Mengirim pekerjaan thumbnail untuk layer di baris yang terlihat dan berubah.
+        """
+        layer_manager = self.app.layer_manager
+        doc_size = (layer_manager.canvas_width, layer_manager.canvas_height)
+        first, last = self._visible_range()
+        for layer, _, _ in self._rows[first:last]:
+            key = id(layer)
+            requested = self._requested.get(key)
+            if requested == layer.revision:
+                continue
+            if isinstance(layer, LayerGroup):
+                flattened = layer.flattened
+                if flattened is None:
+                    continue  # Belum di-flatten ulang; coba lagi di tick berikutnya
+                image, bbox = flattened
+                if image is None:
+                    image, bbox = Image.new("RGBA", (1, 1), (0, 0, 0, 0)), (0, 0)
+                self.cache.request(key, image, layer.revision,
+                                   offset=bbox[:2], doc_size=doc_size)
+            elif layer.image is not None:
+                region = FULL_BBOX if requested is None else \
+                    layer.dirty_region_since(requested)
+                if region is not None:
+                    self.cache.request(key, layer.image,
+                                       layer.revision, region, doc_size=doc_size)
+            self._requested[key] = layer.revision
+
+    def _redraw_rows(self):
+        """
+        Menggambar ulang hanya baris yang terlihat, dan hanya jika ada yang berubah.
+        """
+        first, last = self._visible_range()
+        active = self.app.layer_manager.get_active_layer()
+        signature = (first, last, self.canvas.winfo_width(), id(active), tuple(
+            (id(layer), layer.name, layer.is_visible, id(self._thumbnails.get(id(layer))))
+            for layer, _, _ in self._rows[first:last]))
+        if signature == self._visible_signature:
+            return
+        self._visible_signature = signature
+
+        self.canvas.delete("row")
+        visible_keys = set()
+        row_height = AppConfig.LAYER_ROW_HEIGHT
+        width = max(self.canvas.winfo_width(), AppConfig.LAYER_PANEL_WIDTH)
+        for index in range(first, last):
+            layer, depth, _ = self._rows[index]
+            key = id(layer)
+            visible_keys.add(key)
+            y = index * row_height
+            fill = "#CCE0FF" if layer is active else "white"
+            self.canvas.create_rectangle(0, y, width, y + row_height, fill=fill,
+                                         outline="#DDDDDD", tags="row")
+            self.canvas.create_text(self.VISIBILITY_WIDTH // 2, y + row_height // 2,
+                                    text="●" if layer.is_visible else "○",
+                                    tags="row")
+
+            x = self.VISIBILITY_WIDTH + depth * self.INDENT
+            photo = self._photo_for(key)
+            if photo is not None:
+                self.canvas.create_image(x, y + row_height // 2, anchor="w",
+                                         image=photo, tags="row")
+            elif isinstance(layer, AdjustmentLayer):
+                self.canvas.create_text(x + AppConfig.THUMBNAIL_SIZE[0] // 2,
+                                        y + row_height // 2, text="fx", tags="row")
+            name = f"[{layer.name}]" if isinstance(layer, LayerGroup) else layer.name
+            self.canvas.create_text(x + AppConfig.THUMBNAIL_SIZE[0] + 6, y + row_height // 2,
+                                    anchor="w", text=name, tags="row")
+
+        # PhotoImage hanya disimpan untuk baris yang terlihat
+        for key in list(self._photos):
+            if key not in visible_keys:
+                del self._photos[key]
+
+    def _photo_for(self, key):
+        """
+        Mengembalikan PhotoImage thumbnail (di atas latar abu-abu muda), atau None.
+        """
+        photo = self._photos.get(key)
+        if photo is None and key in self._thumbnails:
+            thumbnail = self._thumbnails[key][1]
+            background = Image.new("RGBA", thumbnail.size, "#E8E8E8")
+            background.alpha_composite(thumbnail)
+            photo = ImageTk.PhotoImage(background)
+            self._photos[key] = photo
+        return photo
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self._redraw_rows()
+
+    def _on_mouse_wheel(self, event):
+        step = -1 if event.num == 4 or event.delta > 0 else 1
+        self.canvas.yview_scroll(step, "units")
+        self._redraw_rows()
+
+    def _on_click(self, event):
+        """
+        Klik di kiri baris mengubah visibilitas; di tempat lain memilih layer.
+        """
+        index = int(self.canvas.canvasy(event.y)) // AppConfig.LAYER_ROW_HEIGHT
+        if not 0 <= index < len(self._rows):
+            return
+        layer, _, path = self._rows[index]
+        if event.x < self.VISIBILITY_WIDTH:
+            layer.set_visible(not layer.is_visible)
+            self.app.canvas_manager.refresh_composite()
+        else:
+            self.app.layer_manager.set_active_layer(path[0])
+            group = self.app.layer_manager.layers[path[0]]
+            for child_index in path[1:]:
+                group.set_active_child(child_index)
+                group = group.children[child_index]
+        self._redraw_rows()
@@ -1,22 +1,15 @@
 # ui/main_window.py
 
 import tkinter as tk
-from tkinter import filedialog
-from tkinter import colorchooser
-import os
-import time  # Import time untuk mensimulasikan jeda atau debugging waktu
 
 # Import dari config
 from config import AppConfig
+from utils.log import get_logger
 
-# Import dari core
-from core.canvas_manager import CanvasManager
-# from core.application import Application # Tidak perlu import melingkar, Application akan meneruskan dirinya sendiri
+# Dialog (tkinter.filedialog, colorchooser, ui.dialogs) diimpor saat pertama
+# dibuka agar tidak menambah waktu startup
 
-# Import dari ui lainnya
-from ui.menus import MainMenu
-from ui.toolbars import ToolbarPanel
-from ui.dialogs import AboutDialog, ColorPickerDialog
+log = get_logger("ui")
 
 
 class MainWindow:
@@ -35,24 +28,8 @@ class MainWindow:
         self.root = root
         self.app = app_instance
 
-        # --- Tampilan Loading Awal ---
-        self.loading_frame = tk.Frame(self.root, bg="#333333")
-        self.loading_frame.pack(fill="both", expand=True)
-
-        tk.Label(self.loading_frame, text="Aplikasi Paint Kompleks - Membangun...",
-                 fg="white", bg="#333333", font=("Arial", 16)).pack(pady=50)
-        tk.Label(self.loading_frame, text="Mohon tunggu sebentar...",
-                 fg="white", bg="#333333", font=("Arial", 12)).pack(pady=10)
-
-        # Paksa Tkinter untuk memperbarui jendela agar frame loading terlihat segera
-        self.root.update_idletasks()
-        # Untuk tujuan demonstrasi, tambahkan jeda singkat
-        # time.sleep(1) # Hapus atau komen ini untuk penggunaan produksi
-
-        print("MainWindow: Loading frame ditampilkan.")
-
-        # --- Lanjutkan Inisialisasi UI Utama ---
-        # Ini akan dilakukan setelah jeda/pemrosesan simulasi selesai
+        # Tanpa layar loading: jendela baru tergambar setelah __init__ selesai,
+        # dan hanya yang dibutuhkan frame pertama yang dibangun di sini
         self._create_main_frames()
 
         # Set teks awal di status bar
@@ -62,14 +39,10 @@ class MainWindow:
         # Menampilkan di title bar
         self.root.title(f"{AppConfig.WINDOW_TITLE} - Made by ade7")
 
-        # Setelah semua frame utama dibuat, sembunyikan/hapus loading frame
-        self.loading_frame.destroy()
-        print("MainWindow: Loading frame disembunyikan. UI utama ditampilkan.")
-
         # Catatan: canvas_manager, main_menu, dan toolbar_panel diinisialisasi oleh Application
         # dan referensinya akan tersedia melalui self.app.canvas_manager, dll.
 
-        print("MainWindow diinisialisasi. Frames UI utama dibuat.")
+        log.debug("MainWindow diinisialisasi. Frames UI utama dibuat.")
 
     def _create_main_frames(self):
         """
@@ -78,14 +51,23 @@ class MainWindow:
         # Frame atas untuk toolbar
         self.top_frame = tk.Frame(self.root, bd=2, relief=tk.RAISED)
         self.top_frame.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
-        print("MainWindow: Top frame untuk toolbar dibuat.")
+        log.debug("MainWindow: Top frame untuk toolbar dibuat.")
+
+        # Frame samping kanan untuk panel layer (dibuat sebelum kanvas agar
+        # tidak terdesak saat jendela dikecilkan)
+        # Lebar panel layer dipesan sejak awal: panelnya baru dibuat setelah
+        # frame pertama (lihat Application.run) dan tata letak tidak bergeser
+        self.side_frame = tk.Frame(self.root, bd=2, relief=tk.GROOVE,
+                                   width=AppConfig.LAYER_PANEL_WIDTH)
+        self.side_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5, pady=5)
+        log.debug("MainWindow: Side frame untuk panel layer dibuat.")
 
         # Frame untuk kanvas gambar
         self.canvas_frame = tk.Frame(
             self.root, bd=2, relief=tk.SUNKEN, bg="gray")
         self.canvas_frame.pack(side=tk.TOP, fill=tk.BOTH,
                                expand=True, padx=5, pady=5)
-        print("MainWindow: Canvas frame dibuat.")
+        log.debug("MainWindow: Canvas frame dibuat.")
 
         # Frame bawah untuk status bar atau kontrol tambahan
         self.bottom_frame = tk.Frame(self.root, bd=2, relief=tk.SUNKEN)
@@ -95,7 +77,7 @@ class MainWindow:
         # Diubah agar teks awal diatur setelahnya
         self.status_label = tk.Label(self.bottom_frame, text="", anchor="w")
         self.status_label.pack(side=tk.LEFT, padx=5, pady=2)
-        print("MainWindow: Bottom frame dan status bar dibuat.")
+        log.debug("MainWindow: Bottom frame dan status bar dibuat.")
 
     def update_status(self, message: str):
         """
@@ -109,26 +91,44 @@ class MainWindow:
         """
         Membuka dialog untuk memilih dan membuka file gambar.
         """
+        from tkinter import filedialog
         file_path = filedialog.askopenfilename(
             initialdir=".",
             title="Pilih Gambar",
             filetypes=(
-                ("Image files", "*.png *.jpg *.jpeg *.gif *.bmp"), ("All files", "*.*"))
+                ("Image files", "*.png *.jpg *.jpeg *.gif *.bmp"),
+                ("Mini Paint project", "*.mpaint"), ("All files", "*.*"))
         )
         if file_path:
             self.app.open_image(file_path)
             # self.update_status(f"Membuka: {os.path.basename(file_path)}") # Sudah dihandle di app.open_image
 
+    def import_files(self):
+        """
+        Membuka dialog pilih-banyak untuk mengimpor gambar sebagai layer.
+        """
+        from tkinter import filedialog
+        file_paths = filedialog.askopenfilenames(
+            initialdir=".",
+            title="Impor Gambar sebagai Layer",
+            filetypes=(
+                ("Image files", "*.png *.jpg *.jpeg *.gif *.bmp"), ("All files", "*.*"))
+        )
+        if file_paths:
+            self.app.import_images(list(file_paths))
+
     def save_file(self):
         """
         Membuka dialog untuk menyimpan gambar ke file.
         """
+        from tkinter import filedialog
         file_path = filedialog.asksaveasfilename(
             initialdir=".",
             title="Simpan Gambar Sebagai",
             defaultextension=".png",
             filetypes=(("PNG files", "*.png"),
-                       ("JPEG files", "*.jpg"), ("All files", "*.*"))
+                       ("JPEG files", "*.jpg"),
+                       ("Mini Paint project", "*.mpaint"), ("All files", "*.*"))
         )
         if file_path:
             self.app.save_image(file_path)
@@ -138,12 +138,14 @@ class MainWindow:
         """
         Menampilkan dialog 'Tentang Aplikasi'.
         """
+        from ui.dialogs import AboutDialog
         AboutDialog(self.root)
 
     def show_color_picker(self):
         """
         Menampilkan dialog pemilih warna.
         """
+        from tkinter import colorchooser
         selected_color_tuple, selected_color_hex = colorchooser.askcolor(
             parent=self.root, initialcolor=self.app.current_color)
         # Pastikan pengguna memilih warna (bukan membatalkan)
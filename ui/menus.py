@@ -2,6 +2,10 @@
 
 import tkinter as tk
 
+from utils.log import get_logger
+
+log = get_logger("ui")
+
 
 class MainMenu:
     """
@@ -23,10 +27,12 @@ class MainMenu:
 
         self._create_file_menu()
         self._create_edit_menu()
+        self._create_layer_menu()
+        self._create_view_menu()
         self._create_tools_menu()
         self._create_help_menu()
 
-        print("Menu bar diinisialisasi.")
+        log.debug("Menu bar diinisialisasi.")
 
     def _create_file_menu(self):
         """
@@ -39,7 +45,10 @@ class MainMenu:
         file_menu.add_command(
             label="Open...", command=self.app.main_window.open_file, accelerator="Ctrl+O")
         file_menu.add_command(
-            label="Save", command=self.app.main_window.save_file, accelerator="Ctrl+S")
+            label="Import as Layers...", command=self.app.main_window.import_files,
+            accelerator="Ctrl+Shift+O")
+        file_menu.add_command(
+            label="Save", command=self.app.save, accelerator="Ctrl+S")
         file_menu.add_command(
             label="Save As...", command=self.app.main_window.save_file, accelerator="Ctrl+Shift+S")
         file_menu.add_separator()
@@ -50,11 +59,13 @@ class MainMenu:
             "<Control-n>", lambda event: self.app.clear_canvas())
         self.root.bind_all(
             "<Control-o>", lambda event: self.app.main_window.open_file())
+        self.root.bind_all("<Control-Shift-O>",
+                           lambda event: self.app.main_window.import_files())
         self.root.bind_all(
-            "<Control-s>", lambda event: self.app.main_window.save_file())
+            "<Control-s>", lambda event: self.app.save())
         self.root.bind_all("<Control-Shift-s>",
                            lambda event: self.app.main_window.save_file())
-        print("Menu 'File' dibuat.")
+        log.debug("Menu 'File' dibuat.")
 
     def _create_edit_menu(self):
         """
@@ -69,11 +80,62 @@ class MainMenu:
         edit_menu.add_separator()
         edit_menu.add_command(label="Clear Canvas",
                               command=self.app.clear_canvas)
+        edit_menu.add_command(label="Canvas Size...",
+                              command=self.app.resize_canvas_dialog)
 
         # Bind keyboard shortcuts
         self.root.bind_all("<Control-z>", lambda event: self.app.undo())
         self.root.bind_all("<Control-y>", lambda event: self.app.redo())
-        print("Menu 'Edit' dibuat.")
+        log.debug("Menu 'Edit' dibuat.")
+
+    def _create_layer_menu(self):
+        """
+        Membuat menu 'Layer'.
+        """
+        layer_menu = tk.Menu(self.menubar, tearoff=0)
+        self.menubar.add_cascade(label="Layer", menu=layer_menu)
+        layer_menu.add_command(
+            label="New Layer", command=lambda: self.app.layer_manager.add_layer())
+
+        # Adjustment layer non-destruktif
+        adjustment_menu = tk.Menu(layer_menu, tearoff=0)
+        layer_menu.add_cascade(label="New Adjustment Layer",
+                               menu=adjustment_menu)
+        for label, kind in (("Brightness", "brightness"), ("Contrast", "contrast"),
+                            ("Grayscale", "grayscale"), ("Sepia", "sepia"),
+                            ("Invert", "invert"), ("Blur", "blur"), ("Sharpen", "sharpen")):
+            adjustment_menu.add_command(
+                label=label, command=lambda k=kind: self.app.add_adjustment_layer(k))
+        layer_menu.add_command(label="Edit Adjustment...",
+                               command=self.app.edit_active_adjustment)
+        layer_menu.add_separator()
+        layer_menu.add_command(
+            label="Group Layer", command=self.app.group_active_layer)
+        layer_menu.add_command(
+            label="Ungroup", command=self.app.ungroup_active_layer)
+        layer_menu.add_separator()
+        layer_menu.add_command(
+            label="Merge Down", command=self.app.merge_down)
+        layer_menu.add_command(
+            label="Merge Visible", command=self.app.merge_visible)
+        layer_menu.add_command(
+            label="Flatten Image", command=self.app.flatten_image)
+        log.debug("Menu 'Layer' dibuat.")
+
+    def _create_view_menu(self):
+        """
+        Membuat menu 'View'.
+        """
+        view_menu = tk.Menu(self.menubar, tearoff=0)
+        self.menubar.add_cascade(label="View", menu=view_menu)
+        # Disinkronkan oleh Application.toggle_perf_hud (juga dipanggil lewat F3)
+        self.perf_hud_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(
+            label="Performance HUD", variable=self.perf_hud_var,
+            command=self.app.toggle_perf_hud, accelerator="F3")
+
+        self.root.bind_all("<F3>", lambda event: self.app.toggle_perf_hud())
+        log.debug("Menu 'View' dibuat.")
 
     def _create_tools_menu(self):
         """
@@ -93,7 +155,7 @@ class MainMenu:
         tools_menu.add_separator()
         tools_menu.add_command(label="Color Picker...",
                                command=self.app.main_window.show_color_picker)
-        print("Menu 'Tools' dibuat.")
+        log.debug("Menu 'Tools' dibuat.")
 
     def _create_help_menu(self):
         """
@@ -103,4 +165,4 @@ class MainMenu:
         self.menubar.add_cascade(label="Help", menu=help_menu)
         help_menu.add_command(
             label="About", command=self.app.main_window.show_about_dialog)
-        print("Menu 'Help' dibuat.")
+        log.debug("Menu 'Help' dibuat.")
@@ -0,0 +1,126 @@
+# ui/perf_hud.py
+
+import tkinter as tk
+
+from config import AppConfig
+from core.perf_stats import FRAME_STAGES, FrameTimer, all_cache_stats, history_bytes
+from utils.log import get_logger
+
+log = get_logger("ui")
+
+_HUD_TAG = "perf_hud"
+
+
+def _format_ms(value) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+def _format_mb(nbytes: int) -> str:
+    return f"{nbytes / (1024 * 1024):.1f} MB"
+
+
+class PerfHud:
+    """
+    HUD performa: FPS, latensi input ke layar, waktu per tahap pipeline
+    tampilan (lihat core.perf_stats.FrameTimer), memori riwayat undo/redo,
+    dan rasio hit cache.
+
+    Teks HUD diperbarui dengan timer (AppConfig.PERF_HUD_REFRESH_MS), bukan
+    di setiap frame, agar HUD sendiri tidak menambah waktu frame yang diukur.
+    Ditampilkan sebagai overlay di pojok kiri atas kanvas atau sebagai label
+    di status bar (AppConfig.PERF_HUD_LOCATION).
+    """
+
+    def __init__(self, app_instance, location: str = None):
+        self.app = app_instance
+        self.location = location or AppConfig.PERF_HUD_LOCATION
+        if self.location not in ("canvas", "status"):
+            raise ValueError(f"Lokasi HUD '{self.location}' tidak dikenal.")
+        self.timer = None
+        self._after_id = None
+        self._text_item = None
+        self._background_item = None
+        self._label = None
+
+    @property
+    def visible(self) -> bool:
+        return self.timer is not None
+
+    def show(self):
+        if self.visible:
+            return
+        # Rasio hit dihitung sejak HUD dibuka agar mencerminkan sesi yang diamati
+        for stats in all_cache_stats():
+            stats.reset()
+        self.timer = FrameTimer()
+        self.app.canvas_manager.frame_timer = self.timer
+        self._refresh()
+        log.debug("HUD performa ditampilkan (%s).", self.location)
+
+    def hide(self):
+        if not self.visible:
+            return
+        self.app.canvas_manager.frame_timer = None
+        self.timer = None
+        if self._after_id is not None:
+            self.app.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.app.canvas_manager.canvas.delete(_HUD_TAG)
+        self._text_item = self._background_item = None
+        if self._label is not None:
+            self._label.destroy()
+            self._label = None
+        log.debug("HUD performa disembunyikan.")
+
+    def lines(self):
+        """
+        Baris teks HUD dari statistik saat ini.
+        """
+        timer = self.timer
+        latency = sorted(timer.latency)
+        means = timer.stage_means()
+        document = self.app.document
+        undo_bytes = history_bytes(document.undo_history)
+        redo_bytes = history_bytes(document.redo_history)
+        caches = "  ".join(
+            f"{stats.name} {'-' if stats.hit_rate is None else f'{stats.hit_rate:.0%}'}"
+            for stats in all_cache_stats())
+        return [
+            f"FPS {timer.fps()}  input->layar {_format_ms(latency[len(latency) // 2] if latency else None)} ms"
+            f" (maks {_format_ms(latency[-1] if latency else None)})",
+            "  ".join(f"{stage} {_format_ms(means[stage])}" for stage in FRAME_STAGES) + " ms",
+            f"undo {len(document.undo_history)} ({_format_mb(undo_bytes)})"
+            f"  redo {len(document.redo_history)} ({_format_mb(redo_bytes)})",
+            f"cache {caches}",
+        ]
+
+    def _refresh(self):
+        self._after_id = None
+        if not self.visible:
+            return
+        if self.location == "canvas":
+            self._draw_on_canvas("\n".join(self.lines()))
+        else:
+            self._draw_in_status_bar("  |  ".join(self.lines()))
+        self._after_id = self.app.root.after(AppConfig.PERF_HUD_REFRESH_MS, self._refresh)
+
+    def _draw_on_canvas(self, text: str):
+        canvas = self.app.canvas_manager.canvas
+        # Item bisa terhapus oleh canvas.delete("all") saat kanvas dikosongkan
+        if self._text_item is None or not canvas.type(self._text_item):
+            self._background_item = canvas.create_rectangle(
+                0, 0, 0, 0, fill="#202020", outline="", tags=_HUD_TAG)
+            self._text_item = canvas.create_text(
+                8, 6, anchor="nw", fill="#E0FFE0", font=("TkFixedFont", 9),
+                tags=_HUD_TAG)
+        canvas.itemconfig(self._text_item, text=text)
+        x1, y1, x2, y2 = canvas.bbox(self._text_item)
+        canvas.coords(self._background_item, x1 - 4, y1 - 3, x2 + 4, y2 + 3)
+        canvas.tag_raise(_HUD_TAG)
+
+    def _draw_in_status_bar(self, text: str):
+        if self._label is None:
+            self._label = tk.Label(self.app.main_window.bottom_frame, anchor="e",
+                                   font=("TkFixedFont", 8))
+            self._label.pack(side=tk.RIGHT, padx=5, pady=2)
+        self._label.config(text=text)
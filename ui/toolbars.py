@@ -8,6 +8,9 @@ from config import AppConfig
 
 # Import dari utilitas warna
 from utils.color_utils import hex_to_rgb  # Untuk pratinjau warna
+from utils.log import get_logger
+
+log = get_logger("ui")
 
 
 class ToolbarPanel:
@@ -32,7 +35,7 @@ class ToolbarPanel:
         self._create_action_toolbar()  # Untuk undo/redo/clear/save
 
         self.update_ui_elements()  # Memastikan UI mencerminkan keadaan aplikasi saat ini
-        print("ToolbarPanel diinisialisasi.")
+        log.debug("ToolbarPanel diinisialisasi.")
 
     def _create_tool_toolbar(self):
         """
@@ -65,7 +68,7 @@ class ToolbarPanel:
         self.tool_buttons["rectangle"] = rect_button
 
         # Tambahkan lebih banyak tombol alat di sini
-        print("Toolbar alat dibuat.")
+        log.debug("Toolbar alat dibuat.")
 
     def _create_brush_toolbar(self):
         """
@@ -89,7 +92,7 @@ class ToolbarPanel:
         self.brush_size_label = tk.Label(
             brush_frame, text=f"{self.app.current_brush_size} px")
         self.brush_size_label.pack(side=tk.LEFT, padx=2, pady=2)
-        print("Toolbar ukuran kuas dibuat.")
+        log.debug("Toolbar ukuran kuas dibuat.")
 
     def _on_brush_size_change(self, value):
         """
@@ -123,7 +126,7 @@ class ToolbarPanel:
             swatch.pack(side=tk.LEFT, padx=1, pady=1)
             swatch.bind("<Button-1>", lambda e,
                         c=color_hex: self.app.set_color(c))
-        print("Toolbar warna dibuat.")
+        log.debug("Toolbar warna dibuat.")
 
     def _create_action_toolbar(self):
         """
@@ -146,9 +149,9 @@ class ToolbarPanel:
         clear_button.pack(side=tk.LEFT, padx=2, pady=2)
 
         save_button = tk.Button(action_frame, text="Save",
-                                command=self.app.main_window.save_file)
+                                command=self.app.save)
         save_button.pack(side=tk.LEFT, padx=2, pady=2)
-        print("Toolbar aksi dibuat.")
+        log.debug("Toolbar aksi dibuat.")
 
     def update_ui_elements(self):
         """
@@ -168,4 +171,4 @@ class ToolbarPanel:
                 button.config(relief=tk.SUNKEN, bd=2)
             else:
                 button.config(relief=tk.RAISED, bd=2)
-        print("Elemen UI diperbarui.")
+        log.debug("Elemen UI diperbarui.")
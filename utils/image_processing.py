@@ -4,6 +4,10 @@
 # Misalnya, Pillow (PIL Fork) adalah pilihan umum:
 # from PIL import Image, ImageTk
 
+from utils.log import get_logger
+
+log = get_logger("image")
+
 def resize_image(image_data, new_width: int, new_height: int):
     """
     Mengubah ukuran gambar.
@@ -22,7 +26,7 @@ def resize_image(image_data, new_width: int, new_height: int):
     # img = Image.open(io.BytesIO(image_data))
     # img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
     # return img
-    print(f"Mengubah ukuran gambar ke {new_width}x{new_height}. (Placeholder)")
+    log.debug("Mengubah ukuran gambar ke %dx%d. (Placeholder)", new_width, new_height)
     return image_data  # Mengembalikan data asli untuk placeholder
 
 
@@ -45,8 +49,8 @@ def crop_image(image_data, x: int, y: int, width: int, height: int):
     # img = Image.open(io.BytesIO(image_data))
     # img = img.crop((x, y, x + width, y + height))
     # return img
-    print(
-        f"Memotong gambar dari ({x},{y}) dengan ukuran {width}x{height}. (Placeholder)")
+    log.debug("Memotong gambar dari (%d,%d) dengan ukuran %dx%d. (Placeholder)",
+              x, y, width, height)
     return image_data  # Mengembalikan data asli untuk placeholder
 
 
@@ -65,7 +69,7 @@ def convert_to_grayscale(image_data):
     # img = Image.open(io.BytesIO(image_data))
     # img = img.convert("L") # "L" untuk skala abu-abu
     # return img
-    print("Mengonversi gambar ke skala abu-abu. (Placeholder)")
+    log.debug("Mengonversi gambar ke skala abu-abu. (Placeholder)")
     return image_data  # Mengembalikan data asli untuk placeholder
 
 # Anda dapat menambahkan fungsi pemrosesan gambar lainnya di sini,
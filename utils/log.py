@@ -0,0 +1,155 @@
+# utils/log.py
+"""
+Logging ringan per subsistem.
+
+Setiap modul mengambil logger untuk subsistemnya sekali saat diimpor:
+
+    log = get_logger("canvas")
+    log.debug("Mouse dilepas di (%d, %d).", x, y)
+
+Pesan diformat secara malas (gaya %, hanya jika level aktif), sehingga
+pemanggilan yang levelnya nonaktif cukup satu perbandingan integer. Level
+per subsistem diatur di AppConfig.LOG_LEVELS dan dapat ditimpa lewat
+variabel lingkungan MINI_PAINT_LOG, misal "canvas=DEBUG,default=WARNING".
+
+Modul logging bawaan sengaja tidak dipakai: impornya saja memakan belasan
+milidetik waktu startup, dan fitur handler/propagasinya tidak dibutuhkan.
+"""
+
+import os
+import sys
+import threading
+import time
+
+from config import AppConfig
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING,
+               "ERROR": ERROR, "OFF": OFF}
+_LEVEL_LABELS = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARN", ERROR: "ERROR"}
+
+_loggers = {}
+_levels = {}  # Level per subsistem; kunci "default" untuk yang tidak disebut
+_stream = None
+_lock = threading.Lock()  # Baris dari thread pekerja tidak saling menyela
+
+
+def parse_level(value) -> int:
+    """
+    Mengubah nama level ("debug", "INFO", ...) atau angka menjadi level integer.
+    """
+    if isinstance(value, int):
+        return value
+    try:
+        return LEVEL_NAMES[str(value).strip().upper()]
+    except KeyError:
+        raise ValueError(f"Level log '{value}' tidak dikenal.")
+
+
+class Logger:
+    """
+    Logger untuk satu subsistem. Level disimpan langsung di objek agar
+    pemeriksaan di jalur panas tidak perlu mencari di dict.
+    """
+
+    __slots__ = ("name", "level")
+
+    def __init__(self, name: str, level: int):
+        self.name = name
+        self.level = level
+
+    def enabled(self, level: int) -> bool:
+        """
+        True jika pesan pada level ini akan ditulis; berguna untuk menghindari
+        perhitungan argumen yang mahal.
+        """
+        return level >= self.level
+
+    def debug(self, message: str, *args):
+        if self.level <= DEBUG:
+            _emit(self.name, DEBUG, message, args)
+
+    def info(self, message: str, *args):
+        if self.level <= INFO:
+            _emit(self.name, INFO, message, args)
+
+    def warning(self, message: str, *args):
+        if self.level <= WARNING:
+            _emit(self.name, WARNING, message, args)
+
+    def error(self, message: str, *args):
+        if self.level <= ERROR:
+            _emit(self.name, ERROR, message, args)
+
+
+def _emit(name: str, level: int, message: str, args):
+    if args:
+        try:
+            message = message % args
+        except (TypeError, ValueError) as e:
+            message = f"{message} {args!r} (format gagal: {e})"
+    line = f"{time.strftime('%H:%M:%S')} {_LEVEL_LABELS.get(level, level)} [{name}] {message}\n"
+    stream = _stream or sys.stderr
+    with _lock:
+        stream.write(line)
+        stream.flush()
+
+
+def get_logger(name: str) -> Logger:
+    """
+    Mengembalikan logger subsistem (dibuat sekali, lalu dipakai ulang).
+    """
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = Logger(name, _level_for(name))
+    return logger
+
+
+def _level_for(name: str) -> int:
+    return _levels.get(name, _levels.get("default", INFO))
+
+
+def set_level(name: str, level):
+    """
+    Mengubah level satu subsistem saat aplikasi berjalan; "default" mengubah
+    level semua subsistem yang tidak diatur tersendiri.
+    """
+    _levels[name] = parse_level(level)
+    for logger in _loggers.values():
+        logger.level = _level_for(logger.name)
+
+
+def configure(levels: dict = None, env: str = None, stream=None):
+    """
+    Mengatur level dari dict {subsistem: level} (default AppConfig.LOG_LEVELS)
+    lalu menimpanya dengan string MINI_PAINT_LOG ("nama=LEVEL,...").
+
+    Args:
+        stream (optional): Tujuan tulis (default sys.stderr).
+    """
+    global _stream
+    _levels.clear()
+    for name, level in (AppConfig.LOG_LEVELS if levels is None else levels).items():
+        _levels[name] = parse_level(level)
+    env = os.environ.get("MINI_PAINT_LOG", "") if env is None else env
+    for item in filter(None, (part.strip() for part in env.split(","))):
+        name, separator, level = item.partition("=")
+        try:
+            if separator:
+                _levels[name.strip()] = parse_level(level)
+            else:
+                _levels["default"] = parse_level(name)  # "DEBUG" saja = semua
+        except ValueError as e:
+            sys.stderr.write(f"MINI_PAINT_LOG: {e}\n")
+    if stream is not None:
+        _stream = stream
+    for logger in _loggers.values():
+        logger.level = _level_for(logger.name)
+
+
+configure()
@@ -0,0 +1,146 @@
+# utils/profiling.py
+"""
+Mode profil sesi (main.py --profile): cProfile untuk waktu CPU dan
+tracemalloc untuk alokasi memori, dengan laporan teks yang dikelompokkan
+per subsistem (core, features, ui, utils).
+
+cProfile hanya mengukur thread utama (thread Tk). Pekerjaan di thread
+pekerja tetap terlihat lewat tracemalloc dan lewat main.py --trace-spans.
+Buffer piksel Pillow dialokasikan di luar alokator Python, sehingga tidak
+tercatat oleh tracemalloc; karena itu puncak RSS proses juga dilaporkan.
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+from config import AppConfig
+from utils.log import get_logger
+
+log = get_logger("app")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUBSYSTEMS = ("core", "features", "ui", "utils")
+OTHER = "lainnya"  # Pustaka standar, Pillow, NumPy, Tk, dan fungsi bawaan
+# Pembungkus @traced hanya meneruskan panggilan; waktu kumulatifnya
+# menduplikasi fungsi yang dibungkus, jadi tidak ditampilkan
+_PASS_THROUGH = (os.path.join(REPO_DIR, "utils", "tracing.py"), "wrapper")
+
+
+def subsystem_of(filename: str) -> str:
+    """
+    Subsistem aplikasi untuk sebuah path file sumber; file di akar repo
+    (main.py, config.py) dianggap bagian dari "core".
+    """
+    path = os.path.abspath(filename) if filename and filename[0] not in "<~" else ""
+    if not path.startswith(REPO_DIR + os.sep):
+        return OTHER
+    parts = os.path.relpath(path, REPO_DIR).split(os.sep)
+    if len(parts) == 1:
+        return "core"
+    return parts[0] if parts[0] in SUBSYSTEMS else OTHER
+
+
+def _peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KiB, macOS byte
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _format_bytes(nbytes: int) -> str:
+    return f"{nbytes / (1024 * 1024):.1f} MB"
+
+
+class SessionProfiler:
+    """
+    Menjalankan cProfile dan tracemalloc selama satu sesi lalu menulis laporan.
+
+    Contoh:
+        profiler = SessionProfiler("profil.txt")
+        profiler.start()
+        ...
+        profiler.stop()  # Menulis profil.txt dan profil.txt.pstats
+    """
+
+    def __init__(self, report_path: str, top: int = None):
+        self.report_path = report_path
+        self.top = top or AppConfig.PROFILE_TOP_ENTRIES
+        self._profile = cProfile.Profile()
+        self._start = None
+
+    def start(self):
+        tracemalloc.start(AppConfig.PROFILE_TRACEMALLOC_FRAMES)
+        self._start = time.perf_counter()
+        self._profile.enable()
+        log.info("Profil sesi aktif (laporan: %s).", self.report_path)
+
+    def stop(self):
+        """
+        Menghentikan profil, menulis laporan teks dan data pstats mentah
+        (report_path + ".pstats", untuk dibuka dengan snakeviz dan sejenisnya).
+        """
+        self._profile.disable()
+        duration = time.perf_counter() - self._start
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = pstats.Stats(self._profile)
+        stats.dump_stats(self.report_path + ".pstats")
+        report = self.format_report(stats, snapshot, duration, peak)
+        with open(self.report_path, "w", encoding="utf-8") as report_file:
+            report_file.write(report)
+        log.info("Laporan profil ditulis: %s", self.report_path)
+
+    def format_report(self, stats, snapshot, duration: float, peak: int) -> str:
+        functions = {name: [] for name in SUBSYSTEMS + (OTHER,)}
+        for (filename, lineno, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            if (filename, function) == _PASS_THROUGH:
+                continue
+            functions[subsystem_of(filename)].append(
+                (cumulative, own, calls, f"{os.path.basename(filename)}:{lineno} {function}"))
+
+        allocations = {name: [] for name in SUBSYSTEMS + (OTHER,)}
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        for statistic in snapshot.statistics("lineno"):
+            frame = statistic.traceback[0]
+            subsystem = subsystem_of(frame.filename)
+            filename = frame.filename
+            if subsystem != OTHER:
+                filename = os.path.relpath(filename, REPO_DIR)
+            allocations[subsystem].append(
+                (statistic.size, statistic.count, f"{filename}:{frame.lineno}"))
+
+        rss = _peak_rss_bytes()
+        lines = [
+            "Profil sesi mini-paint",
+            f"Waktu: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Durasi: {duration:.2f} detik (termasuk overhead profil)",
+            f"Memori puncak Python (tracemalloc): {_format_bytes(peak)}",
+            f"RSS puncak proses: {_format_bytes(rss) if rss is not None else '-'}",
+            "Catatan: cProfile hanya mengukur thread utama; alokasi adalah memori "
+            "yang masih hidup saat sesi berakhir.",
+        ]
+        for name in SUBSYSTEMS + (OTHER,):
+            entries = sorted(functions[name], reverse=True)[:self.top]
+            sites = sorted(allocations[name], reverse=True)[:self.top]
+            total_size = sum(site[0] for site in allocations[name])
+            lines += ["", f"== {name} ==",
+                      f"Fungsi teratas menurut waktu kumulatif ({len(functions[name])} fungsi):",
+                      f"{'kumulatif(s)':>13} {'sendiri(s)':>11} {'panggilan':>10}  fungsi"]
+            lines += [f"{cumulative:>13.3f} {own:>11.3f} {calls:>10}  {label}"
+                      for cumulative, own, calls, label in entries]
+            lines += [f"Lokasi alokasi teratas menurut ukuran (total {_format_bytes(total_size)}):",
+                      f"{'byte':>13} {'blok':>11}  lokasi"]
+            lines += [f"{size:>13} {count:>11}  {label}" for size, count, label in sites]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,203 @@
+# utils/tracing.py
+"""
+Span jejak (trace) operasi utama dalam format Chrome trace-event, untuk
+dibuka di chrome://tracing atau https://ui.perfetto.dev.
+
+Operasi diberi penanda dengan dekorator atau context manager:
+
+    @traced("composite", "layers")
+    def get_composite_image(self): ...
+
+    with span("decode", "image", path=file_path):
+        ...
+
+Selama perekaman tidak aktif (default), penanda hanya memeriksa satu
+variabel global lalu langsung menjalankan fungsinya. Perekaman dimulai
+dengan start(path) (misal lewat main.py --trace-spans) dan file JSON baru
+ditulis saat stop(). Setiap span mencatat id thread pemanggil, sehingga
+pekerjaan thread latar belakang (simpan, thumbnail, dekode) tampil di
+track masing-masing.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+from config import AppConfig
+from utils.log import get_logger
+
+log = get_logger("trace")
+
+_recorder = None
+
+
+class _SpanRecorder:
+    """
+    Mengumpulkan event trace di memori sampai stop().
+
+    Span dicatat dari banyak thread sekaligus; pemeriksaan batas, penambahan
+    event, dan snapshot saat ditulis dilindungi satu lock.
+    """
+
+    def __init__(self, path: str, max_events: int):
+        self.path = path
+        self.max_events = max_events
+        self.events = []
+        self.dropped = 0
+        self._pid = os.getpid()
+        self._start = time.perf_counter()
+        self._threads = set()
+        self._closed = False  # Setelah write(), span yang masih berjalan diabaikan
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    def complete(self, name: str, category: str, start: float, args=None):
+        """
+        Mencatat span yang dimulai pada start (perf_counter) dan berakhir sekarang.
+        """
+        end = time.perf_counter()
+        tid = threading.get_ident()
+        event = {"name": name, "cat": category, "ph": "X", "pid": self._pid, "tid": tid,
+                 "ts": round((start - self._start) * 1e6, 1),
+                 "dur": round((end - start) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        with self._lock:
+            if self._closed:
+                return
+            if len(self.events) >= self.max_events:
+                self.dropped += 1
+                return
+            if tid not in self._threads:
+                self._name_thread(tid)
+            self.events.append(event)
+
+    def _name_thread(self, tid: int):
+        # Event metadata agar track thread diberi nama (MainThread, thumbnail-worker, ...).
+        # Dipanggil dengan self._lock sudah dipegang.
+        self._threads.add(tid)
+        self.events.append({"name": "thread_name", "ph": "M", "pid": self._pid,
+                            "tid": tid,
+                            "args": {"name": threading.current_thread().name}})
+
+    def write(self) -> int:
+        """
+        Menutup perekam dan menulis snapshot event ke file.
+
+        Returns:
+            Jumlah event yang ditulis.
+        """
+        with self._lock:
+            self._closed = True
+            events = list(self.events)
+            dropped = self.dropped
+        with open(self.path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped_events": dropped}},
+                      trace_file, separators=(",", ":"))
+        return len(events)
+
+
+class _Span:
+    __slots__ = ("_recorder", "_name", "_category", "_args", "_start")
+
+    def __init__(self, recorder, name: str, category: str, args: dict):
+        self._recorder = recorder
+        self._name = name
+        self._category = category
+        self._args = args
+
+    def __enter__(self):
+        self._start = self._recorder.now()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._recorder.complete(self._name, self._category, self._start, self._args)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+
+def start(path: str, max_events: int = None):
+    """
+    Mulai merekam span; file trace ditulis ke path saat stop().
+
+    Args:
+        max_events (int, optional): Batas event di memori (default
+            AppConfig.TRACE_SPANS_MAX_EVENTS); event berikutnya dibuang.
+    """
+    global _recorder
+    stop()
+    _recorder = _SpanRecorder(path, max_events or AppConfig.TRACE_SPANS_MAX_EVENTS)
+    log.info("Merekam span trace ke: %s", path)
+
+
+def stop():
+    """
+    Menghentikan perekaman dan menulis file trace.
+
+    Returns:
+        Jumlah event yang ditulis, atau None jika tidak sedang merekam.
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is None:
+        return None
+    try:
+        count = recorder.write()
+    except OSError as e:
+        log.error("Gagal menulis trace span: %s", e)
+        return None
+    if recorder.dropped:
+        log.warning("%d event trace dibuang (batas %d).",
+                    recorder.dropped, recorder.max_events)
+    log.info("Trace span ditulis: %d event di %s", count, recorder.path)
+    return count
+
+
+def span(name: str, category: str = "app", **args):
+    """
+    Context manager yang mencatat satu span; args ikut ditampilkan di viewer.
+    """
+    recorder = _recorder
+    if recorder is None:
+        return _NO_SPAN
+    return _Span(recorder, name, category, args or None)
+
+
+def traced(name: str, category: str = "app"):
+    """
+    Dekorator yang mencatat setiap pemanggilan fungsi sebagai span.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return function(*args, **kwargs)
+            start_time = recorder.now()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                recorder.complete(name, category, start_time)
+        return wrapper
+    return decorate